@@ -16,28 +16,167 @@ T_BOUNDS = [0.0, 1.0]  # Limites temporais (t)
 C_BASE = 1.0
 C_GRAD_X = 0.5
 C_GRAD_Y = 0.3
+# Modelo de velocidade em grid (meios estratificados/heterogêneos): se definido,
+# substitui C_BASE/C_GRAD. Arquivo .npy ou binário bruto (lido via memmap, exige
+# VELOCITY_SHAPE) com eixos (y, x): o último eixo é x. Interpolado no device.
+VELOCITY_FILE = None
+VELOCITY_SHAPE = None
+VELOCITY_DTYPE = "float32"
+# Limites cobertos pelos nós do grid (padrão: X_BOUNDS e Y_BOUNDS); fora deles vale a borda
+VELOCITY_BOUNDS = None
+# Conjuntos de pontos com a velocidade interpolada em cache (pontos fixos do
+# L-BFGS, grids de avaliação); com PDE_CHUNK_SIZE, ao menos o número de blocos
+VELOCITY_CACHE_SIZE = 8
 
 # --- Parâmetros de Treinamento ---
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 LEARNING_RATE = 1e-4
 EPOCHS = 30000 # Problemas 2D são mais difíceis, podem precisar de mais
+# Estágios de otimização em sequência; None equivale a [("adam", EPOCHS)].
+# Ex.: [("adam", 20000), ("lbfgs", 2000)] refina com L-BFGS (strong-Wolfe) sobre
+# um conjunto fixo de pontos, renovado a cada LBFGS_REFRESH_EVERY épocas (None = nunca)
+STAGES = None
+LBFGS_LR = 1.0
+LBFGS_MAX_ITER = 1   # Iterações de L-BFGS por época
+LBFGS_HISTORY = 50
+LBFGS_REFRESH_EVERY = None
 # Número de pontos (aumentado para o domínio 3D)
 N_IC = 1000   # Pontos de Condição Inicial (t=0)
 N_BC = 1000   # Pontos de Condição de Contorno (em cada uma das 4 bordas)
 N_PDE = 20000 # Pontos de Colocação (resíduo da PDE)
 
+# Gera os pontos da próxima época numa thread enquanto a atual é treinada
+PREFETCH_DATA = True
+# Amostrador dos pontos: "uniform", "sobol", "halton" ou "lhs".
+# Os de baixa discrepância são pré-computados num pool de SAMPLER_POOL janelas.
+SAMPLER = "uniform"
+SAMPLER_POOL = 16
+# Refinamento adaptativo dos pontos de PDE pelo resíduo: None, "rar" ou "importance".
+# A cada ADAPTIVE_EVERY épocas pontua ADAPTIVE_POOL candidatos; "rar" acrescenta os
+# ADAPTIVE_ADD piores (até ADAPTIVE_MAX), "importance" sorteia com p ~ |r|^ADAPTIVE_POWER.
+ADAPTIVE = None
+ADAPTIVE_EVERY = 500
+# Resíduo da PDE em blocos com acumulação de gradientes: None (lote completo),
+# um inteiro (pontos por bloco) ou "auto" (escolhe o bloco por MAX_RESIDUAL_MEM_MB)
+PDE_CHUNK_SIZE = None
+MAX_RESIDUAL_MEM_MB = 512
+# Métricas acumuladas no device e copiadas para o host a cada METRICS_FLUSH_EVERY
+# épocas (histórico, barra de progresso, scheduler e melhor modelo). O
+# ReduceLROnPlateau vê as losses só no flush: nos estágios Adam o intervalo é
+# limitado a patience // 10 épocas, o atraso máximo de uma redução do LR
+METRICS_FLUSH_EVERY = 100
+# Descarta no device o passo de uma época com loss não finita (cópia dos pesos
+# e do estado do otimizador antes de cada passo); False remove essa cópia
+FINITE_STEP_GUARD = True
+# Histórico gravado incrementalmente a cada flush: "binary" (linhas float64 em
+# HISTORY_PATH com extensão .bin, lidas via memmap; CSV exportado ao final) ou "csv"
+HISTORY_SINK = "binary"
+# Decima o histórico lido para o plot de loss a no máximo N linhas (None: todas)
+HISTORY_PLOT_MAX_ROWS = None
+
 # --- Arquitetura da Rede ---
 # [input_dim, hidden_1, ..., output_dim]
 # Input: (x, y, t) -> 3 neurônios
 # Output: u(x, y, t) -> 1 neurônio
 LAYERS = [3, 40, 40, 40, 40, 1]
 
+# Derivadas do resíduo: "autograd" (grafos aninhados de torch.autograd.grad)
+# ou "taylor" (valor, gradiente e 2ª derivada propagados numa única passada)
+DERIVATIVE_MODE = "taylor"
+# Avalia PDE, IC e BC numa única passada pela rede (tensor empacotado).
+# Compensa com poucos pontos; com N_PDE grande a passada separada é mais rápida.
+FUSED_LOSS = False
+# Laplaciano do resíduo: "exact" (uma 2ª derivada por eixo espacial) ou
+# "hutchinson" (média de v^T H v em LAPLACIAN_PROBES sondas aleatórias por
+# ponto; o custo deixa de crescer com a dimensão espacial)
+LAPLACIAN_MODE = "exact"
+LAPLACIAN_PROBES = 2
+LAPLACIAN_PROBE_DIST = "rademacher"  # ou "gaussian"
+# Divide as sondas em dois grupos independentes e usa r_a * r_b na loss,
+# sem o viés +Var(r) do quadrado de uma única estimativa. O histórico, o
+# melhor modelo e o scheduler usam o quadrado da média das duas (>= 0)
+LAPLACIAN_UNBIASED = True
+
+# --- Restrições Rígidas (ansatz de saída) ---
+# u = g + D * NN, com D nulo nas bordas. HARD_BC impõe u = 0 nas bordas por
+# construção: sem pontos nem loss de BC (W_BC deixa de atuar). HARD_IC impõe
+# também o pulso inicial (g = pulso, D com fator (t - t_min)): sem o termo
+# W_IC_U; a velocidade inicial continua na loss. Com os dois, o pulso de g é
+# deslocado para se anular nas bordas (difere do Gaussiano em ~exp(-a L^2 / 4)).
+HARD_BC = False
+HARD_IC = False
+
 # --- Pesos da Loss Function ---
 W_PDE = 50.0
 W_IC_U = 1.0
 W_IC_V = 50.0
 W_BC = 5.0
 
+# --- Checkpoints ---
+# Melhor modelo gravado em segundo plano no máximo a cada BEST_SAVE_INTERVAL segundos.
+# A cada CKPT_EVERY épocas (None desativa) um checkpoint intermediário é gravado;
+# ficam os CKPT_KEEP mais recentes e, com CKPT_LOG_SPACED, os de índice potência de 2.
+BEST_SAVE_INTERVAL = 30.0
+CKPT_EVERY = 500
+CKPT_KEEP = 3
+CKPT_LOG_SPACED = True
+
+# --- Treino Distribuído ---
+# Ativado ao lançar com torchrun (ex.: torchrun --nproc_per_node=4 main_2d.py): cada
+# processo amostra N_PDE/N_IC/N_BC divididos pelo número de processos e os gradientes
+# têm a média feita por all_reduce (DIST_BACKEND "gloo" roda em CPU e entre nós). Cada processo
+# usa DIST_THREADS threads (None: núcleos do nó divididos pelos processos locais).
+DIST_BACKEND = "gloo"
+DIST_THREADS = None
+
+# --- Ensemble ---
+# Ensemble vetorizado (src_2/ensemble.py, scripts/train_ensemble.py): ENSEMBLE_SIZE
+# PINNs com seeds 42, 43, ... (ou ENSEMBLE_SEEDS) treinados numa só chamada por época
+ENSEMBLE_SIZE = 8
+ENSEMBLE_SEEDS = None
+
+# --- Profiling ---
+# Com PROFILE = True o torch.profiler cobre PROFILE_SCHEDULE = (wait, warmup, active)
+# épocas (PROFILE_REPEAT janelas) e grava trace do Chrome + tabela de operadores ao
+# lado de HISTORY_PATH (<histórico>_profile_step{N}.json / .txt)
+PROFILE = False
+PROFILE_SCHEDULE = (10, 5, 20)
+PROFILE_REPEAT = 1
+
+# --- Inferência ---
+# Backend usado nos plots: "script" (TorchScript congelado), "compile" (torch.compile)
+# ou None (modelo original, sem otimização)
+INFERENCE_BACKEND = "script"
+# Avaliação dos grids dos plots em blocos de no máximo FIELD_MAX_MEM_MB;
+# FIELD_WORKERS > 1 avalia os blocos em paralelo (pool de threads)
+FIELD_MAX_MEM_MB = 256
+FIELD_WORKERS = 0
+# Campos avaliados ficam em cache (LRU em memória com FIELD_CACHE_ITEMS campos e
+# arquivos .npy em FIELD_CACHE_DIR, None desativa); pesos novos invalidam o cache
+FIELD_CACHE_ITEMS = 32
+FIELD_CACHE_DIR = "resultados/simulacao_2d/cache/"
+
+# --- Plots ---
+# Figuras renderizadas num pool de PLOT_WORKERS processos (None: um por núcleo, 0: no
+# próprio processo). Com SNAPSHOT_EVERY (None desativa) o treino entrega um snapshot
+# a cada N épocas a SNAPSHOT_WORKERS processos, sem esperar pelo Matplotlib.
+PLOT_WORKERS = None
+SNAPSHOT_EVERY = None
+SNAPSHOT_WORKERS = 1
+SNAPSHOT_TIMES = [0.0, 0.25, 0.5, 0.75]
+# Animação da propagação (None desativa): .mp4 (ffmpeg), .gif ou .npy (quadros brutos).
+# ANIMATION_FRAMES quadros avaliados em blocos de ANIMATION_CHUNK tempos
+ANIMATION_FILE = None
+ANIMATION_FRAMES = 200
+ANIMATION_FPS = 25
+ANIMATION_CHUNK = 16
+
+# --- Solução de Referência ---
+# Diferenças finitas (leapfrog) numa malha FD_REFINE vezes mais fina que a do
+# PINN, com dt = FD_CFL vezes o limite de estabilidade (CFL)
+FD_REFINE = 2
+FD_CFL = 0.9
+
 # --- Caminhos de Saída ---
 SAVE_PATH = "resultados/simulacao_2d/"
 MODEL_PATH = "resultados/simulacao_2d/modelo/best_model.pth"
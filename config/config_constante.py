@@ -18,23 +18,131 @@ C = 1.0
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 LEARNING_RATE = 1e-3
 EPOCHS = 20000
+# Estágios de otimização em sequência; None equivale a [("adam", EPOCHS)].
+# Ex.: [("adam", 20000), ("lbfgs", 2000)] refina com L-BFGS (strong-Wolfe) sobre
+# um conjunto fixo de pontos, renovado a cada LBFGS_REFRESH_EVERY épocas (None = nunca)
+STAGES = None
+LBFGS_LR = 1.0
+LBFGS_MAX_ITER = 1   # Iterações de L-BFGS por época
+LBFGS_HISTORY = 50
+LBFGS_REFRESH_EVERY = None
 # Número de pontos amostrados a cada época
 N_IC = 200  # Pontos de Condição Inicial (t=0)
 N_BC = 200  # Pontos de Condição de Contorno (x=0, x=L)
 N_PDE = 10000 # Pontos de Colocação (resíduo da PDE)
 
+# Gera os pontos da próxima época numa thread enquanto a atual é treinada
+PREFETCH_DATA = True
+# Amostrador dos pontos: "uniform", "sobol", "halton" ou "lhs".
+# Os de baixa discrepância são pré-computados num pool de SAMPLER_POOL janelas.
+SAMPLER = "uniform"
+SAMPLER_POOL = 16
+# Refinamento adaptativo dos pontos de PDE pelo resíduo: None, "rar" ou "importance".
+# A cada ADAPTIVE_EVERY épocas pontua ADAPTIVE_POOL candidatos; "rar" acrescenta os
+# ADAPTIVE_ADD piores (até ADAPTIVE_MAX), "importance" sorteia com p ~ |r|^ADAPTIVE_POWER.
+ADAPTIVE = None
+ADAPTIVE_EVERY = 500
+# Resíduo da PDE em blocos com acumulação de gradientes: None (lote completo),
+# um inteiro (pontos por bloco) ou "auto" (escolhe o bloco por MAX_RESIDUAL_MEM_MB)
+PDE_CHUNK_SIZE = None
+MAX_RESIDUAL_MEM_MB = 512
+# Métricas acumuladas no device e copiadas para o host a cada METRICS_FLUSH_EVERY
+# épocas (histórico, barra de progresso, scheduler e melhor modelo). O
+# ReduceLROnPlateau vê as losses só no flush: nos estágios Adam o intervalo é
+# limitado a patience // 10 épocas, o atraso máximo de uma redução do LR
+METRICS_FLUSH_EVERY = 100
+# Descarta no device o passo de uma época com loss não finita (cópia dos pesos
+# e do estado do otimizador antes de cada passo); False remove essa cópia
+FINITE_STEP_GUARD = True
+# Histórico gravado incrementalmente a cada flush: "binary" (linhas float64 em
+# HISTORY_PATH com extensão .bin, lidas via memmap; CSV exportado ao final) ou "csv"
+HISTORY_SINK = "binary"
+# Decima o histórico lido para o plot de loss a no máximo N linhas (None: todas)
+HISTORY_PLOT_MAX_ROWS = None
+
 # --- Arquitetura da Rede ---
 # [input_dim, hidden_1, hidden_2, ..., output_dim]
 # Input: (x, t) -> 2 neurônios
 # Output: u(x, t) -> 1 neurônio
 LAYERS = [2, 32, 32, 32, 32, 1]
 
+# Derivadas do resíduo: "autograd" (grafos aninhados de torch.autograd.grad)
+# ou "taylor" (valor, gradiente e 2ª derivada propagados numa única passada)
+DERIVATIVE_MODE = "taylor"
+# Avalia PDE, IC e BC numa única passada pela rede (tensor empacotado).
+# Compensa com poucos pontos; com N_PDE grande a passada separada é mais rápida.
+FUSED_LOSS = False
+
 # --- Pesos da Loss Function ---
 W_PDE = 1.0       # Peso para o resíduo da PDE
 W_IC_U = 1.0      # Peso para a condição inicial u(x,0)
 W_IC_V = 0.1      # Peso para a condição inicial u_t(x,0) (velocidade)
 W_BC = 1.0       # Peso para as condições de contorno
 
+# --- Checkpoints ---
+# Melhor modelo gravado em segundo plano no máximo a cada BEST_SAVE_INTERVAL segundos.
+# A cada CKPT_EVERY épocas (None desativa) um checkpoint intermediário é gravado;
+# ficam os CKPT_KEEP mais recentes e, com CKPT_LOG_SPACED, os de índice potência de 2.
+BEST_SAVE_INTERVAL = 30.0
+CKPT_EVERY = None
+CKPT_KEEP = 3
+CKPT_LOG_SPACED = True
+
+# --- Treino Distribuído ---
+# Ativado ao lançar com torchrun (ex.: torchrun --nproc_per_node=4 main.py --model constante): cada
+# processo amostra N_PDE/N_IC/N_BC divididos pelo número de processos e os gradientes
+# têm a média feita por all_reduce (DIST_BACKEND "gloo" roda em CPU e entre nós). Cada processo
+# usa DIST_THREADS threads (None: núcleos do nó divididos pelos processos locais).
+DIST_BACKEND = "gloo"
+DIST_THREADS = None
+
+# --- Ensemble ---
+# Ensemble vetorizado (src/ensemble.py, scripts/train_ensemble.py): ENSEMBLE_SIZE
+# PINNs com seeds 42, 43, ... (ou ENSEMBLE_SEEDS) treinados numa só chamada por época
+ENSEMBLE_SIZE = 8
+ENSEMBLE_SEEDS = None
+
+# --- Profiling ---
+# Com PROFILE = True o torch.profiler cobre PROFILE_SCHEDULE = (wait, warmup, active)
+# épocas (PROFILE_REPEAT janelas) e grava trace do Chrome + tabela de operadores ao
+# lado de HISTORY_PATH (<histórico>_profile_step{N}.json / .txt)
+PROFILE = False
+PROFILE_SCHEDULE = (10, 5, 20)
+PROFILE_REPEAT = 1
+
+# --- Inferência ---
+# Backend usado nos plots: "script" (TorchScript congelado), "compile" (torch.compile)
+# ou None (modelo original, sem otimização)
+INFERENCE_BACKEND = "script"
+# Avaliação dos grids dos plots em blocos de no máximo FIELD_MAX_MEM_MB;
+# FIELD_WORKERS > 1 avalia os blocos em paralelo (pool de threads)
+FIELD_MAX_MEM_MB = 256
+FIELD_WORKERS = 0
+# Campos avaliados ficam em cache (LRU em memória com FIELD_CACHE_ITEMS campos e
+# arquivos .npy em FIELD_CACHE_DIR, None desativa); pesos novos invalidam o cache
+FIELD_CACHE_ITEMS = 32
+FIELD_CACHE_DIR = "resultados/constante/cache/"
+
+# --- Plots ---
+# Figuras renderizadas num pool de PLOT_WORKERS processos (None: um por núcleo, 0: no
+# próprio processo). Com SNAPSHOT_EVERY (None desativa) o treino entrega um snapshot
+# a cada N épocas a SNAPSHOT_WORKERS processos, sem esperar pelo Matplotlib.
+PLOT_WORKERS = None
+SNAPSHOT_EVERY = None
+SNAPSHOT_WORKERS = 1
+# Animação da propagação (None desativa): .mp4 (ffmpeg), .gif ou .npy (quadros brutos).
+# ANIMATION_FRAMES quadros avaliados em blocos de ANIMATION_CHUNK tempos
+ANIMATION_FILE = None
+ANIMATION_FRAMES = 200
+ANIMATION_FPS = 25
+ANIMATION_CHUNK = 16
+
+# --- Solução de Referência ---
+# Diferenças finitas (leapfrog) numa malha FD_REFINE vezes mais fina que a do
+# PINN, com dt = FD_CFL vezes o limite de estabilidade (CFL)
+FD_REFINE = 2
+FD_CFL = 0.9
+
 # --- Caminhos de Saída ---
 SAVE_PATH = "resultados/constante/"
 MODEL_PATH = "resultados/constante/modelo/best_model.pth"
@@ -8,8 +8,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
 
 try:
     from src.trainer import run_training
-    from src.utils import setup_device
-    from src.visualization import plot_wave_propagation, plot_wave_snapshots, plot_loss_history
+    from src.distributed import is_main_process
+    from src.utils import setup_device, make_field_cache
+    from src.model import optimize_for_inference
+    from src.visualization import plot_wave_propagation, plot_wave_snapshots, plot_loss_history, make_renderer
+    from src.visualization import export_wave_animation
     import config.config_constante as config_const
     import config.config_variavel as config_var
 except ImportError as e:
@@ -38,6 +41,9 @@ def main(model_type):
 
     # 1. Treinamento
     model, history_df = run_training(config)
+    # No treino distribuído (torchrun), só o processo 0 gera os plots
+    if not is_main_process():
+        return
     
     # 2. Visualização
     print("Treinamento concluído. Gerando plots...")
@@ -46,10 +52,24 @@ def main(model_type):
     # Coloca o modelo em modo de avaliação (importante para dropout/batchnorm, se houver)
     model.eval() 
 
-    # Gera os plots principais para sua apresentação
-    plot_wave_propagation(model, config, device, filename="propagacao_onda_final.png")
-    plot_wave_snapshots(model, config, device, filename="snapshots_onda_final.png")
-    plot_loss_history(history_df, config, filename="loss_history_final.png")
+    # Cache dos campos avaliados, indexado pelos pesos do modelo original
+    cache = make_field_cache(model, config)
+
+    # Versão congelada/compilada do modelo para avaliar os grids dos plots
+    backend = getattr(config, 'INFERENCE_BACKEND', None)
+    if backend:
+        model = optimize_for_inference(model, backend)
+
+    # Gera os plots principais para sua apresentação (renderizados em paralelo)
+    renderer = make_renderer(config)
+    plot_wave_propagation(model, config, device, filename="propagacao_onda_final.png", cache=cache, renderer=renderer)
+    plot_wave_snapshots(model, config, device, filename="snapshots_onda_final.png", cache=cache, renderer=renderer)
+    plot_loss_history(history_df, config, filename="loss_history_final.png", renderer=renderer)
+    renderer.close()
+
+    # Animação da propagação, gravada em streaming (opcional)
+    if getattr(config, 'ANIMATION_FILE', None):
+        export_wave_animation(model, config, device, filename=config.ANIMATION_FILE)
     
     print(f"--- Experimento {config.MODEL_TYPE} concluído ---")
     print(f"Modelo salvo em: {config.MODEL_PATH}")
@@ -1,16 +1,17 @@
 # main_2d.py
 import os
 import sys
-import pandas as pd
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'src_2')))
 
 try:
     from trainer import run_training
-    from utils import setup_device, load_model
-    from visualization import plot_wave_snapshots_2d, plot_loss_history, plot_wave_surface_3d
+    from distributed import is_main_process
+    from utils import setup_device, load_model, read_history, make_field_cache
+    from visualization import plot_wave_snapshots_2d, plot_loss_history, plot_wave_surface_3d, make_renderer
+    from visualization import export_wave_animation
     import config.config_2d_variavel as config_2d
-    from model import PINN # Precisa importar a classe PINN para load_model
+    from model import PINN, optimize_for_inference # Precisa importar a classe PINN para load_model
 except ImportError as e:
     print(f"Erro ao importar módulos do 'src_2'. Verifique a estrutura de pastas.")
     print(f"Detalhe do erro: {e}")
@@ -39,24 +40,42 @@ def main():
         print("Modelo não encontrado ou carregado com erro. Iniciando treinamento...")
         model, history_df = run_training(config)
     else: # Se carregou com sucesso, apenas carrega o histórico para plotar
-        history_df = pd.read_csv(config.HISTORY_PATH)
+        history_df = read_history(config.HISTORY_PATH, max_rows=getattr(config, 'HISTORY_PLOT_MAX_ROWS', None))
 
+    # No treino distribuído (torchrun), só o processo 0 gera os plots
+    if not is_main_process():
+        return
 
     # 2. Visualização
     print("Treinamento concluído. Gerando plots...")
     
     model.eval() 
 
+    # Cache dos campos avaliados, indexado pelos pesos do modelo original: os
+    # snapshots e as superfícies usam os mesmos tempos, e o grid é avaliado uma vez
+    cache = make_field_cache(model, config)
+
+    # Versão congelada/compilada (normalização dobrada na 1ª camada) para os grids densos
+    backend = getattr(config, 'INFERENCE_BACKEND', None)
+    if backend:
+        model = optimize_for_inference(model, backend)
+
+    # As figuras são renderizadas em paralelo num pool de processos (PLOT_WORKERS)
+    renderer = make_renderer(config)
     plot_wave_snapshots_2d(model, config, device, 
                            times=[0.0, 0.25, 0.5, 0.75], 
-                           filename="snapshots_2d_final.png")
+                           filename="snapshots_2d_final.png", cache=cache, renderer=renderer)
     
-    plot_wave_surface_3d(model, config, device, t_val=0.0, filename="surface_3d_t0.00.png")
-    plot_wave_surface_3d(model, config, device, t_val=0.25, filename="surface_3d_t0.25.png")
-    plot_wave_surface_3d(model, config, device, t_val=0.50, filename="surface_3d_t0.50.png")
-    plot_wave_surface_3d(model, config, device, t_val=0.75, filename="surface_3d_t0.75.png")
+    # Um único grid avaliado para os quatro tempos, um arquivo por tempo
+    plot_wave_surface_3d(model, config, device, t_val=[0.0, 0.25, 0.50, 0.75],
+                         filename="surface_3d_t{t:.2f}.png", cache=cache, renderer=renderer)
+
+    plot_loss_history(history_df, config, filename="loss_history_2d_final.png", renderer=renderer)
+    renderer.close()
 
-    plot_loss_history(history_df, config, filename="loss_history_2d_final.png")
+    # Animação da propagação, gravada em streaming (opcional)
+    if getattr(config, 'ANIMATION_FILE', None):
+        export_wave_animation(model, config, device, filename=config.ANIMATION_FILE)
     
     print(f"--- Experimento {config.MODEL_TYPE} concluído ---")
     print(f"Modelo salvo em: {config.MODEL_PATH}")
@@ -0,0 +1,61 @@
+# main_3d.py
+import os
+import sys
+
+try:
+    from src_nd.trainer import run_training
+    from src_nd.distributed import is_main_process
+    from src_nd.model import PINN, optimize_for_inference
+    from src_nd.utils import setup_device, load_model, read_history, make_field_cache
+    from src_nd.visualization import plot_wave_slices, plot_loss_history, make_renderer
+    import config.config_3d as config_3d
+except ImportError as e:
+    print(f"Erro ao importar módulos do 'src_nd'. Verifique a estrutura de pastas.")
+    print(f"Detalhe do erro: {e}")
+    sys.exit(1)
+
+def main():
+    """
+    Função principal para treinar o modelo 3D (motor genérico src_nd).
+    """
+    config = config_3d
+
+    print(f"--- Iniciando Experimento: {config.MODEL_TYPE} ---")
+    print(config.DESCRIPTION)
+
+    os.makedirs(config.PLOT_PATH, exist_ok=True)
+    os.makedirs(os.path.dirname(config.MODEL_PATH), exist_ok=True)
+
+    # 1. Treinamento (ou carrega o modelo já treinado)
+    device = setup_device(config)
+    model = load_model(PINN, config, device)
+    if model is None:
+        print("Modelo não encontrado ou carregado com erro. Iniciando treinamento...")
+        model, history_df = run_training(config)
+    else:
+        history_df = read_history(config.HISTORY_PATH, max_rows=getattr(config, 'HISTORY_PLOT_MAX_ROWS', None))
+
+    # No treino distribuído (torchrun), só o processo 0 gera os plots
+    if not is_main_process():
+        return
+
+    # 2. Visualização: cortes z = SLICE_Z em alguns tempos
+    print("Treinamento concluído. Gerando plots...")
+    model.eval()
+    cache = make_field_cache(model, config)
+    backend = getattr(config, 'INFERENCE_BACKEND', None)
+    if backend:
+        model = optimize_for_inference(model, backend)
+
+    renderer = make_renderer(config)
+    plot_wave_slices(model, config, device, times=[0.0, 0.25, 0.5, 0.75],
+                     filename="snapshots_3d_final.png", cache=cache, renderer=renderer)
+    plot_loss_history(history_df, config, filename="loss_history_3d_final.png", renderer=renderer)
+    renderer.close()
+
+    print(f"--- Experimento {config.MODEL_TYPE} concluído ---")
+    print(f"Modelo salvo em: {config.MODEL_PATH}")
+    print(f"Plots salvos em: {config.PLOT_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Micro-benchmarks do caminho crítico do treino (1D e 2D).
+
+Mede separadamente get_training_data, PINN.forward, compute_pde_residual,
+compute_ic_derivatives, backward e optimizer.step, varrendo N_PDE, largura
+e profundidade das camadas e número de threads. Os resultados vão para um
+JSON; com --compare, cada estágio é comparado com um baseline salvo e as
+regressões acima de --tolerance são sinalizadas (código de saída 1).
+
+Exemplos:
+    python scripts/benchmark_hot_path.py --out bench.json
+    python scripts/benchmark_hot_path.py --variant 2d --n-pde 5000,20000 --width 40,80 --threads 1,4
+    python scripts/benchmark_hot_path.py --out novo.json --compare bench.json --tolerance 0.1
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import types
+
+import torch
+
+# Ajusta path para permitir imports de src, src_2 e config
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(ROOT)
+
+STAGES = ['get_training_data', 'forward', 'compute_pde_residual', 'compute_ic_derivatives',
+          'backward', 'optimizer_step']
+
+
+def load_variant(variant):
+    """(config base, PINN, get_training_data, compute_pde_residual, compute_ic_derivatives, compute_loss)."""
+    if variant == '2d':
+        import config.config_2d_variavel as cfg
+        from src_2.model import PINN, ansatz_options
+        from src_2.data_loader import get_training_data
+        from src_2.physics import compute_pde_residual, compute_ic_derivatives
+        from src_2.trainer import compute_loss
+        build = lambda c: PINN(c.LAYERS, c.X_BOUNDS, c.Y_BOUNDS, c.T_BOUNDS, **ansatz_options(c))
+    else:
+        import config.config_variavel as cfg
+        from src.model import PINN, ansatz_options
+        from src.data_loader import get_training_data
+        from src.physics import domain_bounds, compute_pde_residual, compute_ic_derivatives
+        from src.trainer import compute_loss
+        build = lambda c: PINN(c.LAYERS, domain_bounds(c), **ansatz_options(c))
+    return cfg, build, get_training_data, compute_pde_residual, compute_ic_derivatives, compute_loss
+
+
+def time_call(fn, device, repeats, warmup, setup=None):
+    """Mediana e mínimo (s) de 'repeats' chamadas de fn(setup()), após 'warmup' chamadas."""
+    samples = []
+    for i in range(warmup + repeats):
+        arg = setup() if setup is not None else None
+        if device.type == 'cuda':
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        fn(arg)
+        if device.type == 'cuda':
+            torch.cuda.synchronize()
+        if i >= warmup:
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples), min(samples)
+
+
+def bench_case(variant, n_pde, width, depth, threads, device, repeats, warmup):
+    """Tempos de cada estágio para uma combinação de parâmetros."""
+    base, build, get_training_data, compute_pde_residual, compute_ic_derivatives, compute_loss = \
+        load_variant(variant)
+    config = types.SimpleNamespace(**{k: getattr(base, k) for k in dir(base) if k.isupper()})
+    n_in = 3 if variant == '2d' else 2
+    config.N_PDE = n_pde
+    config.LAYERS = [n_in] + [width] * depth + [1]
+    config.DEVICE = str(device)
+
+    torch.set_num_threads(threads)
+    torch.manual_seed(0)
+    model = build(config).to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=config.LEARNING_RATE)
+    data = get_training_data(config, device)
+    pde_input, ic_input = data[0], data[1]
+
+    def forward(_):
+        with torch.no_grad():
+            model(pde_input)
+
+    def fresh_loss():
+        optimizer.zero_grad()
+        return compute_loss(model, data, config, device)[0]
+
+    def step(_):
+        optimizer.step()
+
+    def with_grads():
+        fresh_loss().backward()
+
+    timings = {
+        'get_training_data': time_call(lambda _: get_training_data(config, device), device, repeats, warmup),
+        'forward': time_call(forward, device, repeats, warmup),
+        'compute_pde_residual': time_call(lambda _: compute_pde_residual(model, pde_input, config),
+                                          device, repeats, warmup),
+        'compute_ic_derivatives': time_call(lambda _: compute_ic_derivatives(model, ic_input),
+                                            device, repeats, warmup),
+        # O grafo é construído fora da medição; só o backward é cronometrado
+        'backward': time_call(lambda loss: loss.backward(), device, repeats, warmup, setup=fresh_loss),
+        'optimizer_step': time_call(step, device, repeats, warmup, setup=with_grads),
+    }
+    return [{'variant': variant, 'n_pde': n_pde, 'layers': config.LAYERS, 'threads': threads,
+             'stage': stage, 'median_s': median, 'min_s': best, 'repeats': repeats}
+            for stage, (median, best) in timings.items()]
+
+
+def case_key(row):
+    return (row['variant'], row['n_pde'], tuple(row['layers']), row['threads'], row['stage'])
+
+
+def compare(results, baseline, tolerance):
+    """Imprime a razão mediana/baseline por caso; retorna as regressões acima de tolerance."""
+    reference = {case_key(row): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        old = reference.get(case_key(row))
+        if old is None:
+            continue
+        ratio = row['median_s'] / old['median_s']
+        flag = ratio > 1.0 + tolerance
+        if flag:
+            regressions.append((row, ratio))
+        print(f"{'REGRESSÃO' if flag else 'ok':>9}  {row['variant']} N_PDE={row['n_pde']} "
+              f"layers={row['layers']} threads={row['threads']} {row['stage']:<24} "
+              f"{old['median_s'] * 1e3:9.3f} ms -> {row['median_s'] * 1e3:9.3f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def parse_ints(text):
+    return [int(v) for v in text.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do caminho crítico do treino.")
+    parser.add_argument('--variant', choices=['1d', '2d', 'all'], default='all')
+    parser.add_argument('--n-pde', type=parse_ints, default=[1000, 5000, 20000])
+    parser.add_argument('--width', type=parse_ints, default=[20, 40])
+    parser.add_argument('--depth', type=parse_ints, default=[4])
+    parser.add_argument('--threads', type=parse_ints, default=[torch.get_num_threads()])
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--out', default='benchmark_hot_path.json')
+    parser.add_argument('--compare', help="JSON de baseline para detectar regressões.")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Aumento relativo da mediana tolerado antes de acusar regressão.")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    variants = ['1d', '2d'] if args.variant == 'all' else [args.variant]
+    results = []
+    for variant, n_pde, width, depth, threads in itertools.product(
+            variants, args.n_pde, args.width, args.depth, args.threads):
+        rows = bench_case(variant, n_pde, width, depth, threads, device, args.repeats, args.warmup)
+        results.extend(rows)
+        summary = ', '.join(f"{row['stage']}={row['median_s'] * 1e3:.2f}ms" for row in rows)
+        print(f"{variant} N_PDE={n_pde} width={width} depth={depth} threads={threads}: {summary}")
+
+    report = {
+        'meta': {'torch': torch.__version__, 'python': platform.python_version(),
+                 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+                 'device': str(device), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados salvos em: {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressão(ões) acima de {args.tolerance:.0%}")
+            sys.exit(1)
+        print("Nenhuma regressão encontrada.")
+
+if __name__ == '__main__':
+    main()
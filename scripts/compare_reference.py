@@ -0,0 +1,49 @@
+"""Compara o modelo salvo com a solução de diferenças finitas (erro relativo L2 e L∞)."""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Ajusta path para permitir imports de src, src_2 e config
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(ROOT)
+
+
+def main(model_type, n_times):
+    if model_type == '2d':
+        from src_2.utils import setup_device, load_model
+        from src_2.model import PINN
+        from src_2.reference import compare_with_reference
+        from src_2.visualization import plot_axes
+        import config.config_2d_variavel as cfg
+        axes = plot_axes(cfg)
+    else:
+        from src.utils import setup_device, load_model
+        from src.model import PINN
+        from src.reference import compare_with_reference
+        import config.config_constante as cfg_const
+        import config.config_variavel as cfg_var
+        cfg = cfg_const if model_type == 'constante' else cfg_var
+        axes = (np.linspace(cfg.X_BOUNDS[0], cfg.X_BOUNDS[1], 200),)
+
+    device = setup_device(cfg)
+    model = load_model(PINN, cfg, device)
+    if model is None:
+        print("Modelo não pôde ser carregado. Verifique config.MODEL_PATH e a arquitetura.")
+        return
+
+    times = np.linspace(cfg.T_BOUNDS[0], cfg.T_BOUNDS[1], n_times)
+    start = time.perf_counter()
+    result = compare_with_reference(model, cfg, device, *axes, times)
+    print(f"Referência FD + avaliação do PINN em {time.perf_counter() - start:.2f} s")
+    print(f"Erro relativo L2 = {result['rel_l2']:.3e}, L∞ = {result['rel_linf']:.3e}")
+    for t_val, err in zip(times[::max(n_times // 5, 1)], result['rel_l2_t'][::max(n_times // 5, 1)]):
+        print(f"t={t_val:.3f} -> erro relativo L2 = {err:.3e}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compara o PINN com a solução de diferenças finitas.")
+    parser.add_argument('--model', choices=['constante', 'variavel', '2d'], default='2d')
+    parser.add_argument('--times', type=int, default=50, help="Número de tempos comparados.")
+    args = parser.parse_args()
+    main(args.model, args.times)
@@ -8,9 +8,9 @@ import numpy as np
 ROOT = os.path.dirname(os.path.dirname(__file__))
 sys.path.append(ROOT)
 
-from src_2.utils import setup_device, load_model
+from src_2.utils import setup_device, load_model, evaluate_field, make_field_cache
 import config.config_2d_variavel as cfg
-from src_2.model import PINN
+from src_2.model import PINN, optimize_for_inference
 
 
 def main():
@@ -23,24 +23,27 @@ def main():
         return
 
     model.eval()
+    cache = make_field_cache(model, cfg)
+    backend = getattr(cfg, 'INFERENCE_BACKEND', None)
+    if backend:
+        model = optimize_for_inference(model, backend)
 
     # Grid coarse para teste
-    x = torch.linspace(cfg.X_BOUNDS[0], cfg.X_BOUNDS[1], 100, device=device)
-    y = torch.linspace(cfg.Y_BOUNDS[0], cfg.Y_BOUNDS[1], 100, device=device)
-    X, Y = torch.meshgrid(x, y, indexing='xy')
+    x = np.linspace(cfg.X_BOUNDS[0], cfg.X_BOUNDS[1], 100)
+    y = np.linspace(cfg.Y_BOUNDS[0], cfg.Y_BOUNDS[1], 100)
 
     times = [0.0, 0.25 * (cfg.T_BOUNDS[1] - cfg.T_BOUNDS[0]) + cfg.T_BOUNDS[0],
              0.5 * (cfg.T_BOUNDS[1] - cfg.T_BOUNDS[0]) + cfg.T_BOUNDS[0]]
 
-    for t_val in times:
-        T = torch.full_like(X, float(t_val), device=device)
-        pts = torch.stack((X.flatten(), Y.flatten(), T.flatten()), dim=1)
-        with torch.no_grad():
-            try:
-                u = model(pts).cpu().numpy().reshape(X.cpu().numpy().shape)
-            except Exception as e:
-                print(f"Erro ao avaliar o modelo em t={t_val}: {e}")
-                continue
+    # Todos os tempos avaliados de uma vez: U tem forma (nt, ny, nx)
+    try:
+        U = evaluate_field(model, x, y, times, device,
+                           getattr(cfg, 'FIELD_MAX_MEM_MB', 256), getattr(cfg, 'FIELD_WORKERS', 0), cache=cache)
+    except Exception as e:
+        print(f"Erro ao avaliar o modelo: {e}")
+        return
+
+    for t_val, u in zip(times, U):
         print(f"t={t_val:.3f} -> min={u.min():.3e}, max={u.max():.3e}, mean={u.mean():.3e}")
 
 if __name__ == '__main__':
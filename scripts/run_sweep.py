@@ -0,0 +1,274 @@
+"""Varredura de hiperparâmetros: treina uma grade (ou busca aleatória) de configs em paralelo.
+
+A especificação é um JSON com:
+    "base":      "constante", "variavel" ou "2d" (config de partida)
+    "overrides": valores fixos aplicados a todos os trials (ex.: {"EPOCHS": 5000})
+    "grid":      {"CHAVE": [valores, ...]} -> produto cartesiano
+    "random":    {"n_trials": N, "seed": S, "params": {"CHAVE": distribuição}}
+                 com distribuição {"choice": [...]}, {"uniform": [a, b]},
+                 {"log_uniform": [a, b]} ou {"int": [a, b]}
+    "reference": true para medir o erro relativo contra a solução de diferenças finitas
+    "out":       diretório da varredura (um subdiretório por trial)
+
+Grade e busca aleatória podem ser combinadas (cada ponto aleatório é cruzado
+com a grade). Cada trial roda num processo de um pool de --workers, com os
+núcleos divididos entre eles, e grava params.json / result.json no seu
+diretório; trials com result.json de sucesso são pulados ao retomar. Ao
+final, todos os result.json são agregados em <out>/summary.csv.
+
+Exemplos:
+    python scripts/run_sweep.py config/sweep_2d.json --workers 4
+    python scripts/run_sweep.py config/sweep_2d.json --dry-run
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import traceback
+import types
+
+# Ajusta path para permitir imports de src, src_2 e config
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+# Chaves de caminho reescritas para o diretório de cada trial
+PATH_KEYS = {'MODEL_PATH': 'modelo/best_model.pth', 'PLOT_PATH': 'plots/',
+             'HISTORY_PATH': 'training_history.csv', 'FIELD_CACHE_DIR': 'cache/'}
+
+
+def load_base(base):
+    """Módulo de config de partida."""
+    if base == '2d':
+        import config.config_2d_variavel as cfg
+    elif base == 'constante':
+        import config.config_constante as cfg
+    elif base == 'variavel':
+        import config.config_variavel as cfg
+    else:
+        raise ValueError(f"Config base desconhecida: {base}. Opções: ['constante', 'variavel', '2d']")
+    return cfg
+
+
+def sample_value(rng, dist):
+    """Sorteia um valor de uma distribuição da busca aleatória."""
+    (kind, arg), = dist.items()
+    if kind == 'choice':
+        return arg[rng.randrange(len(arg))]
+    if kind == 'uniform':
+        return rng.uniform(*arg)
+    if kind == 'log_uniform':
+        return math.exp(rng.uniform(math.log(arg[0]), math.log(arg[1])))
+    if kind == 'int':
+        return rng.randint(*arg)
+    raise ValueError(f"Distribuição desconhecida: {kind}. Opções: ['choice', 'uniform', 'log_uniform', 'int']")
+
+
+def expand_trials(spec):
+    """
+    Lista de dicts de parâmetros de cada trial (grade x pontos aleatórios),
+    em ordem determinística, para que a retomada encontre os mesmos trials.
+    """
+    grid = spec.get('grid', {})
+    keys = sorted(grid)
+    grid_points = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+    random_spec = spec.get('random')
+    random_points = [{}]
+    if random_spec:
+        rng = random.Random(random_spec.get('seed', 0))
+        params = random_spec['params']
+        random_points = [{k: sample_value(rng, params[k]) for k in sorted(params)}
+                         for _ in range(random_spec['n_trials'])]
+    return [{**point, **sampled} for sampled in random_points for point in grid_points]
+
+
+def trial_id(spec, params):
+    """
+    Identificador estável do trial: hash do config base, dos overrides e dos
+    parâmetros, para que uma spec alterada não reaproveite trials antigos.
+    """
+    setup = {'base': spec['base'], 'overrides': spec.get('overrides', {}), 'params': params}
+    encoded = json.dumps(setup, sort_keys=True).encode()
+    return hashlib.sha1(encoded).hexdigest()[:10]
+
+
+def build_config(spec, params, trial_dir):
+    """Cópia do config base com overrides, parâmetros do trial e caminhos no trial_dir."""
+    base = load_base(spec['base'])
+    config = types.SimpleNamespace(**{k: getattr(base, k) for k in dir(base) if k.isupper()})
+    for key, value in {**spec.get('overrides', {}), **params}.items():
+        setattr(config, key, value)
+    # MODEL_TYPE fica intacto (rótulo do modelo nos logs e nos títulos dos plots): o trial só muda os caminhos
+    config.SAVE_PATH = trial_dir
+    for key, relative in PATH_KEYS.items():
+        if key != 'FIELD_CACHE_DIR' or getattr(config, key, None):
+            setattr(config, key, os.path.join(trial_dir, relative))
+    # Os workers já ocupam os núcleos: nada de pools de plots aninhados
+    config.PLOT_WORKERS = 0
+    config.FIELD_WORKERS = 0
+    return config
+
+
+def init_worker(threads):
+    """Inicializador dos processos do pool: limita as threads de cada trial."""
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['MKL_NUM_THREADS'] = str(threads)
+    # Várias barras de progresso intercaladas no mesmo terminal não são legíveis
+    os.environ['TQDM_DISABLE'] = '1'
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+
+def reference_error(spec, config, model):
+    """Erro relativo L2 / L∞ contra a solução de diferenças finitas."""
+    import numpy as np
+    from src.utils import setup_device
+    device = setup_device(config)
+    times = np.linspace(config.T_BOUNDS[0], config.T_BOUNDS[1], 20)
+    x = np.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], 100)
+    if spec['base'] == '2d':
+        from src_2.reference import compare_with_reference
+        y = np.linspace(config.Y_BOUNDS[0], config.Y_BOUNDS[1], 100)
+        result = compare_with_reference(model, config, device, x, y, times)
+    else:
+        from src.reference import compare_with_reference
+        result = compare_with_reference(model, config, device, x, times)
+    return {'rel_l2': float(result['rel_l2']), 'rel_linf': float(result['rel_linf'])}
+
+
+def run_trial(spec, params, trial_dir):
+    """Treina um trial e grava result.json (status 'ok' ou 'failed')."""
+    if spec['base'] == '2d':
+        from src_2.trainer import run_training
+    else:
+        from src.trainer import run_training
+
+    os.makedirs(trial_dir, exist_ok=True)
+    with open(os.path.join(trial_dir, 'params.json'), 'w') as f:
+        json.dump(params, f, indent=2)
+
+    result = {'trial': os.path.basename(trial_dir), 'params': params}
+    start = time.perf_counter()
+    try:
+        config = build_config(spec, params, trial_dir)
+        model, history_df = run_training(config)
+        final = history_df.iloc[-1]
+        result.update(status='ok', epochs=int(final['Epoch']) + 1,
+                      final_loss=float(final['Total Loss']),
+                      best_loss=float(history_df['Total Loss'].min()))
+        if spec.get('reference'):
+            model.eval()
+            result.update(reference_error(spec, config, model))
+    except Exception as e:
+        result.update(status='failed', error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+    result['elapsed_s'] = time.perf_counter() - start
+
+    tmp_path = os.path.join(trial_dir, 'result.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp_path, os.path.join(trial_dir, 'result.json'))
+    return result
+
+
+def is_finished(trial_dir):
+    """Indica se o trial já terminou com sucesso (falhas são repetidas ao retomar)."""
+    try:
+        with open(os.path.join(trial_dir, 'result.json')) as f:
+            return json.load(f).get('status') == 'ok'
+    except (OSError, ValueError):
+        return False
+
+
+def write_summary(out_dir, metric, trial_dirs):
+    """
+    Agrega os result.json dos trials da spec atual (trial_dirs) em
+    <out>/summary.csv, ordenado por 'metric'. Diretórios de specs anteriores
+    no mesmo <out> ficam de fora.
+    """
+    import pandas as pd
+    rows = []
+    for trial_dir in sorted(trial_dirs):
+        path = os.path.join(trial_dir, 'result.json')
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            result = json.load(f)
+        row = {k: v for k, v in result.items() if k not in ('params', 'traceback')}
+        row.update({k: json.dumps(v) if isinstance(v, (list, dict)) else v
+                    for k, v in result['params'].items()})
+        rows.append(row)
+    if not rows:
+        return None
+    summary = pd.DataFrame(rows)
+    if metric in summary:
+        summary = summary.sort_values(metric, na_position='last')
+    summary.to_csv(os.path.join(out_dir, 'summary.csv'), index=False)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura paralela de hiperparâmetros.")
+    parser.add_argument('spec', help="JSON com base, grid/random, overrides e out.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Trials simultâneos (padrão: spec['workers'] ou 1).")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="Threads por trial (padrão: núcleos divididos pelos workers).")
+    parser.add_argument('--metric', default=None,
+                        help="Coluna usada para ordenar o resumo (padrão: rel_l2 com reference, senão best_loss).")
+    parser.add_argument('--force', action='store_true', help="Refaz também os trials já concluídos.")
+    parser.add_argument('--dry-run', action='store_true', help="Só lista os trials.")
+    args = parser.parse_args()
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    out_dir = spec.get('out') or os.path.join('resultados', 'sweeps',
+                                              os.path.splitext(os.path.basename(args.spec))[0])
+    metric = args.metric or ('rel_l2' if spec.get('reference') else 'best_loss')
+    workers = max(args.workers or spec.get('workers', 1), 1)
+    threads = args.threads or max((os.cpu_count() or 1) // workers, 1)
+
+    trials = [(params, os.path.join(out_dir, trial_id(spec, params))) for params in expand_trials(spec)]
+    trial_dirs = [trial_dir for _, trial_dir in trials]
+    pending = [(params, trial_dir) for params, trial_dir in trials
+               if args.force or not is_finished(trial_dir)]
+    print(f"{len(trials)} trials ({len(trials) - len(pending)} já concluídos), "
+          f"{workers} workers x {threads} threads -> {out_dir}")
+    if args.dry_run:
+        for params, trial_dir in pending:
+            print(f"  {os.path.basename(trial_dir)}: {params}")
+        return
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'spec.json'), 'w') as f:
+        json.dump(spec, f, indent=2)
+
+    # spawn: cada trial começa num interpretador limpo (sem threads herdadas do pai)
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=init_worker, initargs=(threads,)) as pool:
+        futures = {pool.submit(run_trial, spec, params, trial_dir): trial_dir
+                   for params, trial_dir in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            status = result['status']
+            detail = f"{metric}={result.get(metric, float('nan')):.3e}" if status == 'ok' else result['error']
+            print(f"[{done}/{len(pending)}] {result['trial']} {status} "
+                  f"({result['elapsed_s']:.0f} s) {detail}")
+            # Resumo regravado a cada trial: uma varredura interrompida já tem tabela parcial
+            write_summary(out_dir, metric, trial_dirs)
+
+    summary = write_summary(out_dir, metric, trial_dirs)
+    if summary is not None:
+        print(summary.head(10).to_string(index=False))
+        print(f"Resumo salvo em: {os.path.join(out_dir, 'summary.csv')}")
+
+if __name__ == '__main__':
+    main()
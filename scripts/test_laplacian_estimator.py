@@ -0,0 +1,114 @@
+"""Testa o estimador de Hutchinson do laplaciano contra o laplaciano exato (2D e 3D).
+
+Para um PINN não treinado (float64) e pontos aleatórios do domínio, confere:
+- com muitas sondas, o resíduo estimado coincide com o exato (erro relativo L2);
+- com as mesmas sondas, os modos "taylor" e "autograd" dão a mesma estimativa;
+- com LAPLACIAN_UNBIASED, a média de r_a * r_b coincide com a média de r^2.
+Sai com código 1 se alguma comparação passar da tolerância.
+
+Exemplo:
+    python scripts/test_laplacian_estimator.py --probes 1024 --points 128
+"""
+import argparse
+import os
+import sys
+import types
+
+import torch
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(ROOT)
+
+import config.config_2d_variavel as cfg_2d
+import config.config_3d as cfg_3d
+
+
+def load_variant(variant):
+    """(config base, PINN construído, compute_pde_residual, residual_squared)."""
+    if variant == '2d':
+        from src_2.model import PINN
+        from src_2.physics import compute_pde_residual, residual_squared
+        base = cfg_2d
+        model = PINN(base.LAYERS, base.X_BOUNDS, base.Y_BOUNDS, base.T_BOUNDS)
+        bounds = [base.X_BOUNDS, base.Y_BOUNDS, base.T_BOUNDS]
+    else:
+        from src_nd.model import PINN
+        from src_nd.physics import compute_pde_residual, residual_squared, domain_bounds
+        base = cfg_3d
+        bounds = domain_bounds(base)
+        model = PINN(base.LAYERS, bounds)
+    return base, model.double(), bounds, compute_pde_residual, residual_squared
+
+
+def make_config(base, **overrides):
+    """Cópia do config base com as chaves em 'overrides'."""
+    config = types.SimpleNamespace(**{k: getattr(base, k) for k in dir(base) if k.isupper()})
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return config
+
+
+def residual(compute_pde_residual, model, points, config, seed=0):
+    """Resíduo desanexado, com as sondas sorteadas a partir de 'seed'."""
+    torch.manual_seed(seed)
+    with torch.enable_grad():
+        return compute_pde_residual(model, points.clone().requires_grad_(True), config).detach()
+
+
+def relative_error(estimate, exact):
+    return ((estimate - exact).norm() / exact.norm()).item()
+
+
+def check_variant(variant, n_points, n_probes, tolerance):
+    """Roda as comparações de uma variante e devolve a lista de falhas."""
+    base, model, bounds, compute_pde_residual, residual_squared = load_variant(variant)
+    torch.manual_seed(0)
+    low = torch.tensor([b[0] for b in bounds], dtype=torch.float64)
+    high = torch.tensor([b[1] for b in bounds], dtype=torch.float64)
+    points = low + (high - low) * torch.rand(n_points, len(bounds), dtype=torch.float64)
+
+    failures = []
+    def report(name, error, limit):
+        status = "ok" if error <= limit else "FALHOU"
+        print(f"  [{variant}] {name}: {error:.2e} (tolerância {limit:.0e}) {status}")
+        if error > limit:
+            failures.append(f"{variant}: {name}")
+
+    exact = residual(compute_pde_residual, model, points,
+                     make_config(base, DERIVATIVE_MODE='autograd', LAPLACIAN_MODE='exact'))
+    estimates = {}
+    for mode in ('autograd', 'taylor'):
+        config = make_config(base, DERIVATIVE_MODE=mode, LAPLACIAN_MODE='hutchinson',
+                             LAPLACIAN_PROBES=n_probes, LAPLACIAN_UNBIASED=False)
+        estimates[mode] = residual(compute_pde_residual, model, points, config)
+        report(f"hutchinson ({mode}) x exato", relative_error(estimates[mode], exact), tolerance)
+    report("taylor x autograd (mesmas sondas)",
+           relative_error(estimates['taylor'], estimates['autograd']), 1e-10)
+
+    config = make_config(base, DERIVATIVE_MODE='taylor', LAPLACIAN_MODE='hutchinson',
+                         LAPLACIAN_PROBES=n_probes, LAPLACIAN_UNBIASED=True)
+    unbiased = residual(compute_pde_residual, model, points, config)
+    loss_error = abs(residual_squared(unbiased).mean().item() / (exact ** 2).mean().item() - 1.0)
+    report("loss não enviesada x exata", loss_error, 2 * tolerance)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere o estimador de Hutchinson do laplaciano.")
+    parser.add_argument('--points', type=int, default=128, help="Pontos de colocação avaliados.")
+    parser.add_argument('--probes', type=int, default=1024, help="Sondas por ponto (par).")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="Erro relativo máximo do resíduo estimado.")
+    args = parser.parse_args()
+
+    failures = []
+    for variant in ('2d', '3d'):
+        failures += check_variant(variant, args.points, args.probes, args.tolerance)
+
+    if failures:
+        print("Falhas: " + ", ".join(failures))
+        sys.exit(1)
+    print("Estimador de Hutchinson consistente com o laplaciano exato.")
+
+if __name__ == '__main__':
+    main()
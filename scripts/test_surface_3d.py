@@ -5,7 +5,7 @@ import sys
 ROOT = os.path.dirname(os.path.dirname(__file__))
 sys.path.append(ROOT)
 
-from src_2.utils import setup_device, load_model
+from src_2.utils import setup_device, load_model, make_field_cache
 from src_2.visualization import plot_wave_surface_3d
 from src_2.model import PINN
 import config.config_2d_variavel as cfg
@@ -20,9 +20,8 @@ def main():
 
     # Plota superfície 3D em alguns tempos
     times = [0.0, 0.25, 0.5, 0.75]
-    for t in times:
-        plot_wave_surface_3d(model, cfg, device, t,
-                            filename=f"wave_surface_3d_t{t:.2f}.png")
+    plot_wave_surface_3d(model, cfg, device, times,
+                         filename="wave_surface_3d_t{t:.2f}.png", cache=make_field_cache(model, cfg))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Treina um ensemble de PINNs vetorizado (parâmetros empilhados + vmap) e resume as losses por membro.
+
+Exemplos:
+    python scripts/train_ensemble.py --model 2d --size 16
+    python scripts/train_ensemble.py --model variavel --seeds 1,2,3,4 --epochs 5000
+"""
+import argparse
+import os
+import statistics
+import sys
+
+# Ajusta path para permitir imports de src, src_2 e config
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.append(ROOT)
+
+
+def main(model_type, size, seeds, epochs):
+    if model_type == '2d':
+        from src_2.ensemble import run_ensemble_training
+        import config.config_2d_variavel as cfg
+    else:
+        from src.ensemble import run_ensemble_training
+        import config.config_constante as cfg_const
+        import config.config_variavel as cfg_var
+        cfg = cfg_const if model_type == 'constante' else cfg_var
+
+    if size:
+        cfg.ENSEMBLE_SIZE = size
+    if epochs:
+        cfg.EPOCHS = epochs
+    os.makedirs(os.path.dirname(cfg.MODEL_PATH), exist_ok=True)
+
+    models, histories = run_ensemble_training(cfg, seeds=seeds)
+    best = [float(history['Total Loss'].min()) for history in histories]
+    for i, loss in enumerate(best):
+        print(f"membro {i}: melhor loss = {loss:.4e}")
+    if len(best) > 1:
+        print(f"média = {statistics.mean(best):.4e}, desvio = {statistics.stdev(best):.4e}, "
+              f"mínimo = {min(best):.4e} (membro {best.index(min(best))})")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Treina um ensemble de PINNs vetorizado.")
+    parser.add_argument('--model', choices=['constante', 'variavel', '2d'], default='2d')
+    parser.add_argument('--size', type=int, default=None, help="Número de membros (ENSEMBLE_SIZE).")
+    parser.add_argument('--seeds', type=lambda text: [int(v) for v in text.split(',') if v], default=None,
+                        help="Seeds dos membros, ex.: 1,2,3 (sobrepõe --size).")
+    parser.add_argument('--epochs', type=int, default=None)
+    args = parser.parse_args()
+    main(args.model, args.size, args.seeds, args.epochs)
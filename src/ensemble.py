@@ -0,0 +1,4 @@
+# src/ensemble.py
+# Ensemble 1D: treino vetorizado do motor genérico (src_nd)
+from src_nd.ensemble import (ensemble_loss_fn, member_config, StackedBestTracker, save_members,
+                             run_ensemble_training)
@@ -0,0 +1,101 @@
+# src/reference.py
+import math
+
+import numpy as np
+
+from src.data_loader import ic_pulse_a
+from src.physics import get_velocity
+from src.utils import evaluate_field
+
+def velocity_grid(x, config):
+    """c(x) de physics.get_velocity avaliada nos nós de x, como array NumPy."""
+    return np.broadcast_to(np.asarray(get_velocity(x, config), dtype=np.float64), x.shape)
+
+def solve_wave_fd(config, x, times, refine=2, cfl=0.9):
+    """
+    Solução de referência da equação da onda 1D u_tt = c(x)^2 u_xx por
+    diferenças finitas (leapfrog, 2ª ordem no espaço e no tempo),
+    vetorizada em NumPy, com o mesmo problema do treino: domínio e c(x)
+    do config, pulso Gaussiano (IC_PULSE_A) em repouso e u = 0 nas pontas.
+
+    A malha do solver refina a de x por 'refine' (os nós de x continuam na
+    malha) e o passo de tempo é o maior que respeita a CFL:
+    dt <= cfl * h / c_max.
+    :param x: Eixo uniforme do grid de saída (o mesmo do PINN).
+    :param times: Tempos pedidos (crescentes), interpolados entre passos.
+    :return: np.ndarray (nt, nx) com u nos nós de x em cada tempo.
+    """
+    x_min, x_max = config.X_BOUNDS
+    t_min, t_max = config.T_BOUNDS
+    xf = np.linspace(x_min, x_max, (len(x) - 1) * refine + 1)
+    h = xf[1] - xf[0]
+
+    c = velocity_grid(xf, config)
+    dt = cfl * h / c.max()
+    n_steps = max(int(math.ceil((t_max - t_min) / dt)), 1)
+    dt = (t_max - t_min) / n_steps
+
+    # Coeficiente (c dt / h)^2 no interior
+    c2 = (c[1:-1] * dt / h) ** 2
+
+    # Soma (c dt)^2 u_xx ao interior de 'out', num buffer pré-alocado
+    scratch = np.empty_like(c2)
+    def add_laplacian(u, out):
+        np.add(u[2:], u[:-2], out=scratch)
+        scratch -= u[1:-1]
+        scratch -= u[1:-1]
+        scratch *= c2
+        out += scratch
+
+    # Condição inicial: pulso Gaussiano, u_t = 0 e Dirichlet u = 0
+    center = (x_max + x_min) / 2
+    u = np.exp(-ic_pulse_a(config) * (xf - center)**2)
+    u[0] = u[-1] = 0.0
+    # Primeiro passo por Taylor (u_t = 0): u1 = u0 + dt^2/2 c^2 u0_xx
+    u_prev = u
+    u = u_prev.copy()
+    half_step = np.zeros_like(c2)
+    add_laplacian(u_prev, half_step)
+    u[1:-1] += 0.5 * half_step
+    u_next = np.zeros_like(u)
+
+    times = np.asarray(times, dtype=np.float64)
+    out = np.empty((len(times), len(x)))
+    k = 0
+    for n in range(1, n_steps + 1):
+        # u está no passo n, u_prev no passo n - 1
+        t_prev, t_now = t_min + (n - 1) * dt, t_min + n * dt
+        while k < len(times) and times[k] <= t_now + 1e-12:
+            w = (times[k] - t_prev) / dt
+            out[k] = (1.0 - w) * u_prev[::refine] + w * u[::refine]
+            k += 1
+        if k == len(times) or n == n_steps:
+            break
+        # Leapfrog: u^{n+1} = 2 u^n - u^{n-1} + (c dt)^2 u_xx^n; pontas ficam em 0
+        interior = u_next[1:-1]
+        np.subtract(u[1:-1], u_prev[1:-1], out=interior)
+        interior += u[1:-1]
+        add_laplacian(u, interior)
+        u_prev, u, u_next = u, u_next, u_prev
+    # Tempos além de t_max recebem o último passo
+    out[k:] = u[::refine]
+    return out
+
+def compare_with_reference(model, config, device, x, times, refine=None, cfl=None):
+    """
+    Erro do PINN contra a solução de diferenças finitas no grid (x, times).
+    :return: dict com 'rel_l2' e 'rel_linf' globais, 'rel_l2_t' por tempo
+             e os campos 'u_ref' e 'u_pinn' (nt, nx).
+    """
+    refine = refine or getattr(config, 'FD_REFINE', 2)
+    cfl = cfl or getattr(config, 'FD_CFL', 0.9)
+    u_ref = solve_wave_fd(config, x, times, refine, cfl)
+    u_pinn = evaluate_field(model, x, times, device).astype(np.float64)
+    diff = u_pinn - u_ref
+    return {
+        'rel_l2': np.linalg.norm(diff) / np.linalg.norm(u_ref),
+        'rel_linf': np.abs(diff).max() / np.abs(u_ref).max(),
+        'rel_l2_t': np.linalg.norm(diff, axis=1) / np.linalg.norm(u_ref, axis=1),
+        'u_ref': u_ref,
+        'u_pinn': u_pinn,
+    }
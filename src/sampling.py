@@ -0,0 +1,4 @@
+# src/sampling.py
+# Amostradores de pontos de colocação: os mesmos de src_nd.sampling
+from src_nd.sampling import (uniform_points, sobol_points, halton_points, latin_hypercube_points,
+                             SAMPLERS, get_sampler, PointPool)
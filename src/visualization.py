@@ -1,31 +1,19 @@
 # src/visualization.py
-import torch
+# Plots 1D (x, t). O pool de renderização, o histórico de loss e as
+# animações em streaming são os de src_nd.visualization
 import numpy as np
 import matplotlib.pyplot as plt
 import os
 
-def plot_wave_propagation(model, config, device, filename="propagacao_onda.png"):
-    """
-    Gera um heatmap (pcolormesh) da propagação da onda u(x, t).
-    """
-    model.eval()
-    
-    # Cria um grid de pontos para avaliação
-    x = torch.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], 200)
-    t = torch.linspace(config.T_BOUNDS[0], config.T_BOUNDS[1], 200)
-    X, T = torch.meshgrid(x, t, indexing='xy')
-    
-    # Prepara o input para o modelo
-    grid_input = torch.stack((X.flatten(), T.flatten()), dim=1).to(device)
-    
-    # Faz a predição
-    with torch.no_grad():
-        u_pred = model(grid_input).reshape(X.shape)
-    
-    # Converte para numpy para plotar
-    X_np = X.cpu().numpy()
-    T_np = T.cpu().numpy()
-    U_np = u_pred.cpu().numpy()
+from src.utils import evaluate_field
+from src_nd.visualization import (field_options, PlotRenderer, make_renderer, _render,
+                                  render_wave_snapshots, render_loss_history, plot_loss_history,
+                                  _animation_writer, _animation_options, _frame_chunks,
+                                  _save_frames_npy)
+
+def render_wave_propagation(x, t, U_np, model_type, save_path):
+    """Desenha e salva o heatmap u(x, t) já avaliado (U_np com forma (nt, nx))."""
+    X_np, T_np = np.meshgrid(x, t, indexing='xy')
 
     # Plot
     plt.figure(figsize=(10, 6))
@@ -33,63 +21,86 @@ def plot_wave_propagation(model, config, device, filename="propagacao_onda.png")
     plt.colorbar(label='Deslocamento u(x,t)')
     plt.xlabel('Tempo (t)')
     plt.ylabel('Posição (x)')
-    plt.title(f'Propagação da Onda 1D (Velocidade {config.MODEL_TYPE})')
-    
-    save_path = os.path.join(config.PLOT_PATH, filename)
+    plt.title(f'Propagação da Onda 1D (Velocidade {model_type})')
+
     plt.savefig(save_path)
     plt.close()
     print(f"Plot de propagação salvo em: {save_path}")
 
-def plot_wave_snapshots(model, config, device, times=[0.0, 0.25, 0.5, 0.75, 1.0], filename="snapshots_onda.png"):
+def plot_wave_propagation(model, config, device, filename="propagacao_onda.png", cache=None, renderer=None):
+    """
+    Gera um heatmap (pcolormesh) da propagação da onda u(x, t).
+    :param cache: FieldCache opcional (ver evaluate_field).
+    :param renderer: PlotRenderer opcional; a figura é renderizada em segundo plano.
+    """
+    model.eval()
+
+    # Avalia o modelo no grid (t, x) numa única passada, em blocos
+    x = np.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], 200)
+    t = np.linspace(config.T_BOUNDS[0], config.T_BOUNDS[1], 200)
+    U_np = evaluate_field(model, x, t, device, *field_options(config), cache=cache)
+
+    save_path = os.path.join(config.PLOT_PATH, filename)
+    _render(renderer, render_wave_propagation, x, t, U_np, config.MODEL_TYPE, save_path)
+
+def plot_wave_snapshots(model, config, device, times=[0.0, 0.25, 0.5, 0.75, 1.0], filename="snapshots_onda.png",
+                        cache=None, renderer=None):
     """
     Plota "fotos" da onda (u(x) vs x) em diferentes instantes de tempo.
+    :param cache: FieldCache opcional (ver evaluate_field).
+    :param renderer: PlotRenderer opcional; a figura é renderizada em segundo plano.
     """
     model.eval()
-    x = torch.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], 500).to(device)
-    
-    plt.figure(figsize=(10, 6))
-    
-    for t_val in times:
-        if t_val < config.T_BOUNDS[0] or t_val > config.T_BOUNDS[1]:
-            continue
-            
-        t = torch.full_like(x, t_val)
-        xt_input = torch.stack((x, t), dim=1)
-        
-        with torch.no_grad():
-            u_pred = model(xt_input)
-        
-        plt.plot(x.cpu().numpy(), u_pred.cpu().numpy(), label=f't = {t_val:.2f} s')
+    x = np.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], 500)
+    times = [t_val for t_val in times if config.T_BOUNDS[0] <= t_val <= config.T_BOUNDS[1]]
+
+    # Todos os instantes avaliados de uma vez: U tem forma (nt, nx)
+    U = evaluate_field(model, x, times, device, *field_options(config), cache=cache)
 
-    plt.xlabel('Posição (x)')
-    plt.ylabel('Deslocamento u(x)')
-    plt.title(f'Snapshots da Onda (Velocidade {config.MODEL_TYPE})')
-    plt.legend()
-    plt.grid(True, linestyle='--', alpha=0.6)
-    
     save_path = os.path.join(config.PLOT_PATH, filename)
-    plt.savefig(save_path)
-    plt.close()
-    print(f"Plot de snapshots salvo em: {save_path}")
+    _render(renderer, render_wave_snapshots, x, times, U, config.MODEL_TYPE, save_path)
 
-def plot_loss_history(history_df, config, filename="loss_history.png"):
+def export_wave_animation(model, config, device, filename="propagacao_onda.gif", n_frames=None, fps=None,
+                          chunk_frames=None, vlim=None):
     """
-    Plota o histórico de todas as componentes da loss.
+    Exporta a propagação u(x,t) como animação, em streaming: os quadros
+    são avaliados em blocos de chunk_frames tempos e enviados ao writer um
+    a um, sem manter o campo (nt, nx) inteiro em memória.
+    O formato vem da extensão de 'filename': .mp4 (ffmpeg), .gif (Pillow)
+    ou .npy (quadros brutos float32 (nt, nx), gravados via memmap).
+    O PillowWriter guarda os quadros do .gif até o fim; para memória
+    limitada em animações longas prefira .mp4 ou .npy.
+    :param vlim: Limite simétrico do eixo u (padrão: 1.1 * max|u| do
+                 primeiro bloco de quadros).
     """
-    plt.figure(figsize=(12, 8))
-    
-    plt.semilogy(history_df['Epoch'], history_df['Total Loss'], label='Total Loss')
-    plt.semilogy(history_df['Epoch'], history_df['PDE Loss'], label='PDE Loss', alpha=0.7)
-    plt.semilogy(history_df['Epoch'], history_df['IC Loss'], label='IC Loss', alpha=0.7)
-    plt.semilogy(history_df['Epoch'], history_df['BC Loss'], label='BC Loss', alpha=0.7)
-    
-    plt.title('Histórico de Loss Durante o Treinamento')
-    plt.xlabel('Época')
-    plt.ylabel('Loss (log scale)')
-    plt.legend()
-    plt.grid(True, which="both", ls="--", alpha=0.5)
-    
+    model.eval()
+    n_frames, fps, chunk_frames = _animation_options(config, n_frames, fps, chunk_frames)
+    x = np.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], 500)
+    times = np.linspace(config.T_BOUNDS[0], config.T_BOUNDS[1], n_frames)
     save_path = os.path.join(config.PLOT_PATH, filename)
-    plt.savefig(save_path)
-    plt.close()
-    print(f"Plot de loss salvo em: {save_path}")
\ No newline at end of file
+
+    chunks = _frame_chunks(model, config, device, [x], times, chunk_frames)
+
+    if save_path.endswith('.npy'):
+        _save_frames_npy(save_path, chunks, (n_frames, len(x)))
+        return
+
+    writer = _animation_writer(save_path, fps)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.set_xlabel('Posição (x)')
+    ax.set_ylabel('Deslocamento u(x)')
+    ax.grid(True, linestyle='--', alpha=0.6)
+    line = None
+    with writer.saving(fig, save_path, dpi=100):
+        for _, t_chunk, U in chunks:
+            if line is None:
+                # Eixo u fixo, definido no primeiro bloco
+                vlim = vlim or 1.1 * float(np.abs(U).max()) or 1.0
+                ax.set_ylim(-vlim, vlim)
+                line, = ax.plot(x, U[0])
+            for t_val, u in zip(t_chunk, U):
+                line.set_ydata(u)
+                ax.set_title(f'Onda 1D (Velocidade {config.MODEL_TYPE}) em t = {t_val:.3f} s')
+                writer.grab_frame()
+    plt.close(fig)
+    print(f"Animação salva em: {save_path}")
@@ -0,0 +1,4 @@
+# src_2/distributed.py
+# Treino distribuído (torchrun): o mesmo de src_nd.distributed
+from src_nd.distributed import (SHARDED_KEYS, init_distributed, cleanup_distributed, is_main_process,
+                                rank_device, shard_config, broadcast_parameters, GradientAllReduce)
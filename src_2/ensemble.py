@@ -0,0 +1,4 @@
+# src_2/ensemble.py
+# Ensemble 2D: treino vetorizado do motor genérico (src_nd)
+from src_nd.ensemble import (ensemble_loss_fn, member_config, StackedBestTracker, save_members,
+                             run_ensemble_training)
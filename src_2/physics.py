@@ -1,100 +1,20 @@
 # src_2/physics.py
+# Física 2D (x, y, t): o resíduo e as derivadas são os do motor genérico de src_nd
 import torch
 
-def get_velocity(x, y, config):
-    """
-    Retorna o valor da velocidade 'c' com base na configuração.
-    Para 2D, c(x, y). Esta função tenta usar chaves comuns na config
-    e retorna um tensor com o mesmo device/dtype de x.
-    """
-    # Tenta várias chaves/atributos comuns na configuração
-    c_val = None
-    if hasattr(config, "C_BASE"):
-        # assume linear variation
-        c_val = config.C_BASE + getattr(config, "C_GRAD_X", 0.0) * x + getattr(config, "C_GRAD_Y", 0.0) * y
-    elif hasattr(config, "C"):
-        c_val = config.C
-    elif hasattr(config, "WAVE") and isinstance(config.WAVE, dict) and "c" in config.WAVE:
-        c_val = config.WAVE["c"]
-    else:
-        # fallback padrão escalar
-        c_val = 1.0
-
-    # Se c_val for número/escala, transforme para tensor compatível
-    if not torch.is_tensor(c_val):
-        # broadcast to shape of x
-        return torch.full_like(x, float(c_val))
-    # else assume tensor already shaped
-    return c_val.to(x.device)
-
-
-def compute_pde_residual(model, pde_input, config):
-    """
-    Calcula o resíduo da Equação da Onda 2D:
-    Resíduo = u_tt - c^2 * (u_xx + u_yy)
-    """
-    # pde_input é [x, y, t]
-    x = pde_input[:, 0:1]
-    y = pde_input[:, 1:2]
-    # t = pde_input[:, 2:3] # Não é necessário para o resíduo em si, mas sim para as derivadas
-
-    # garante que pde_input permita autograd nas entradas
-    if not pde_input.requires_grad:
-        pde_input = pde_input.clone().detach().requires_grad_(True)
-
-    u = model(pde_input)
+from src_nd.physics import get_velocity as _get_velocity
+from src_nd.physics import (domain_bounds, wave_residual, is_stochastic_laplacian, probe_groups,
+                            sample_probes, compute_directional_derivatives, laplacian_estimate,
+                            residual_squared, compute_packed_derivatives, compute_pde_residual,
+                            evaluate_pde_residual, compute_ic_derivatives)
 
-    # Derivadas de primeira ordem
-    u_grads = torch.autograd.grad(u, pde_input,
-                                 grad_outputs=torch.ones_like(u),
-                                 create_graph=True, retain_graph=True)[0]
-    u_x = u_grads[:, 0:1]
-    u_y = u_grads[:, 1:2]
-    u_t = u_grads[:, 2:3]
-
-    # Derivadas de segunda ordem
-    # u_xx
-    u_xx_grads = torch.autograd.grad(u_x, pde_input,
-                                     grad_outputs=torch.ones_like(u_x),
-                                     create_graph=True, retain_graph=True)[0]
-    u_xx = u_xx_grads[:, 0:1] # Componente x
-
-    # u_yy
-    u_yy_grads = torch.autograd.grad(u_y, pde_input,
-                                     grad_outputs=torch.ones_like(u_y),
-                                     create_graph=True, retain_graph=True)[0]
-    u_yy = u_yy_grads[:, 1:2] # Componente y
-
-    # u_tt
-    u_tt_grads = torch.autograd.grad(u_t, pde_input,
-                                     grad_outputs=torch.ones_like(u_t),
-                                     create_graph=True, retain_graph=True)[0]
-    u_tt = u_tt_grads[:, 2:3] # Componente t
-    
-    # Obter velocidade c(x, y)
-    c = get_velocity(x, y, config)
-
-    # Calcular o resíduo da PDE
-    residual = u_tt - (c ** 2) * (u_xx + u_yy)
-
-    return residual
-
-def compute_ic_derivatives(model, ic_input):
+def get_velocity(x, y, config):
     """
-    Calcula u(x,y,0) e a derivada temporal u_t(x,y,0) 
-    para a loss da condição inicial.
+    Retorna o valor da velocidade 'c(x, y)' com base na configuração
+    (ver src_nd.physics.get_velocity).
+    :param x, y: Coordenadas com a mesma forma (tensores ou arrays).
+    :return: Tensor com a forma de x.
     """
-    # ic_input é [x, y, t=0]
-    if not ic_input.requires_grad:
-        ic_input = ic_input.clone().detach().requires_grad_(True)
-
-    u_pred = model(ic_input)
-
-    # Precisamos de u_t(x, y, 0)
-    u_t_pred_grads = torch.autograd.grad(u_pred, ic_input,
-                                          grad_outputs=torch.ones_like(u_pred),
-                                          create_graph=True, retain_graph=True)[0]
-    # Pega a derivada em t, que agora é o índice 2
-    u_t_pred = u_t_pred_grads[:, 2:3]
-
-    return u_pred, u_t_pred
\ No newline at end of file
+    x, y = torch.as_tensor(x), torch.as_tensor(y)
+    coords = torch.stack((x.reshape(-1), y.reshape(-1)), dim=1)
+    return _get_velocity(coords, config).reshape(x.shape)
@@ -0,0 +1,112 @@
+# src_2/reference.py
+import math
+
+import numpy as np
+import torch
+
+from src_2.data_loader import ic_pulse_a
+from src_2.physics import get_velocity
+from src_2.utils import evaluate_field
+
+def velocity_grid(x, y, config):
+    """c(x, y) de physics.get_velocity avaliada no grid (ny, nx), como array NumPy."""
+    X, Y = np.meshgrid(x, y, indexing='xy')
+    c = get_velocity(torch.from_numpy(X), torch.from_numpy(Y), config)
+    return np.broadcast_to(np.asarray(c, dtype=np.float64), X.shape)
+
+def solve_wave_fd(config, x, y, times, refine=2, cfl=0.9):
+    """
+    Solução de referência da equação da onda 2D u_tt = c(x,y)^2 (u_xx + u_yy)
+    por diferenças finitas (leapfrog, 2ª ordem no espaço e no tempo),
+    vetorizada em NumPy, com o mesmo problema do treino: domínio e c(x, y)
+    do config, pulso Gaussiano (IC_PULSE_A) em repouso e u = 0 nas bordas.
+
+    A malha do solver refina a de (x, y) por 'refine' (os nós de x e y
+    continuam na malha) e o passo de tempo é o maior que respeita a CFL:
+    dt <= cfl / (c_max * sqrt(1/hx^2 + 1/hy^2)).
+    :param x, y: Eixos uniformes do grid de saída (os mesmos do PINN).
+    :param times: Tempos pedidos (crescentes), interpolados entre passos.
+    :return: np.ndarray (nt, ny, nx) com u nos nós de (x, y) em cada tempo.
+    """
+    x_min, x_max = config.X_BOUNDS
+    y_min, y_max = config.Y_BOUNDS
+    t_min, t_max = config.T_BOUNDS
+    xf = np.linspace(x_min, x_max, (len(x) - 1) * refine + 1)
+    yf = np.linspace(y_min, y_max, (len(y) - 1) * refine + 1)
+    hx, hy = xf[1] - xf[0], yf[1] - yf[0]
+
+    c = velocity_grid(xf, yf, config)
+    dt = cfl / (c.max() * math.sqrt(1.0 / hx**2 + 1.0 / hy**2))
+    n_steps = max(int(math.ceil((t_max - t_min) / dt)), 1)
+    dt = (t_max - t_min) / n_steps
+
+    # Coeficientes (c dt / h)^2 no interior
+    cx2 = (c[1:-1, 1:-1] * dt / hx) ** 2
+    cy2 = (c[1:-1, 1:-1] * dt / hy) ** 2
+
+    # Soma (c dt)^2 lap(u) ao interior de 'out', em buffers pré-alocados
+    scratch = np.empty_like(cx2)
+    def add_laplacian(u, out):
+        center = u[1:-1, 1:-1]
+        for coef, fwd, bwd in ((cx2, u[1:-1, 2:], u[1:-1, :-2]), (cy2, u[2:, 1:-1], u[:-2, 1:-1])):
+            np.add(fwd, bwd, out=scratch)
+            scratch -= center
+            scratch -= center
+            scratch *= coef
+            out += scratch
+
+    # Condição inicial: pulso Gaussiano, u_t = 0 e Dirichlet u = 0
+    X, Y = np.meshgrid(xf, yf, indexing='xy')
+    center_x, center_y = (x_max + x_min) / 2, (y_max + y_min) / 2
+    u = np.exp(-ic_pulse_a(config) * ((X - center_x)**2 + (Y - center_y)**2))
+    u[0, :] = u[-1, :] = u[:, 0] = u[:, -1] = 0.0
+    # Primeiro passo por Taylor (u_t = 0): u1 = u0 + dt^2/2 c^2 lap(u0)
+    u_prev = u
+    u = u_prev.copy()
+    half_step = np.zeros_like(cx2)
+    add_laplacian(u_prev, half_step)
+    u[1:-1, 1:-1] += 0.5 * half_step
+    u_next = np.zeros_like(u)
+
+    times = np.asarray(times, dtype=np.float64)
+    out = np.empty((len(times), len(y), len(x)))
+    sample = (slice(None, None, refine), slice(None, None, refine))
+    k = 0
+    for n in range(1, n_steps + 1):
+        # u está no passo n, u_prev no passo n - 1
+        t_prev, t_now = t_min + (n - 1) * dt, t_min + n * dt
+        while k < len(times) and times[k] <= t_now + 1e-12:
+            w = (times[k] - t_prev) / dt
+            out[k] = (1.0 - w) * u_prev[sample] + w * u[sample]
+            k += 1
+        if k == len(times) or n == n_steps:
+            break
+        # Leapfrog: u^{n+1} = 2 u^n - u^{n-1} + (c dt)^2 lap(u^n); bordas ficam em 0
+        interior = u_next[1:-1, 1:-1]
+        np.subtract(u[1:-1, 1:-1], u_prev[1:-1, 1:-1], out=interior)
+        interior += u[1:-1, 1:-1]
+        add_laplacian(u, interior)
+        u_prev, u, u_next = u, u_next, u_prev
+    # Tempos além de t_max recebem o último passo
+    out[k:] = u[sample]
+    return out
+
+def compare_with_reference(model, config, device, x, y, times, refine=None, cfl=None):
+    """
+    Erro do PINN contra a solução de diferenças finitas no grid (x, y, times).
+    :return: dict com 'rel_l2' e 'rel_linf' globais, 'rel_l2_t' por tempo
+             e os campos 'u_ref' e 'u_pinn' (nt, ny, nx).
+    """
+    refine = refine or getattr(config, 'FD_REFINE', 2)
+    cfl = cfl or getattr(config, 'FD_CFL', 0.9)
+    u_ref = solve_wave_fd(config, x, y, times, refine, cfl)
+    u_pinn = evaluate_field(model, x, y, times, device).astype(np.float64)
+    diff = u_pinn - u_ref
+    return {
+        'rel_l2': np.linalg.norm(diff) / np.linalg.norm(u_ref),
+        'rel_linf': np.abs(diff).max() / np.abs(u_ref).max(),
+        'rel_l2_t': np.linalg.norm(diff.reshape(len(times), -1), axis=1)
+                    / np.linalg.norm(u_ref.reshape(len(times), -1), axis=1),
+        'u_ref': u_ref,
+        'u_pinn': u_pinn,
+    }
@@ -0,0 +1,3 @@
+# src_2/velocity.py
+# Modelos de velocidade em grid: os mesmos de src_nd.velocity
+from src_nd.velocity import load_velocity_array, GridVelocity, velocity_model
@@ -1,154 +1,139 @@
 # src_2/visualization.py
-import torch
+# Plots 2D (x, y, t). O pool de renderização, o histórico de loss e as
+# animações em streaming são os de src_nd.visualization
 import numpy as np
 import matplotlib.pyplot as plt
 import os
-import math
 
-def plot_wave_snapshots_2d(model, config, device, times=[0.0, 0.25, 0.5, 0.75], filename="snapshots_2d.png"):
+from src_2.utils import evaluate_field
+from src_nd.visualization import (field_options, PlotRenderer, make_renderer, _render,
+                                  render_snapshots_2d, render_loss_history, plot_loss_history,
+                                  _animation_writer, _animation_options, _frame_chunks,
+                                  _save_frames_npy)
+
+def plot_axes(config):
+    """Eixos x e y dos plots (resolução N_X/GRID_NX e N_Y/GRID_NY do config, ou 100 pontos)."""
+    x_res = getattr(config, 'N_X', None) or getattr(config, 'GRID_NX', None) or 100
+    y_res = getattr(config, 'N_Y', None) or getattr(config, 'GRID_NY', None) or x_res
+    x = np.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], int(x_res))
+    y = np.linspace(config.Y_BOUNDS[0], config.Y_BOUNDS[1], int(y_res))
+    return x, y
+
+def plot_wave_snapshots_2d(model, config, device, times=[0.0, 0.25, 0.5, 0.75], filename="snapshots_2d.png",
+                           cache=None, renderer=None):
     """
     Plota "fotos" da onda 2D (u(x,y) vs x,y) em diferentes instantes de tempo.
+    :param cache: FieldCache opcional (ver evaluate_field).
+    :param renderer: PlotRenderer opcional; a figura é renderizada em segundo plano.
     """
     model.eval()
-    
-    # Cria um grid 2D para avaliação (tenta obter resoluções do config)
-    x_res = getattr(config, 'N_X', None) or getattr(config, 'GRID_NX', None) or 100
-    y_res = getattr(config, 'N_Y', None) or getattr(config, 'GRID_NY', None) or x_res
-    x = torch.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], int(x_res), device=device)
-    y = torch.linspace(config.Y_BOUNDS[0], config.Y_BOUNDS[1], int(y_res), device=device)
-    X, Y = torch.meshgrid(x, y, indexing='xy')
-    
-    X_np = X.cpu().numpy()
-    Y_np = Y.cpu().numpy()
-
-    # Avalia o modelo em cada tempo e guarda resultados (autoscaling)
-    n_times = len(times)
-    n_cols = 2
-    n_rows = math.ceil(n_times / n_cols)
-    fig, axes = plt.subplots(n_rows, n_cols, figsize=(n_cols * 6, n_rows * 5))
-    axes = axes.flatten()
-
-    snapshots = []
-    vmin, vmax = float('inf'), float('-inf')
-
-    for i, t_val in enumerate(times):
-        if t_val < config.T_BOUNDS[0] or t_val > config.T_BOUNDS[1]:
-            axes[i].set_title(f"Tempo t={t_val:.2f} s (fora dos limites)")
-            axes[i].axis('off')
-            continue
-        T = torch.full_like(X, float(t_val), device=device)
-        # Prepara o input (x, y, t)
-        grid_input = torch.stack((X.flatten(), Y.flatten(), T.flatten()), dim=1).to(device)
-
-        # Faz a predição
-        with torch.no_grad():
-            u_pred = model(grid_input).cpu().numpy().reshape(X.cpu().numpy().shape)
-
-        # guarde também o índice do eixo para manter o mapeamento correto
-        snapshots.append((i, u_pred))
-        vmin = min(vmin, float(np.min(u_pred)))
-        vmax = max(vmax, float(np.max(u_pred)))
-
-        # Prepara o subplot (o heatmap será desenhado depois com vmin/vmax globais)
-        ax = axes[i]
-        ax.set_xlabel('Posição (x)')
-        ax.set_ylabel('Posição (y)')
-        ax.set_title(f'Snapshot da Onda 2D em t = {t_val:.2f} s')
-        ax.set_aspect('equal', 'box')
-
-    # Desenha os snapshots agora com escala global
-    cax = None
-    # snapshots contém tuplas (axis_index, u_array)
-    for axis_idx, u in snapshots:
-        ax = axes[axis_idx]
-        cax = ax.pcolormesh(X_np, Y_np, u, cmap='seismic', shading='auto', vmin=vmin, vmax=vmax)
-
-    # Remove eixos extras
-    for i in range(n_times, len(axes)):
-        fig.delaxes(axes[i])
-
-    # Adiciona a barra de cores apenas se houver pelo menos um snapshot
-    if cax is not None:
-        fig.colorbar(cax, ax=axes.tolist(), orientation='vertical', fraction=0.02, pad=0.04, label='Deslocamento u(x,y,t)')
+    x, y = plot_axes(config)
+
+    # Avalia todos os tempos válidos numa única passada: U tem forma (nt, ny, nx)
+    valid = [i for i, t_val in enumerate(times) if config.T_BOUNDS[0] <= t_val <= config.T_BOUNDS[1]]
+    U = evaluate_field(model, x, y, [times[i] for i in valid], device, *field_options(config), cache=cache)
 
-    plt.tight_layout()
     save_path = os.path.join(config.PLOT_PATH, filename)
-    plt.savefig(save_path, dpi=150)
-    plt.close()
-    print(f"Plot de snapshots 2D salvo em: {save_path}")
+    _render(renderer, render_snapshots_2d, x, y, list(times), valid, U, save_path)
 
-def plot_wave_surface_3d(model, config, device, t_val, filename="surface_3d.png"):
+def render_surface_3d(x, y, U_np, t_val, vmin, vmax, save_path):
     """
-    Plota a superfície 3D do deslocamento u(x,y,t) em um tempo t_val específico.
+    Desenha e salva a superfície u(x,y) já avaliada no tempo t_val.
+    vmin/vmax None usam o mínimo/máximo do próprio campo.
     """
-    model.eval()
-    
-    # Usa resolução do grid do config ou fallback para 100 pontos
-    x_res = getattr(config, 'N_X', None) or getattr(config, 'GRID_NX', None) or 100
-    y_res = getattr(config, 'N_Y', None) or getattr(config, 'GRID_NY', None) or x_res
-    x = torch.linspace(config.X_BOUNDS[0], config.X_BOUNDS[1], int(x_res), device=device)
-    y = torch.linspace(config.Y_BOUNDS[0], config.Y_BOUNDS[1], int(y_res), device=device)
-    X, Y = torch.meshgrid(x, y, indexing='xy')
-    T = torch.full_like(X, float(t_val), device=device)
-    
-    grid_input = torch.stack((X.flatten(), Y.flatten(), T.flatten()), dim=1).to(device)
-    
-    with torch.no_grad():
-        u_pred = model(grid_input).cpu().numpy().reshape(X.cpu().numpy().shape)
-    
-    X_np = X.cpu().numpy()
-    Y_np = Y.cpu().numpy()
-    U_np = u_pred
+    X_np, Y_np = np.meshgrid(x, y, indexing='xy')
 
     # Calcula limites para colormap (autoscaling ou use os limites do pulso inicial)
-    vmin = getattr(config, 'PLOT_VMIN', float(np.min(U_np)))
-    vmax = getattr(config, 'PLOT_VMAX', float(np.max(U_np)))
+    vmin = float(np.min(U_np)) if vmin is None else vmin
+    vmax = float(np.max(U_np)) if vmax is None else vmax
 
     fig = plt.figure(figsize=(12, 8))
     ax = fig.add_subplot(111, projection='3d')
-    
+
     # Plotagem da superfície
     surf = ax.plot_surface(X_np, Y_np, U_np, cmap='seismic',
                           linewidth=0, antialiased=True,
                           vmin=vmin, vmax=vmax,
                           alpha=0.9)  # leve transparência para melhor visualização
-    
+
     ax.set_xlabel('Posição (x)')
     ax.set_ylabel('Posição (y)')
     ax.set_zlabel('Deslocamento u(x,y,t)')
     ax.set_title(f'Superfície da Onda 2D em t = {t_val:.2f} s')
-    
+
     # Ajusta a vista para melhor visualização
     ax.view_init(elev=25, azim=45)
-    
+
     # Adicionar barra de cores
     fig.colorbar(surf, shrink=0.5, aspect=5,
                  label=f'Deslocamento u(x,y,t) [min={vmin:.2e}, max={vmax:.2e}]')
-    
+
     plt.tight_layout()
-    save_path = os.path.join(config.PLOT_PATH, filename)
     plt.savefig(save_path, dpi=150, bbox_inches='tight')
     plt.close()
     print(f"Plot de superfície 3D salvo em: {save_path}")
 
-def plot_loss_history(history_df, config, filename="loss_history.png"):
+def plot_wave_surface_3d(model, config, device, t_val, filename="surface_3d.png", cache=None, renderer=None):
+    """
+    Plota a superfície 3D do deslocamento u(x,y,t) em um tempo t_val específico.
+    't_val' pode ser uma lista de tempos: o grid é avaliado uma única vez
+    para todos e cada tempo gera um arquivo (ex.: filename="surface_3d_t{t:.2f}.png").
+    :param cache: FieldCache opcional (ver evaluate_field).
+    :param renderer: PlotRenderer opcional; as figuras são renderizadas em paralelo.
+    """
+    model.eval()
+
+    x, y = plot_axes(config)
+    times = np.atleast_1d(t_val).tolist()
+    U = evaluate_field(model, x, y, times, device, *field_options(config), cache=cache)
+    vmin = getattr(config, 'PLOT_VMIN', None)
+    vmax = getattr(config, 'PLOT_VMAX', None)
+
+    for t_val, U_np in zip(times, U):
+        save_path = os.path.join(config.PLOT_PATH, filename.format(t=t_val))
+        _render(renderer, render_surface_3d, x, y, U_np, t_val, vmin, vmax, save_path)
+
+def export_wave_animation(model, config, device, filename="propagacao_2d.gif", n_frames=None, fps=None,
+                          chunk_frames=None, vlim=None):
     """
-    Plota o histórico de todas as componentes da loss. (Idêntico ao 1D)
+    Exporta a propagação u(x,y,t) como animação, em streaming: os quadros
+    são avaliados em blocos de chunk_frames tempos e enviados ao writer um
+    a um, sem manter o cubo (nt, ny, nx) em memória.
+    O formato vem da extensão de 'filename': .mp4 (ffmpeg), .gif (Pillow)
+    ou .npy (quadros brutos float32 (nt, ny, nx), gravados via memmap).
+    O PillowWriter guarda os quadros do .gif até o fim; para memória
+    limitada em animações longas prefira .mp4 ou .npy.
+    :param vlim: Limite simétrico da escala de cores (padrão: PLOT_VMAX, ou
+                 max|u| do primeiro bloco de quadros).
     """
-    plt.figure(figsize=(12, 8))
-    
-    plt.semilogy(history_df['Epoch'], history_df['Total Loss'], label='Total Loss')
-    plt.semilogy(history_df['Epoch'], history_df['PDE Loss'], label='PDE Loss', alpha=0.7)
-    plt.semilogy(history_df['Epoch'], history_df['IC Loss'], label='IC Loss', alpha=0.7)
-    plt.semilogy(history_df['Epoch'], history_df['BC Loss'], label='BC Loss', alpha=0.7)
-    
-    plt.title('Histórico de Loss Durante o Treinamento')
-    plt.xlabel('Época')
-    plt.ylabel('Loss (log scale)')
-    plt.legend()
-    plt.grid(True, which="both", ls="--", alpha=0.5)
-    
+    model.eval()
+    n_frames, fps, chunk_frames = _animation_options(config, n_frames, fps, chunk_frames)
+    x, y = plot_axes(config)
+    times = np.linspace(config.T_BOUNDS[0], config.T_BOUNDS[1], n_frames)
     save_path = os.path.join(config.PLOT_PATH, filename)
-    plt.savefig(save_path)
-    plt.close()
-    print(f"Plot de loss salvo em: {save_path}")
\ No newline at end of file
+
+    chunks = _frame_chunks(model, config, device, [x, y], times, chunk_frames)
+
+    if save_path.endswith('.npy'):
+        _save_frames_npy(save_path, chunks, (n_frames, len(y), len(x)))
+        return
+
+    writer = _animation_writer(save_path, fps)
+    fig, ax = plt.subplots(figsize=(7, 6))
+    ax.set_xlabel('Posição (x)')
+    ax.set_ylabel('Posição (y)')
+    image = None
+    with writer.saving(fig, save_path, dpi=100):
+        for _, t_chunk, U in chunks:
+            if image is None:
+                # Escala de cores fixa, definida no primeiro bloco
+                vlim = vlim or getattr(config, 'PLOT_VMAX', None) or float(np.abs(U).max()) or 1.0
+                image = ax.imshow(U[0], origin='lower', cmap='seismic', vmin=-vlim, vmax=vlim,
+                                  extent=(x[0], x[-1], y[0], y[-1]), interpolation='nearest')
+                fig.colorbar(image, ax=ax, label='Deslocamento u(x,y,t)')
+            for t_val, frame in zip(t_chunk, U):
+                image.set_data(frame)
+                ax.set_title(f'Onda 2D em t = {t_val:.3f} s')
+                writer.grab_frame()
+    plt.close(fig)
+    print(f"Animação salva em: {save_path}")
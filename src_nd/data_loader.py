@@ -0,0 +1,268 @@
+# src_nd/data_loader.py
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from src_nd.physics import SPATIAL_AXES, domain_bounds, spatial_dim, evaluate_pde_residual
+from src_nd.sampling import PointPool, get_sampler
+
+# Largura padrão do pulso Gaussiano da condição inicial (IC_PULSE_A no config);
+# o 1D herda o pulso mais estreito do antigo src
+IC_PULSE_A = 50.0
+IC_PULSE_A_1D = 100.0
+
+def ic_pulse_a(config):
+    """Largura do pulso Gaussiano da IC: IC_PULSE_A do config ou o padrão da dimensão."""
+    default = IC_PULSE_A_1D if spatial_dim(config) == 1 else IC_PULSE_A
+    return getattr(config, 'IC_PULSE_A', default)
+
+def boundary_faces(d):
+    """Nomes das 2d faces do domínio: x_min, x_max, y_min, y_max, ..."""
+    return [f"{axis}_{side}" for axis in SPATIAL_AXES[:d] for side in ('min', 'max')]
+
+
+class CollocationSampler:
+    """
+    Amostrador de pontos de treino com buffers persistentes, para d
+    dimensões espaciais (d = número de X/Y/Z_BOUNDS do config).
+
+    Reaproveita os tensores de uma época para outra (preenchidos
+    in-place) e usa um torch.Generator dedicado para cada fluxo (IC, BC e
+    PDE). Com prefetch=True, os pontos da próxima época são gerados numa
+    thread em segundo plano (double buffering). A chave SAMPLER escolhe o
+    amostrador ('uniform', 'sobol', 'halton' ou 'lhs', ver src_nd.sampling).
+    Cada uma das 2d faces recebe N_BC pontos; as duas faces de um mesmo
+    eixo compartilham as demais coordenadas e t, e faces de eixos
+    diferentes sorteiam t de forma independente (no 2D original as quatro
+    faces, left/right/bottom/top, compartilhavam um único sorteio de t). Com HARD_BC não há faces
+    (o ansatz do modelo impõe u = 0) e, com HARD_IC, o alvo 'u' da IC não
+    é calculado.
+    """
+    STREAMS = ('ic', 'bc', 'pde')
+
+    def __init__(self, config, device, seed=42, prefetch=True):
+        self.config = config
+        self.device = device
+        bounds = torch.tensor(domain_bounds(config), device=device)
+        self.d = bounds.shape[0] - 1
+        self.hard_ic = getattr(config, 'HARD_IC', False)
+        self.faces = [] if getattr(config, 'HARD_BC', False) else boundary_faces(self.d)
+        self._low = bounds[:, 0].unsqueeze(0)
+        self._span = (bounds[:, 1] - bounds[:, 0]).unsqueeze(0)
+        self._center = (self._low + self._span / 2)[:, :self.d]
+        self._pulse_a = ic_pulse_a(config)
+
+        self.generators = {}
+        for i, stream in enumerate(self.STREAMS):
+            self.generators[stream] = torch.Generator(device=device)
+            self.generators[stream].manual_seed(seed + i)
+        # Fluxos efetivamente sorteados (as seeds seguem a posição em STREAMS)
+        self.streams = [s for s in self.STREAMS if s != 'bc' or self.faces]
+
+        # Dimensão de cada fluxo no hipercubo unitário: IC -> espaço, BC -> (demais
+        # coordenadas, t) para cada eixo, empilhados em d blocos de N_BC linhas, PDE -> (espaço, t)
+        self.sizes = {'ic': config.N_IC, 'bc': self.d * config.N_BC, 'pde': config.N_PDE}
+        self.dims = {'ic': self.d, 'bc': self.d, 'pde': self.d + 1}
+
+        sampler = getattr(config, 'SAMPLER', 'uniform')
+        get_sampler(sampler)
+        self.pools = {}
+        if sampler != 'uniform':
+            windows = getattr(config, 'SAMPLER_POOL', 16)
+            for i, stream in enumerate(self.STREAMS):
+                if stream in self.streams:
+                    self.pools[stream] = PointPool(sampler, self.sizes[stream], self.dims[stream],
+                                                   windows, seed + i, device)
+
+        self._buffers = [self._allocate() for _ in range(2 if prefetch else 1)]
+        self._filling = 0
+        self._executor = None
+        self._pending = None
+        if prefetch:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+            self._pending = self._executor.submit(self._fill, self._buffers[0])
+
+    def _allocate(self):
+        """Aloca um conjunto de buffers e preenche as colunas constantes."""
+        cfg, device, d = self.config, self.device, self.d
+        buf = {
+            'ic': torch.empty((cfg.N_IC, d + 1), device=device),
+            'v_ic': torch.zeros((cfg.N_IC, 1), device=device),
+            'u_bc': torch.zeros((cfg.N_BC, 1), device=device),
+            'pde': torch.empty((cfg.N_PDE, d + 1), device=device),
+        }
+        if not self.hard_ic:
+            buf['u_ic'] = torch.empty((cfg.N_IC, 1), device=device)
+            buf['tmp_ic'] = torch.empty((cfg.N_IC, d), device=device)
+        for stream in self.streams:
+            if stream not in self.pools:
+                buf['unit_' + stream] = torch.empty((self.sizes[stream], self.dims[stream]), device=device)
+        buf['ic'][:, d].fill_(cfg.T_BOUNDS[0])
+        # Cada face tem a coordenada do seu eixo fixa no limite
+        for k in range(d if self.faces else 0):
+            for side, value in (('min', self._low[0, k]), ('max', self._low[0, k] + self._span[0, k])):
+                face = torch.empty((cfg.N_BC, d + 1), device=device)
+                face[:, k].fill_(float(value))
+                buf[f"{SPATIAL_AXES[k]}_{side}"] = face
+        return buf
+
+    def _draw(self, buf, stream):
+        """Pontos em [0, 1)^dim do fluxo: próxima janela do pool ou sorteio uniforme."""
+        if stream in self.pools:
+            return self.pools[stream].next_window()
+        return buf['unit_' + stream].uniform_(generator=self.generators[stream])
+
+    def _fill(self, buf):
+        """Sorteia in-place as colunas aleatórias de um conjunto de buffers."""
+        d, n_bc = self.d, self.config.N_BC
+        low, span = self._low, self._span
+
+        with torch.no_grad():
+            # 1. IC: coordenadas espaciais aleatórias e alvo Gaussiano
+            buf['ic'][:, :d].copy_(self._draw(buf, 'ic')).mul_(span[:, :d]).add_(low[:, :d])
+            if not self.hard_ic:
+                torch.sub(buf['ic'][:, :d], self._center, out=buf['tmp_ic']).square_()
+                torch.sum(buf['tmp_ic'], dim=1, keepdim=True, out=buf['u_ic'])
+                buf['u_ic'].mul_(-self._pulse_a).exp_()
+
+            # 2. BC: no bloco k, as colunas são as demais coordenadas e t
+            if self.faces:
+                unit_bc = self._draw(buf, 'bc')
+                for k in range(d):
+                    free = [j for j in range(d + 1) if j != k]
+                    block = unit_bc[k * n_bc:(k + 1) * n_bc]
+                    face_min = buf[f"{SPATIAL_AXES[k]}_min"]
+                    face_min[:, free] = block * span[:, free] + low[:, free]
+                    buf[f"{SPATIAL_AXES[k]}_max"][:, free] = face_min[:, free]
+
+            # 3. PDE: (x_1, ..., x_d, t) dentro do domínio
+            torch.addcmul(low, self._draw(buf, 'pde'), span, out=buf['pde'])
+        return buf
+
+    def next(self):
+        """
+        Retorna os pontos da época atual e agenda o preenchimento da próxima.
+        :return: (pde_input, ic_input, ic_targets, bc_inputs, bc_targets), com
+                 bc_inputs/bc_targets indexados pelas faces (boundary_faces).
+        """
+        if self._executor is None:
+            buf = self._fill(self._buffers[0])
+        else:
+            buf = self._pending.result()
+            # O outro buffer foi usado na época anterior, que já terminou
+            self._filling = 1 - self._filling
+            self._pending = self._executor.submit(self._fill, self._buffers[self._filling])
+
+        # detach() cria novos tensores-folha sobre o mesmo armazenamento,
+        # evitando acumular .grad nos buffers persistentes
+        pde_input = buf['pde'].detach().requires_grad_(True)
+        ic_input = buf['ic'].detach()
+        ic_targets = {'v': buf['v_ic']} if self.hard_ic else {'u': buf['u_ic'], 'v': buf['v_ic']}
+        bc_inputs = {face: buf[face] for face in self.faces}
+        bc_targets = {face: buf['u_bc'] for face in self.faces}
+        return pde_input, ic_input, ic_targets, bc_inputs, bc_targets
+
+    def close(self):
+        """Encerra a thread de prefetch."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def get_training_data(config, device):
+    """
+    Gera um conjunto de pontos de treinamento (colocação, inicial,
+    contorno) para a equação da onda em d dimensões.
+    """
+    sampler = CollocationSampler(config, device, prefetch=False)
+    data = sampler.next()
+    sampler.close()
+    return data
+
+
+class AdaptiveRefiner:
+    """
+    Estágio adaptativo sobre os pontos de PDE.
+
+    A cada ADAPTIVE_EVERY épocas, sorteia um pool de ADAPTIVE_POOL
+    candidatos no domínio e os pontua pelo |resíduo| (sem manter grafo).
+    Dois modos (chave ADAPTIVE da configuração):
+    - 'rar': os ADAPTIVE_ADD candidatos de maior resíduo são acrescentados
+      a um conjunto persistente (até ADAPTIVE_MAX pontos, mantendo os de
+      maior resíduo), que é concatenado aos pontos de PDE de cada época.
+    - 'importance': os N_PDE pontos de PDE de cada época são sorteados dos
+      candidatos com probabilidade proporcional a |r|^ADAPTIVE_POWER
+      (misturada com uma fração ADAPTIVE_MIX uniforme), e a loss da PDE é
+      reponderada por 1 / (M * p_i) para continuar não-enviesada.
+    """
+    MODES = ('rar', 'importance')
+
+    def __init__(self, config, device, seed=42):
+        self.config = config
+        self.device = device
+        self.mode = config.ADAPTIVE
+        if self.mode not in self.MODES:
+            raise ValueError(f"Modo adaptativo desconhecido: {self.mode}. Opções: {self.MODES}")
+        self.every = getattr(config, 'ADAPTIVE_EVERY', 500)
+        self.pool_size = getattr(config, 'ADAPTIVE_POOL', 10 * config.N_PDE)
+        self.generator = torch.Generator(device=device)
+        self.generator.manual_seed(seed + len(CollocationSampler.STREAMS))
+
+        bounds = torch.tensor(domain_bounds(config), device=device)
+        self._low = bounds[:, 0].unsqueeze(0)
+        self._span = (bounds[:, 1] - bounds[:, 0]).unsqueeze(0)
+
+        # Estado do modo 'rar'
+        self.extra_points = None
+        self.extra_scores = None
+        # Estado do modo 'importance'
+        self.candidates = None
+        self.probs = None
+        self.weights = None
+
+    def update(self, model, epoch):
+        """Repontua os candidatos a cada 'every' épocas (a época 0 é ignorada)."""
+        if epoch == 0 or epoch % self.every != 0:
+            return
+        cfg = self.config
+        dim = self._low.shape[1]
+        candidates = torch.rand((self.pool_size, dim), generator=self.generator, device=self.device)
+        candidates = torch.addcmul(self._low, candidates, self._span)
+        scores = evaluate_pde_residual(model, candidates, cfg).abs().squeeze(1)
+
+        if self.mode == 'rar':
+            if self.extra_points is not None:
+                # Repontua os pontos já adicionados com o modelo atual
+                old_scores = evaluate_pde_residual(model, self.extra_points, cfg).abs().squeeze(1)
+                candidates = torch.cat((self.extra_points, candidates), dim=0)
+                scores = torch.cat((old_scores, scores), dim=0)
+            n_extra = 0 if self.extra_points is None else self.extra_points.shape[0]
+            n_keep = min(n_extra + getattr(cfg, 'ADAPTIVE_ADD', cfg.N_PDE // 20),
+                         getattr(cfg, 'ADAPTIVE_MAX', cfg.N_PDE // 2))
+            top = torch.topk(scores, n_keep).indices
+            self.extra_points = candidates[top]
+            self.extra_scores = scores[top]
+        else:
+            mix = getattr(cfg, 'ADAPTIVE_MIX', 0.1)
+            density = scores ** getattr(cfg, 'ADAPTIVE_POWER', 1.0)
+            probs = (1.0 - mix) * density / density.sum().clamp_min(1e-30) + mix / self.pool_size
+            self.candidates = candidates
+            self.probs = probs
+            # Peso de importância de cada candidato: 1 / (M * p_i)
+            self.weights = (1.0 / (self.pool_size * probs)).unsqueeze(1)
+
+    def apply(self, data):
+        """
+        Substitui/expande os pontos de PDE de 'data'.
+        :return: (data, pde_weights), com pde_weights None quando a loss não
+                 precisa de reponderação.
+        """
+        pde_input, ic_input, ic_targets, bc_inputs, bc_targets = data
+        if self.mode == 'rar' and self.extra_points is not None:
+            pde_input = torch.cat((pde_input.detach(), self.extra_points), dim=0).requires_grad_(True)
+        elif self.mode == 'importance' and self.candidates is not None:
+            idx = torch.multinomial(self.probs, self.config.N_PDE, replacement=True,
+                                    generator=self.generator)
+            pde_input = self.candidates[idx].requires_grad_(True)
+            return (pde_input, ic_input, ic_targets, bc_inputs, bc_targets), self.weights[idx]
+        return (pde_input, ic_input, ic_targets, bc_inputs, bc_targets), None
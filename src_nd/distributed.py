@@ -0,0 +1,119 @@
+# src_nd/distributed.py
+import datetime
+import math
+import os
+import types
+
+import torch
+import torch.distributed as dist
+
+# Chaves do config com tamanhos de lote divididos entre os processos
+SHARDED_KEYS = ('N_PDE', 'N_IC', 'N_BC', 'ADAPTIVE_POOL', 'ADAPTIVE_ADD', 'ADAPTIVE_MAX')
+
+def init_distributed(config):
+    """
+    Inicializa o grupo de processos quando o treino é lançado com
+    torchrun (WORLD_SIZE > 1), com o backend DIST_BACKEND (padrão 'gloo',
+    que roda em CPU e entre nós sem GPU). Cada processo fica com
+    DIST_THREADS threads intra-op (padrão: núcleos do nó divididos pelos
+    processos locais), para que os processos não disputem os mesmos núcleos.
+    :return: (rank, world_size); (0, 1) fora do modo distribuído.
+    """
+    world_size = int(os.environ.get('WORLD_SIZE', 1))
+    if world_size <= 1:
+        return 0, 1
+    if not dist.is_initialized():
+        timeout = datetime.timedelta(seconds=getattr(config, 'DIST_TIMEOUT', 1800))
+        dist.init_process_group(backend=getattr(config, 'DIST_BACKEND', 'gloo'), timeout=timeout)
+    local_world_size = int(os.environ.get('LOCAL_WORLD_SIZE', world_size))
+    threads = getattr(config, 'DIST_THREADS', None) or max((os.cpu_count() or 1) // local_world_size, 1)
+    torch.set_num_threads(threads)
+    return dist.get_rank(), dist.get_world_size()
+
+def cleanup_distributed():
+    """Encerra o grupo de processos, se houver."""
+    if dist.is_initialized():
+        dist.barrier()
+        dist.destroy_process_group()
+
+def is_main_process():
+    """Indica se este é o processo 0 (o único a gravar checkpoints, histórico e plots)."""
+    if dist.is_initialized():
+        return dist.get_rank() == 0
+    return int(os.environ.get('RANK', 0)) == 0
+
+def rank_device(device):
+    """Com CUDA, um dispositivo por processo local (LOCAL_RANK); em CPU, o próprio device."""
+    if device.type != 'cuda':
+        return device
+    return torch.device('cuda', int(os.environ.get('LOCAL_RANK', 0)) % torch.cuda.device_count())
+
+def shard_config(config, world_size):
+    """
+    Cópia do config com os tamanhos de SHARDED_KEYS divididos entre os
+    processos. O arredondamento é para cima, de modo que todos os shards
+    tenham o mesmo tamanho e a média das losses locais seja a média global.
+    """
+    if world_size == 1:
+        return config
+    shard = types.SimpleNamespace(**{k: getattr(config, k) for k in dir(config) if k.isupper()})
+    for key in SHARDED_KEYS:
+        if getattr(shard, key, None) is not None:
+            setattr(shard, key, math.ceil(getattr(shard, key) / world_size))
+    return shard
+
+def broadcast_parameters(model):
+    """Copia os parâmetros e buffers do processo 0 para os demais."""
+    with torch.no_grad():
+        for tensor in model.state_dict().values():
+            if torch.is_tensor(tensor):
+                dist.broadcast(tensor, src=0)
+
+
+class GradientAllReduce:
+    """
+    Média dos gradientes e das losses entre os processos, num único
+    all_reduce sobre um buffer contíguo pré-alocado (gradientes de todos
+    os parâmetros seguidos das n_losses componentes da loss).
+
+    Faz o papel do DistributedDataParallel, mas é chamado explicitamente
+    depois do backward: o resíduo em modo Taylor usa
+    model.forward_derivatives (fora do forward do DDP), e os modos em
+    blocos e o L-BFGS fazem vários backward por passo. Como as losses
+    devolvidas já são globais, todos os processos tomam as mesmas
+    decisões (busca em linha, scheduler, divergência).
+    """
+    def __init__(self, model, world_size, n_losses=4):
+        self.params = [p for p in model.parameters() if p.requires_grad]
+        self.world_size = world_size
+        self.n_grad = sum(p.numel() for p in self.params)
+        self.flat = torch.zeros(self.n_grad + n_losses, device=self.params[0].device)
+
+    def __call__(self, losses):
+        """
+        Substitui os .grad pela média entre os processos.
+        :param losses: n_losses losses locais (ex.: objetivo, total, pde, ic, bc),
+                       tensores escalares.
+        :return: As mesmas losses, com a média entre os processos.
+        """
+        offset = 0
+        for p in self.params:
+            n = p.numel()
+            if p.grad is None:
+                self.flat[offset:offset + n].zero_()
+            else:
+                self.flat[offset:offset + n].copy_(p.grad.reshape(-1))
+            offset += n
+        self.flat[offset:].copy_(torch.stack([loss.detach().reshape(()) for loss in losses]))
+
+        dist.all_reduce(self.flat)
+        self.flat.div_(self.world_size)
+
+        offset = 0
+        for p in self.params:
+            n = p.numel()
+            if p.grad is None:
+                p.grad = torch.empty_like(p)
+            p.grad.copy_(self.flat[offset:offset + n].view_as(p))
+            offset += n
+        return tuple(self.flat[offset:].clone().unbind())
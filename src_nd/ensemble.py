@@ -0,0 +1,218 @@
+# src_nd/ensemble.py
+import copy
+import math
+import time
+import types
+
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.func import functional_call, stack_module_state, vmap
+from torch.optim.lr_scheduler import ReduceLROnPlateau
+from tqdm import tqdm
+
+from src_nd.model import PINN, ansatz_options
+from src_nd.physics import domain_bounds
+from src_nd.data_loader import CollocationSampler
+from src_nd.trainer import compute_loss_fused, flush_interval
+from src_nd.utils import (set_seed, setup_device, suffixed_path, atomic_save, make_history_sink,
+                          read_history, MetricsBuffer)
+
+class _TaylorForward(nn.Module):
+    """Expõe PINN.forward_derivatives como forward, para uso com functional_call."""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x, n_deriv=None, directions=None):
+        return self.model.forward_derivatives(x, n_deriv=n_deriv, directions=directions)
+
+class _MemberView:
+    """
+    Um membro do ensemble visto pela loss: a mesma interface de PINN
+    usada por compute_loss_fused (forward_derivatives), com os pesos
+    vindos de 'state' em vez dos parâmetros do módulo.
+    """
+    def __init__(self, taylor, state):
+        self.taylor = taylor
+        self.state = state
+
+    def forward_derivatives(self, x, n_deriv=None, directions=None):
+        return functional_call(self.taylor, self.state, (x,), {'n_deriv': n_deriv, 'directions': directions})
+
+def ensemble_loss_fn(model, config):
+    """
+    Loss vetorizada do ensemble: (params, buffers, data) -> (objetivo, total, pde, ic, bc),
+    cada uma com forma (M,), isto é, compute_loss_fused de cada membro numa
+    só chamada (vmap sobre functional_call, com os mesmos pontos de treino).
+    As derivadas vêm sempre do modo Taylor: o autograd aninhado de
+    DERIVATIVE_MODE = "autograd" não roda dentro de vmap. No modo
+    LAPLACIAN_MODE = "hutchinson", as sondas são sorteadas uma vez por
+    chamada e compartilhadas pelos membros (randomness='same').
+    """
+    taylor_config = types.SimpleNamespace(**{k: getattr(config, k) for k in dir(config) if k.isupper()})
+    taylor_config.DERIVATIVE_MODE = 'taylor'
+    # Cópia sem armazenamento próprio: os pesos vêm sempre dos tensores empilhados
+    taylor = _TaylorForward(copy.deepcopy(model).to('meta'))
+
+    def member_loss(params, buffers, data):
+        state = {f"model.{k}": v for k, v in {**params, **buffers}.items()}
+        return compute_loss_fused(_MemberView(taylor, state), data, taylor_config, None)
+
+    return vmap(member_loss, in_dims=(0, 0, None), randomness='same')
+
+def member_config(config, index):
+    """Cópia do config com MODEL_PATH e HISTORY_PATH do membro 'index' (sufixo member{index})."""
+    member = types.SimpleNamespace(**{k: getattr(config, k) for k in dir(config) if k.isupper()})
+    member.MODEL_PATH = suffixed_path(config.MODEL_PATH, f"member{index}")
+    member.HISTORY_PATH = suffixed_path(config.HISTORY_PATH, f"member{index}")
+    return member
+
+
+class StackedBestTracker:
+    """
+    BestModelTracker para parâmetros empilhados: melhor loss e estado de
+    cada um dos M membros no device, atualizados com uma máscara por
+    membro (torch.where), sem sincronizar com o host. 'extra_state' (as
+    flags do ansatz, comuns aos membros) vai para o state_dict de cada membro.
+    """
+    def __init__(self, params, buffers, extra_state=None):
+        first = next(iter(params.values()))
+        self.buffers = buffers
+        self.extra_state = extra_state
+        self.best_loss = torch.full((first.shape[0],), float('inf'), device=first.device)
+        self.best_state = {k: v.detach().clone() for k, v in params.items()}
+        self._improved = torch.zeros(first.shape[0], dtype=torch.bool, device=first.device)
+
+    def update(self, params, losses):
+        """Guarda o estado dos membros cuja loss (tensor (M,)) é a menor até agora."""
+        improved = losses < self.best_loss
+        self.best_loss = torch.where(improved, losses, self.best_loss)
+        for k, v in params.items():
+            mask = improved.view(-1, *([1] * (v.dim() - 1)))
+            self.best_state[k].copy_(torch.where(mask, v.detach(), self.best_state[k]))
+        self._improved |= improved
+
+    def consume_improvement(self):
+        """Lista (sincronizando) dos membros que melhoraram desde a última chamada."""
+        improved = self._improved.cpu().tolist()
+        self._improved.zero_()
+        return improved
+
+    def member_state(self, index):
+        """state_dict do melhor estado do membro 'index', compatível com PINN."""
+        state = {k: v[index].clone() for k, v in self.buffers.items()}
+        state.update({k: v[index].clone() for k, v in self.best_state.items()})
+        if self.extra_state is not None:
+            state['_extra_state'] = dict(self.extra_state)
+        return state
+
+
+def save_members(best, members, dirty):
+    """Grava o melhor estado dos membros marcados em 'dirty' e limpa as marcas."""
+    for i, member in enumerate(members):
+        if dirty[i]:
+            atomic_save(best.member_state(i), member.MODEL_PATH)
+            dirty[i] = False
+
+def run_ensemble_training(config, seeds=None):
+    """
+    Treina um ensemble de PINNs (mesma arquitetura, seeds diferentes) como
+    um único modelo vetorizado: os parâmetros dos M membros são empilhados
+    (torch.func.stack_module_state) e as M losses saem de uma só chamada
+    (ver ensemble_loss_fn). Um único Adam atualiza todos os membros; como
+    o Adam age elemento a elemento e a loss otimizada é a soma das losses,
+    cada membro segue a trajetória que teria sozinho, com a taxa de
+    aprendizado comum reduzida pelo platô da loss média.
+
+    PDE_CHUNK_SIZE, ADAPTIVE e STAGES não se aplicam ao ensemble. Cada
+    membro tem checkpoint e histórico próprios (MODEL_PATH e HISTORY_PATH
+    com sufixo member{i}); um membro que diverge não afeta os demais.
+    :param seeds: Seeds dos membros (padrão: ENSEMBLE_SEEDS ou
+                  ENSEMBLE_SIZE seeds a partir de 42).
+    :return: (lista de PINNs com o melhor estado de cada membro, lista de históricos)
+    """
+    seeds = list(seeds or getattr(config, 'ENSEMBLE_SEEDS', None) or
+                 range(42, 42 + getattr(config, 'ENSEMBLE_SIZE', 8)))
+    n_members = len(seeds)
+    device = setup_device(config)
+
+    models = []
+    for seed in seeds:
+        set_seed(seed)
+        models.append(PINN(config.LAYERS, domain_bounds(config), **ansatz_options(config)).to(device))
+    params, buffers = stack_module_state(models)
+    loss_fn = ensemble_loss_fn(models[0], config)
+
+    # Os mesmos pontos de treino para todos os membros
+    sampler = CollocationSampler(config, device, seed=42,
+                                 prefetch=getattr(config, 'PREFETCH_DATA', True))
+    optimizer = optim.Adam(params.values(), lr=config.LEARNING_RATE)
+    scheduler = ReduceLROnPlateau(optimizer, 'min', factor=0.5, patience=1000, min_lr=1e-6)
+
+    # Métricas de todos os membros numa linha: [total, pde, ic, bc] do membro 0, do 1, ...
+    members = [member_config(config, i) for i in range(n_members)]
+    sinks = [make_history_sink(member) for member in members]
+    metrics = MetricsBuffer(4 * n_members, getattr(config, 'METRICS_FLUSH_EVERY', 100), device)
+    best = StackedBestTracker(params, buffers, models[0].get_extra_state())
+    best_interval = getattr(config, 'BEST_SAVE_INTERVAL', 30.0)
+    last_save = time.monotonic()
+    dirty = [False] * n_members
+    flush_limit = flush_interval(scheduler, getattr(config, 'METRICS_FLUSH_EVERY', 100))
+
+    print(f"Iniciando treinamento do ensemble ({n_members} membros, seeds {seeds}) "
+          f"para o modelo: {config.MODEL_TYPE}")
+    print(f"Dispositivo: {device}")
+
+    pbar = tqdm(range(config.EPOCHS), desc=f"Treinando ensemble ({n_members})")
+    for epoch in pbar:
+        data = sampler.next()
+        optimizer.zero_grad()
+        objective, total, loss_pde, loss_ic, loss_bc = loss_fn(params, buffers, data)
+        objective.sum().backward()
+        optimizer.step()
+
+        losses = torch.stack((total.detach(), loss_pde, loss_ic, loss_bc), dim=1)
+        metrics.record(epoch, *losses.reshape(-1))
+        best.update(params, total.detach())
+
+        if metrics.pending() >= flush_limit or epoch == config.EPOCHS - 1:
+            rows = metrics.flush()
+            for i, sink in enumerate(sinks):
+                sink.append([[row[0]] + row[1 + 4 * i:5 + 4 * i] + [0] for row in rows])
+
+            # Scheduler comum guiado pela média das losses finitas dos membros
+            finite = [[v for v in row[1::4] if math.isfinite(v)] for row in rows]
+            for values in finite:
+                if values:
+                    scheduler.step(sum(values) / len(values))
+
+            pbar.set_postfix({
+                'Melhor': f'{best.best_loss.min().item():.2e}',
+                'Média': f'{sum(finite[-1]) / max(len(finite[-1]), 1):.2e}',
+                'Finitos': f'{len(finite[-1])}/{n_members}',
+                'LR': f'{optimizer.param_groups[0]["lr"]:.1e}'
+            })
+
+            for i, improved in enumerate(best.consume_improvement()):
+                dirty[i] = dirty[i] or improved
+            if time.monotonic() - last_save >= best_interval:
+                save_members(best, members, dirty)
+                last_save = time.monotonic()
+
+    pbar.close()
+    sampler.close()
+    save_members(best, members, dirty)
+    for sink in sinks:
+        sink.close()
+
+    # Cada PINN recebe o melhor estado do seu membro
+    for i, model in enumerate(models):
+        model.load_state_dict(best.member_state(i))
+    best_losses = best.best_loss.cpu().tolist()
+    print("Treinamento do ensemble concluído. Melhores losses: " +
+          ", ".join(f"{loss:.4e}" for loss in best_losses))
+    print(f"Modelos salvos em: {suffixed_path(config.MODEL_PATH, 'member*')}")
+
+    histories = [read_history(member.HISTORY_PATH) for member in members]
+    return models, histories
@@ -0,0 +1,353 @@
+# src_nd/model.py
+import torch
+import torch.nn as nn
+
+from src_nd.data_loader import IC_PULSE_A, ic_pulse_a
+
+def _factor_jet(value, first, second, v_k, n):
+    """
+    Jato de um fator que depende só da coordenada k: valor (N, 1) e, se
+    v_k (componente k das direções, (m, n|1, 1)) for dado, 1ª e 2ª
+    derivadas direcionais (m, n, 1) nas primeiras n linhas.
+    """
+    if v_k is None:
+        return value, None, None
+    return value, first[:n] * v_k, second[:n] * (v_k * v_k)
+
+def _jet_product(a, b, n):
+    """Produto de dois jatos: (ab)' = a'b + ab', (ab)'' = a''b + 2a'b' + ab''."""
+    a0, a1, a2 = a
+    b0, b1, b2 = b
+    if a1 is None:
+        return a0 * b0, None, None
+    return (a0 * b0,
+            a1 * b0[:n] + a0[:n] * b1,
+            a2 * b0[:n] + 2.0 * a1 * b1 + a0[:n] * b2)
+
+class PINN(nn.Module):
+    """
+    Rede Neural simples (MLP) para a PINN em d dimensões espaciais.
+    COM normalização de entrada.
+    """
+    def __init__(self, layers, bounds, hard_bc=False, hard_ic=False, ic_pulse_a=IC_PULSE_A):
+        """
+        Inicializa a rede neural.
+        :param layers: Lista de neurônios por camada; layers[0] = d + 1.
+        :param bounds: Lista de [min, max] por entrada, na ordem das colunas
+                       (coordenadas espaciais e, por último, t).
+        :param hard_bc: Impõe u = 0 nas faces pelo ansatz de saída
+                        u = g + D * NN, com D = prod_k (1 - x_k^2) nas
+                        coordenadas normalizadas (nulo nas faces).
+        :param hard_ic: Impõe u(x, t_min) = pulso Gaussiano: g passa a ser o
+                        pulso e D ganha o fator tau = (t - t_min) / (t_max - t_min).
+                        Com hard_bc também, cada fator exp(-a r_k^2) do pulso
+                        é deslocado e reescalado para se anular nas faces do
+                        eixo k (ver _ansatz_jets): u = 0 continua exato nas
+                        faces e o pulso imposto difere do Gaussiano em no
+                        máximo exp(-a (L_k / 2)^2) (~4e-6 no 2D padrão).
+        :param ic_pulse_a: Largura do pulso Gaussiano de g (com hard_ic).
+        """
+        super(PINN, self).__init__()
+        if len(bounds) != layers[0]:
+            raise ValueError(f"São {len(bounds)} limites para {layers[0]} entradas da rede.")
+
+        # Armazena os limites para normalização
+        bounds = torch.tensor(bounds, dtype=torch.float32)
+        self.register_buffer('lower', bounds[:, 0].clone())
+        self.register_buffer('upper', bounds[:, 1].clone())
+
+        self.layers = nn.ModuleList()
+        for i in range(len(layers) - 1):
+            self.layers.append(nn.Linear(layers[i], layers[i+1]))
+
+        self.activation = nn.Tanh()
+        self.init_weights()
+
+        # Ansatz de saída (restrições rígidas), gravado no state_dict junto
+        # com os pesos (ver get_extra_state)
+        self.hard_bc = bool(hard_bc)
+        self.hard_ic = bool(hard_ic)
+        self.ic_pulse_a = float(ic_pulse_a)
+
+    def get_extra_state(self):
+        """Flags do ansatz de saída, gravadas no state_dict (chave '_extra_state')."""
+        return {'hard_bc': self.hard_bc, 'hard_ic': self.hard_ic, 'ic_pulse_a': self.ic_pulse_a}
+
+    def set_extra_state(self, state):
+        """
+        Restaura as flags do ansatz gravadas com os pesos: elas prevalecem
+        sobre as do construtor (os pesos só valem com o ansatz do treino).
+        """
+        if state != self.get_extra_state():
+            print(f"Ansatz do checkpoint {state} difere de {self.get_extra_state()}; usando o do checkpoint.")
+        self.hard_bc = bool(state['hard_bc'])
+        self.hard_ic = bool(state['hard_ic'])
+        self.ic_pulse_a = float(state['ic_pulse_a'])
+
+    def normalize(self, x_in):
+        """Normaliza cada coluna da entrada para o intervalo [-1, 1]"""
+        return 2.0 * (x_in - self.lower) / (self.upper - self.lower) - 1.0
+
+    def forward(self, x):
+        """
+        Forward pass.
+        :param x: Tensor de entrada (N, d + 1) (ex: [x, y, z, t])
+        :return: Tensor de saída (N, 1) (ex: u(x, y, z, t))
+        """
+        x_normalized = self.normalize(x)
+        for i, layer in enumerate(self.layers):
+            x_normalized = layer(x_normalized)
+            if i < len(self.layers) - 1:
+                x_normalized = self.activation(x_normalized)
+        return self.apply_ansatz(x, x_normalized)
+
+    def _ansatz_jets(self, x, n=None, directions=None):
+        """
+        Termos g e D do ansatz u = g + D * NN em 'x' e, com 'directions'
+        ((m, n|1, d + 1)), suas derivadas direcionais nas primeiras n linhas.
+        :return: (g, D) como jatos (valor, 1ª, 2ª); g é None sem hard_ic.
+        """
+        d = x.shape[1] - 1
+        scale = 2.0 / (self.upper - self.lower)
+        x_n = self.normalize(x)
+
+        def component(k):
+            return None if directions is None else directions[..., k:k+1]
+
+        g, dist = None, None
+        if self.hard_bc:
+            # 1 - x_n^2 em cada eixo espacial: nulo nas duas faces do eixo
+            for k in range(d):
+                xk = x_n[:, k:k+1]
+                jet = _factor_jet(1.0 - xk * xk, -2.0 * scale[k] * xk,
+                                  torch.full_like(xk, -2.0) * scale[k] ** 2, component(k), n)
+                dist = jet if dist is None else _jet_product(dist, jet, n)
+        if self.hard_ic:
+            tau = 0.5 * (x_n[:, d:d+1] + 1.0)
+            jet = _factor_jet(tau, torch.full_like(tau, 0.5) * scale[d], torch.zeros_like(tau),
+                              component(d), n)
+            dist = jet if dist is None else _jet_product(dist, jet, n)
+
+            # Pulso exp(-a |x - c|^2) como produto de fatores exp(-a (x_k - c_k)^2)
+            a = self.ic_pulse_a
+            center = 0.5 * (self.lower + self.upper)
+            for k in range(d):
+                r = x[:, k:k+1] - center[k]
+                pulse = torch.exp(-a * r * r)
+                first, second = -2.0 * a * r * pulse, (4.0 * a * a * r * r - 2.0 * a) * pulse
+                if self.hard_bc:
+                    # O pulso não se anula nas faces: (f - f_face) / (1 - f_face)
+                    # zera o fator nas duas faces do eixo k e mantém 1 no centro
+                    edge = torch.exp(-a * (0.5 * (self.upper[k] - self.lower[k]))**2)
+                    norm = 1.0 / (1.0 - edge)
+                    pulse, first, second = (pulse - edge) * norm, first * norm, second * norm
+                jet = _factor_jet(pulse, first, second, component(k), n)
+                g = jet if g is None else _jet_product(g, jet, n)
+        return g, dist
+
+    def apply_ansatz(self, x, out):
+        """Aplica o ansatz u = g + D * NN à saída 'out' do MLP (identidade sem hard_bc/hard_ic)."""
+        if not (self.hard_bc or self.hard_ic):
+            return out
+        g, dist = self._ansatz_jets(x)
+        out = dist[0] * out
+        return out if g is None else out + g[0]
+
+    def forward_derivatives(self, x, n_deriv=None, directions=None):
+        """
+        Forward pass com derivadas (modo Taylor de segunda ordem).
+        Propaga, em forma fechada, o valor, o gradiente e as segundas
+        derivadas diagonais em relação às entradas por cada camada
+        Linear + Tanh, sem grafos aninhados de autograd.
+        :param x: Tensor de entrada (N, d + 1)
+        :param n_deriv: Se fornecido, só as primeiras n_deriv linhas recebem
+                        derivadas; as demais recebem apenas o valor.
+        :param directions: Se fornecido, tensor (m, n_deriv, D) (ou (m, 1, D),
+                           comum a todas as linhas) de direções v_j: as
+                           derivadas passam a ser direcionais, com
+                           u_grad[:, j] = v_j . grad(u) e u_diag[:, j] = v_j^T H v_j
+                           (ver physics.compute_directional_derivatives).
+        :return: (u, u_grad, u_diag) com formas (N, 1), (n_deriv, d + 1) e
+                 (n_deriv, d + 1), onde u_grad[:, k] = du/dx_k e
+                 u_diag[:, k] = d2u/dx_k^2.
+        """
+        n = x.shape[0] if n_deriv is None else n_deriv
+
+        # Normalização afim: d(x_norm)/dx = 2 / (max - min)
+        scale = 2.0 / (self.upper - self.lower)
+        x_normalized = self.normalize(x)
+
+        # Primeira camada: du/dx_k é a coluna k dos pesos (escalada pela
+        # normalização) e a segunda derivada é nula.
+        first = self.layers[0]
+        h = first(x_normalized)
+        if directions is None:
+            w = (first.weight.t() * scale.unsqueeze(1)).unsqueeze(1)
+        else:
+            # Derivada direcional da 1ª camada: W (scale * v_j)
+            w = torch.matmul(directions * scale, first.weight.t())
+        s = self.activation(h)
+        s_n = s[:n]
+        s1 = 1.0 - s_n * s_n
+        da = s1 * w                        # (m, n, H); sem directions, m = nº de entradas
+        d2a = (-2.0 * s_n * s1) * (w * w)  # s'' * (dh)^2
+
+        for i, layer in enumerate(self.layers[1:], start=1):
+            # Camada linear: o bias só afeta o valor
+            h = layer(s)
+            dh = torch.matmul(da, layer.weight.t())
+            d2h = torch.matmul(d2a, layer.weight.t())
+            if i == len(self.layers) - 1:
+                break
+
+            # Derivadas da Tanh: s' = 1 - s^2, s'' = -2 s s'
+            s = self.activation(h)
+            s_n = s[:n]
+            s1 = 1.0 - s_n * s_n
+            da = s1 * dh
+            d2a = torch.addcmul(s1 * d2h, (-2.0 * s_n) * da, dh)
+        else:
+            # Rede sem camadas ocultas: a saída é afim na entrada
+            dh = w.expand(w.shape[0], n, first.out_features)
+            d2h = torch.zeros_like(dh)
+
+        if self.hard_bc or self.hard_ic:
+            # Regra do produto sobre o ansatz u = g + D * NN
+            if directions is None:
+                directions = torch.eye(x.shape[1], device=x.device, dtype=x.dtype).unsqueeze(1)
+            g, dist = self._ansatz_jets(x, n, directions)
+            h, dh, d2h = _jet_product(dist, (h, dh, d2h), n)
+            if g is not None:
+                h, dh, d2h = h + g[0], dh + g[1], d2h + g[2]
+
+        return h, dh.squeeze(-1).t(), d2h.squeeze(-1).t()
+
+    def init_weights(self):
+        """
+        Inicialização dos pesos usando Xavier.
+        """
+        for layer in self.layers:
+            if isinstance(layer, nn.Linear):
+                nn.init.xavier_uniform_(layer.weight)
+                if layer.bias is not None:
+                    nn.init.zeros_(layer.bias)
+
+
+def fold_normalization(model):
+    """
+    Cria uma cópia do MLP com a normalização afim das entradas absorvida
+    pela primeira camada: x_norm = a * x + b, logo
+    W (a * x + b) + c = (W * a) x + (W b + c).
+    :return: nn.Sequential (Linear, Tanh, ..., Linear) sem buffers de
+             normalização e sem gradientes (o ansatz de saída, se houver,
+             fica de fora; ver optimize_for_inference).
+    """
+    scale = 2.0 / (model.upper - model.lower)
+    shift = -2.0 * model.lower / (model.upper - model.lower) - 1.0
+
+    modules = []
+    for i, layer in enumerate(model.layers):
+        linear = nn.Linear(layer.in_features, layer.out_features).to(layer.weight.device)
+        with torch.no_grad():
+            if i == 0:
+                linear.weight.copy_(layer.weight * scale)
+                linear.bias.copy_(layer.bias + layer.weight @ shift)
+            else:
+                linear.weight.copy_(layer.weight)
+                linear.bias.copy_(layer.bias)
+        modules.append(linear)
+        if i < len(model.layers) - 1:
+            modules.append(nn.Tanh())
+
+    folded = nn.Sequential(*modules).eval()
+    for param in folded.parameters():
+        param.requires_grad_(False)
+    return folded
+
+
+class _AnsatzOutput(nn.Module):
+    """MLP otimizado seguido do ansatz de saída do PINN original (hard_bc/hard_ic)."""
+    def __init__(self, mlp, model):
+        super().__init__()
+        self.mlp = mlp
+        self.model = model
+
+    def forward(self, x):
+        return self.model.apply_ansatz(x, self.mlp(x))
+
+
+def optimize_for_inference(model, backend="script", atol=1e-5, n_check=4096):
+    """
+    Prepara o PINN para avaliações em grids densos (plots, diagnósticos):
+    dobra a normalização na primeira camada, remove o estado de treino
+    (gradientes, buffers de normalização) e congela/compila o módulo.
+    :param backend: "script" (TorchScript + torch.jit.freeze),
+                    "compile" (torch.compile) ou None (apenas o MLP dobrado).
+    :param atol: Tolerância absoluta na comparação com o modelo original,
+                 feita em n_check pontos aleatórios do domínio.
+    :return: Módulo que aceita o mesmo tensor (N, d + 1) de entrada que o PINN.
+    """
+    model.eval()
+    folded = fold_normalization(model)
+
+    if backend == "script":
+        optimized = torch.jit.freeze(torch.jit.script(folded))
+    elif backend == "compile":
+        optimized = torch.compile(folded)
+    elif backend is None:
+        optimized = folded
+    else:
+        raise ValueError(f"Backend de inferência desconhecido: {backend}. Opções: ['script', 'compile', None]")
+
+    # O ansatz (elemento a elemento) é aplicado fora do módulo congelado/compilado
+    if model.hard_bc or model.hard_ic:
+        optimized = _AnsatzOutput(optimized, model)
+
+    # Confere as saídas contra o modelo original em pontos do domínio
+    if n_check:
+        span = model.upper - model.lower
+        # Gerador local com semente fixa: não consome nem altera o RNG global
+        generator = torch.Generator().manual_seed(0)
+        points = model.lower + span * torch.rand(n_check, span.shape[0], generator=generator).to(span)
+        with torch.no_grad():
+            error = (optimized(points) - model(points)).abs().max().item()
+        if error > atol:
+            raise RuntimeError(f"Modelo otimizado difere do original: erro máximo {error:.2e} > atol={atol:.0e}")
+
+    return optimized
+
+
+def ansatz_options(config):
+    """Argumentos do ansatz de saída do PINN (HARD_BC, HARD_IC) lidos do config."""
+    return {'hard_bc': getattr(config, 'HARD_BC', False),
+            'hard_ic': getattr(config, 'HARD_IC', False),
+            'ic_pulse_a': ic_pulse_a(config)}
+
+
+def upgrade_state_dict(state, model):
+    """
+    Converte checkpoints dos layouts antigos para o do PINN genérico 'model':
+    - src_2 (2D): buffers escalares x_min/x_max, y_min/y_max, t_min/t_max
+      empilhados em lower/upper;
+    - src (1D): sem normalização de entrada, equivalente a lower = -1 e
+      upper = 1 (normalização identidade);
+    - sem '_extra_state' (anteriores ao ansatz gravado com os pesos): o
+      ansatz fica o do construtor de 'model', isto é, o do config.
+    Checkpoints já no layout atual voltam sem mudança.
+    """
+    if 'lower' in state and '_extra_state' in state:
+        return state
+    state = dict(state)
+    state.setdefault('_extra_state', model.get_extra_state())
+    if 'lower' in state:
+        return state
+    n_inputs = model.lower.shape[0]
+    axes = ['x', 'y', 'z'][:n_inputs - 1] + ['t']
+    if 'x_min' in state:
+        state['lower'] = torch.stack([state.pop(f"{axis}_min") for axis in axes])
+        state['upper'] = torch.stack([state.pop(f"{axis}_max") for axis in axes])
+    else:
+        weight = state['layers.0.weight']
+        state['lower'] = -torch.ones(n_inputs, dtype=weight.dtype, device=weight.device)
+        state['upper'] = torch.ones(n_inputs, dtype=weight.dtype, device=weight.device)
+    return state
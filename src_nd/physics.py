@@ -0,0 +1,233 @@
+# src_nd/physics.py
+import torch
+
+from src_nd.velocity import velocity_model
+
+# Nomes dos eixos espaciais, na ordem das colunas de entrada (o tempo vem por último)
+SPATIAL_AXES = ('x', 'y', 'z')
+
+def domain_bounds(config):
+    """
+    Limites do domínio a partir de X_BOUNDS, Y_BOUNDS e Z_BOUNDS (nessa
+    ordem; a dimensão espacial d é o número de chaves presentes) e T_BOUNDS.
+    Assim os configs 1D e 2D existentes também servem ao motor genérico.
+    :return: Lista de [min, max] por coluna de entrada: d eixos espaciais e t.
+    """
+    bounds = []
+    for axis in SPATIAL_AXES:
+        axis_bounds = getattr(config, f"{axis.upper()}_BOUNDS", None)
+        if axis_bounds is None:
+            break
+        bounds.append(list(axis_bounds))
+    if not bounds:
+        raise ValueError("O config precisa de pelo menos X_BOUNDS.")
+    return bounds + [list(config.T_BOUNDS)]
+
+def spatial_dim(config):
+    """Número de dimensões espaciais do config."""
+    return len(domain_bounds(config)) - 1
+
+def get_velocity(coords, config):
+    """
+    Velocidade c nas coordenadas espaciais 'coords' (N, d):
+    - o modelo em grid de VELOCITY_FILE (1D, 2D ou 3D, ver src_nd.velocity);
+    - C_BASE + C_GRAD_X * x + C_GRAD_Y * y + C_GRAD_Z * z (no 1D também
+      C_GRAD, como em config_variavel);
+    - C constante;
+    - 1.0 se nenhuma das chaves existir.
+    :return: Tensor (N, 1) com o mesmo device/dtype de coords.
+    """
+    if getattr(config, 'VELOCITY_FILE', None):
+        # Colunas como views de coords: o cache do modelo reconhece o mesmo tensor
+        return velocity_model(config, coords.device, coords.dtype)(*coords.split(1, dim=1))
+    if hasattr(config, "C_BASE"):
+        c_val = torch.full_like(coords[:, 0:1], float(config.C_BASE))
+        for k in range(coords.shape[1]):
+            grad = getattr(config, f"C_GRAD_{SPATIAL_AXES[k].upper()}", None)
+            if grad is None and k == 0:
+                grad = getattr(config, "C_GRAD", 0.0)
+            if grad:
+                c_val = c_val + grad * coords[:, k:k+1]
+        return c_val
+    return torch.full_like(coords[:, 0:1], float(getattr(config, "C", 1.0)))
+
+def wave_residual(pde_input, u_diag, config):
+    """
+    Resíduo u_tt - c^2 * lap(u) a partir das segundas derivadas diagonais
+    u_diag = [u_x1x1, ..., u_xdxd, u_tt] ou, no modo Hutchinson, de
+    [v_1^T H v_1, ..., v_K^T H v_K, u_tt] (uma coluna de resíduo por grupo
+    de sondas, ver laplacian_estimate).
+    """
+    c = get_velocity(pde_input[:, :-1], config)
+    return u_diag[:, -1:] - (c ** 2) * laplacian_estimate(u_diag[:, :-1], config)
+
+def is_stochastic_laplacian(config):
+    """Indica se o laplaciano do resíduo é estimado por sondas (LAPLACIAN_MODE)."""
+    mode = getattr(config, 'LAPLACIAN_MODE', 'exact')
+    if mode not in ('exact', 'hutchinson'):
+        raise ValueError(f"LAPLACIAN_MODE desconhecido: {mode}. Opções: ['exact', 'hutchinson']")
+    return mode == 'hutchinson'
+
+def probe_groups(config):
+    """
+    Número de estimativas independentes do laplaciano por ponto: 2 com
+    LAPLACIAN_UNBIASED (ver residual_squared), senão 1.
+    """
+    return 2 if getattr(config, 'LAPLACIAN_UNBIASED', True) else 1
+
+def sample_probes(n, n_space, config, like):
+    """
+    Direções do estimador de Hutchinson para n pontos: LAPLACIAN_PROBES
+    sondas v por ponto (Rademacher ou gaussianas, E[v v^T] = I nas
+    coordenadas espaciais, componente temporal nula) e, por último, e_t,
+    que fornece u_t e u_tt exatos.
+    :return: Tensor (K + 1, n, n_space + 1) com o device/dtype de 'like'.
+    """
+    n_probes = getattr(config, 'LAPLACIAN_PROBES', 2)
+    groups = probe_groups(config)
+    if n_probes < groups or n_probes % groups:
+        raise ValueError(f"LAPLACIAN_PROBES={n_probes} precisa ser múltiplo de {groups} "
+                         f"(LAPLACIAN_UNBIASED divide as sondas em dois grupos).")
+
+    dist = getattr(config, 'LAPLACIAN_PROBE_DIST', 'rademacher')
+    if dist == 'rademacher':
+        probes = torch.randint(0, 2, (n_probes, n, n_space), device=like.device).to(like.dtype) * 2 - 1
+    elif dist == 'gaussian':
+        probes = torch.randn(n_probes, n, n_space, device=like.device, dtype=like.dtype)
+    else:
+        raise ValueError(f"LAPLACIAN_PROBE_DIST desconhecida: {dist}. Opções: ['rademacher', 'gaussian']")
+
+    directions = torch.zeros(n_probes + 1, n, n_space + 1, device=like.device, dtype=like.dtype)
+    directions[:-1, :, :-1] = probes
+    directions[-1, :, -1] = 1.0
+    return directions
+
+def compute_directional_derivatives(model, inputs, n_deriv, config):
+    """
+    Variante de compute_packed_derivatives para o modo Hutchinson: as
+    derivadas são tomadas ao longo das direções de sample_probes em vez
+    dos eixos, de modo que o custo por ponto depende de LAPLACIAN_PROBES e
+    não da dimensão espacial. No modo autograd, os produtos H v de todas as
+    direções saem de uma única chamada vetorizada (is_grads_batched).
+    :return: (u, u_grad, u_diag) com formas (N, 1), (n_deriv, K + 1) e
+             (n_deriv, K + 1): v_j . grad(u) e v_j^T H v_j por sonda e,
+             na última coluna, u_t e u_tt.
+    """
+    directions = sample_probes(n_deriv, inputs.shape[1] - 1, config, inputs)
+    if getattr(config, 'DERIVATIVE_MODE', 'autograd') == 'taylor':
+        return model.forward_derivatives(inputs, n_deriv=n_deriv, directions=directions)
+
+    inputs = inputs.detach().requires_grad_(True)
+    u = model(inputs)
+    u_grads = torch.autograd.grad(u, inputs,
+                                  grad_outputs=torch.ones_like(u),
+                                  create_graph=True, retain_graph=True)[0][:n_deriv]
+    hv = torch.autograd.grad(u_grads, inputs, grad_outputs=directions,
+                             create_graph=True, retain_graph=True,
+                             is_grads_batched=True)[0][:, :n_deriv]
+    u_grad = (directions * u_grads).sum(dim=2).t()
+    u_diag = (directions * hv).sum(dim=2).t()
+    return u, u_grad, u_diag
+
+def laplacian_estimate(u_space, config):
+    """
+    Laplaciano a partir das colunas espaciais de u_diag: soma das segundas
+    derivadas diagonais (modo exato) ou média de v^T H v em cada grupo de
+    sondas (modo Hutchinson, uma coluna por grupo).
+    """
+    if not is_stochastic_laplacian(config):
+        return u_space.sum(dim=1, keepdim=True)
+    return u_space.reshape(u_space.shape[0], probe_groups(config), -1).mean(dim=2)
+
+def residual_squared(residual):
+    """
+    Resíduo ao quadrado por ponto. Com duas estimativas independentes do
+    resíduo (modo Hutchinson com LAPLACIAN_UNBIASED), usa o produto
+    r_a * r_b, cujo valor esperado é o r^2 exato: o quadrado de uma única
+    estimativa teria viés +Var(r). O produto pode ser negativo num ponto;
+    só a média sobre os pontos é comparável à loss exata.
+    """
+    if residual.shape[1] == 2:
+        return residual[:, 0:1] * residual[:, 1:2]
+    return residual ** 2
+
+def compute_packed_derivatives(model, inputs, n_deriv, config):
+    """
+    Avalia u em todas as linhas de 'inputs' numa única passada pela rede
+    e o gradiente e as segundas derivadas diagonais apenas nas primeiras
+    'n_deriv' linhas.
+    :return: (u, u_grad, u_diag) com formas (N, 1), (n_deriv, d + 1) e (n_deriv, d + 1).
+    """
+    if is_stochastic_laplacian(config):
+        return compute_directional_derivatives(model, inputs, n_deriv, config)
+    if getattr(config, 'DERIVATIVE_MODE', 'autograd') == 'taylor':
+        return model.forward_derivatives(inputs, n_deriv=n_deriv)
+
+    inputs = inputs.detach().requires_grad_(True)
+    u = model(inputs)
+    u_grad = torch.autograd.grad(u, inputs,
+                                 grad_outputs=torch.ones_like(u),
+                                 create_graph=True, retain_graph=True)[0][:n_deriv]
+    u_diag = []
+    for k in range(inputs.shape[1]):
+        u_k = u_grad[:, k:k+1]
+        u_kk_grads = torch.autograd.grad(u_k, inputs,
+                                         grad_outputs=torch.ones_like(u_k),
+                                         create_graph=True, retain_graph=True)[0]
+        u_diag.append(u_kk_grads[:n_deriv, k:k+1])
+    return u, u_grad, torch.cat(u_diag, dim=1)
+
+def compute_pde_residual(model, pde_input, config):
+    """
+    Calcula o resíduo da Equação da Onda em d dimensões:
+    Resíduo = u_tt - c^2 * (u_x1x1 + ... + u_xdxd)
+    """
+    if is_stochastic_laplacian(config):
+        # Laplaciano estimado por sondas aleatórias (ver sample_probes)
+        _, _, u_diag = compute_directional_derivatives(model, pde_input, pde_input.shape[0], config)
+        return wave_residual(pde_input, u_diag, config)
+
+    if getattr(config, 'DERIVATIVE_MODE', 'autograd') == 'taylor':
+        # Derivadas em forma fechada numa única passada pela rede
+        _, _, u_diag = model.forward_derivatives(pde_input)
+        return wave_residual(pde_input, u_diag, config)
+
+    # garante que pde_input permita autograd nas entradas
+    if not pde_input.requires_grad:
+        pde_input = pde_input.clone().detach().requires_grad_(True)
+    _, _, u_diag = compute_packed_derivatives(model, pde_input, pde_input.shape[0], config)
+    return wave_residual(pde_input, u_diag, config)
+
+def evaluate_pde_residual(model, points, config, chunk_size=8192):
+    """
+    Avalia o resíduo da PDE em 'points' por blocos, sem manter grafo
+    (usado para pontuar candidatos na amostragem adaptativa).
+    :return: Tensor (N, 1) desanexado do grafo.
+    """
+    taylor = getattr(config, 'DERIVATIVE_MODE', 'autograd') == 'taylor'
+    residuals = []
+    for chunk in torch.split(points.detach(), chunk_size):
+        if taylor:
+            # O modo Taylor não precisa de autograd para as derivadas
+            with torch.no_grad():
+                residuals.append(compute_pde_residual(model, chunk, config))
+        else:
+            with torch.enable_grad():
+                chunk = chunk.requires_grad_(True)
+                residuals.append(compute_pde_residual(model, chunk, config).detach())
+    # No modo Hutchinson não enviesado, média das duas estimativas do resíduo
+    return torch.cat(residuals, dim=0).mean(dim=1, keepdim=True)
+
+def compute_ic_derivatives(model, ic_input):
+    """
+    Calcula u(x, 0) e a derivada temporal u_t(x, 0) (última coluna)
+    para a loss da condição inicial.
+    """
+    if not ic_input.requires_grad:
+        ic_input = ic_input.clone().detach().requires_grad_(True)
+
+    u_pred = model(ic_input)
+    u_t_pred_grads = torch.autograd.grad(u_pred, ic_input,
+                                         grad_outputs=torch.ones_like(u_pred),
+                                         create_graph=True, retain_graph=True)[0]
+    return u_pred, u_t_pred_grads[:, -1:]
@@ -0,0 +1,84 @@
+# src_nd/sampling.py
+import torch
+
+# Primeiras bases primas para a sequência de Halton (uma por dimensão)
+_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
+
+def uniform_points(n, dim, generator):
+    """Amostragem aleatória uniforme em [0, 1)^dim."""
+    return torch.rand((n, dim), generator=generator)
+
+def sobol_points(n, dim, generator):
+    """Sequência de Sobol embaralhada (Owen scrambling) em [0, 1)^dim."""
+    seed = int(torch.randint(0, 2**31 - 1, (1,), generator=generator))
+    engine = torch.quasirandom.SobolEngine(dim, scramble=True, seed=seed)
+    return engine.draw(n)
+
+def halton_points(n, dim, generator):
+    """
+    Sequência de Halton em [0, 1)^dim com deslocamento aleatório
+    (rotação de Cranley-Patterson) para embaralhar.
+    """
+    if dim > len(_PRIMES):
+        raise ValueError(f"Halton suporta no máximo {len(_PRIMES)} dimensões.")
+    index = torch.arange(1, n + 1, dtype=torch.int64)
+    points = torch.empty((n, dim), dtype=torch.float64)
+    for j in range(dim):
+        base = _PRIMES[j]
+        i = index.clone()
+        f = 1.0
+        r = torch.zeros(n, dtype=torch.float64)
+        # Inverso radical: espelha os dígitos de i na base 'base'
+        while bool((i > 0).any()):
+            f /= base
+            r += f * (i % base)
+            i = i // base
+        points[:, j] = r
+    shift = torch.rand((1, dim), generator=generator, dtype=torch.float64)
+    return torch.remainder(points + shift, 1.0).float()
+
+def latin_hypercube_points(n, dim, generator):
+    """Latin Hypercube: um ponto por estrato em cada dimensão."""
+    strata = torch.stack([torch.randperm(n, generator=generator) for _ in range(dim)], dim=1)
+    return (strata + torch.rand((n, dim), generator=generator)) / n
+
+# Registro de amostradores, escolhidos pela chave SAMPLER da configuração
+SAMPLERS = {
+    'uniform': uniform_points,
+    'sobol': sobol_points,
+    'halton': halton_points,
+    'lhs': latin_hypercube_points,
+}
+
+def get_sampler(name):
+    """Retorna a função de amostragem registrada com o nome dado."""
+    try:
+        return SAMPLERS[name]
+    except KeyError:
+        raise ValueError(f"Amostrador desconhecido: {name}. Opções: {sorted(SAMPLERS)}")
+
+
+class PointPool:
+    """
+    Pool de pontos em [0, 1)^dim pré-computado uma única vez.
+
+    O pool é formado por 'windows' janelas de 'window' pontos, cada uma
+    gerada por uma chamada independente do amostrador (ou seja, cada
+    janela é por si só um conjunto de baixa discrepância). A cada época,
+    next_window() devolve a próxima janela de forma cíclica, sem gerar
+    nem copiar pontos.
+    """
+    def __init__(self, name, window, dim, windows, seed, device):
+        sampler = get_sampler(name)
+        generator = torch.Generator().manual_seed(seed)
+        blocks = [sampler(window, dim, generator) for _ in range(windows)]
+        self.points = torch.cat(blocks, dim=0).to(device)
+        self.window = window
+        self.windows = windows
+        self._index = 0
+
+    def next_window(self):
+        """Retorna a próxima janela (view de forma (window, dim))."""
+        start = self._index * self.window
+        self._index = (self._index + 1) % self.windows
+        return self.points[start:start + self.window]
@@ -0,0 +1,577 @@
+# src_nd/trainer.py
+import math
+import os
+import torch
+import torch.optim as optim
+from torch.optim.lr_scheduler import ReduceLROnPlateau
+from torch.profiler import record_function
+from tqdm import tqdm
+
+from src_nd.model import PINN, ansatz_options
+from src_nd.visualization import PlotRenderer, submit_training_snapshot
+from src_nd.data_loader import CollocationSampler, AdaptiveRefiner
+from src_nd.distributed import (init_distributed, cleanup_distributed, rank_device, shard_config,
+                                broadcast_parameters, GradientAllReduce)
+from src_nd.physics import (domain_bounds, compute_pde_residual, compute_ic_derivatives,
+                            compute_packed_derivatives, wave_residual, residual_squared,
+                            is_stochastic_laplacian)
+from src_nd.utils import (set_seed, setup_device, CheckpointWriter, make_history_sink, read_history,
+                          MetricsBuffer, BestModelTracker, make_profiler)
+
+def pde_loss(residual, pde_weights=None):
+    """
+    Média do resíduo ao quadrado, opcionalmente reponderada pelos pesos
+    de importância da amostragem adaptativa (r_a * r_b no modo Hutchinson
+    não enviesado, ver residual_squared).
+    """
+    if pde_weights is None:
+        return torch.mean(residual_squared(residual))
+    return torch.mean(pde_weights * residual_squared(residual))
+
+def pde_monitor(residual, loss_pde, pde_weights=None):
+    """
+    Termo da PDE registrado nas métricas, desanexado. No modo Hutchinson
+    não enviesado, o objetivo r_a * r_b é ruidoso e pode ser negativo;
+    o monitor usa o quadrado da média das duas estimativas, sempre >= 0.
+    Nos outros modos é a própria loss_pde.
+    """
+    if residual.shape[1] != 2:
+        return loss_pde.detach()
+    squared = residual.detach().mean(dim=1, keepdim=True)**2
+    if pde_weights is None:
+        return torch.mean(squared)
+    return torch.mean(pde_weights * squared)
+
+def monitored_total(total_loss, loss_pde, monitor_pde, config):
+    """Loss total com o termo da PDE trocado pelo monitor (ver pde_monitor)."""
+    return total_loss.detach() + config.W_PDE * (monitor_pde - loss_pde.detach())
+
+def ic_value_loss(u_pred_ic, ic_targets):
+    """
+    Loss do valor inicial u(x, t_min). Sem o alvo 'u' nos dados (HARD_IC),
+    o ansatz do modelo já impõe a condição e o termo é nulo.
+    """
+    if 'u' not in ic_targets:
+        return u_pred_ic.new_zeros(())
+    return torch.mean((u_pred_ic - ic_targets['u'])**2)
+
+def compute_boundary_losses(model, data):
+    """
+    Calcula as losses de IC (u e u_t) e de BC (soma sobre as 2d faces),
+    sem o termo da PDE.
+    :return: (loss_ic_u, loss_ic_v, loss_bc)
+    """
+    _, ic_input, ic_targets, bc_inputs, bc_targets = data
+
+    # 2. Loss das Condições Iniciais (IC)
+    with record_function("ic"):
+        u_pred_ic, v_pred_ic = compute_ic_derivatives(model, ic_input)
+
+        loss_ic_u = ic_value_loss(u_pred_ic, ic_targets)
+        loss_ic_v = torch.mean((v_pred_ic - ic_targets['v'])**2)
+
+    # 3. Loss das Condições de Contorno (BC) - todas as faces (nenhuma com HARD_BC)
+    with record_function("bc"):
+        loss_bc = sum((torch.mean((model(bc_inputs[face]) - bc_targets[face])**2)
+                       for face in bc_inputs), u_pred_ic.new_zeros(()))
+
+    return loss_ic_u, loss_ic_v, loss_bc
+
+def compute_loss(model, data, config, device, pde_weights=None):
+    """
+    Calcula a loss total combinando PDE, IC e BC (todas as faces).
+    pde_weights: pesos opcionais por ponto de PDE (amostragem por importância).
+    :return: (objetivo, total, pde, ic, bc). O objetivo, com grafo, é o que
+             vai para o backward; as demais são tensores desanexados, sem
+             .item(), para não sincronizar com o host a cada época, com o
+             termo da PDE dado por pde_monitor (o valor registrado, usado
+             pelo melhor modelo e pelo scheduler).
+    """
+    if getattr(config, 'FUSED_LOSS', False):
+        return compute_loss_fused(model, data, config, device, pde_weights)
+
+    pde_input = data[0]
+    
+    # 1. Loss da PDE (Resíduo)
+    with record_function("residual"):
+        residual = compute_pde_residual(model, pde_input, config)
+        loss_pde = pde_loss(residual, pde_weights)
+        monitor_pde = pde_monitor(residual, loss_pde, pde_weights)
+    
+    # 2 e 3. Losses das Condições Iniciais (IC) e de Contorno (BC)
+    loss_ic_u, loss_ic_v, loss_bc = compute_boundary_losses(model, data)
+    loss_ic = loss_ic_u + loss_ic_v
+
+    # Loss Total Ponderada
+    total_loss = (config.W_PDE * loss_pde +
+                  config.W_IC_U * loss_ic_u +
+                  config.W_IC_V * loss_ic_v +
+                  config.W_BC * loss_bc)
+    
+    return (total_loss, monitored_total(total_loss, loss_pde, monitor_pde, config),
+            monitor_pde, loss_ic.detach(), loss_bc.detach())
+
+
+def compute_loss_fused(model, data, config, device, pde_weights=None):
+    """
+    Mesma loss de compute_loss, mas com todos os conjuntos de pontos
+    (PDE, IC e bordas) empacotados num único tensor contíguo: uma só
+    passada pela rede, com derivadas apenas nas linhas de PDE e IC.
+    """
+    pde_input, ic_input, ic_targets, bc_inputs, bc_targets = data
+    n_pde = pde_input.shape[0]
+    n_ic = ic_input.shape[0]
+
+    # Empacota os pontos e guarda o intervalo de linhas de cada borda
+    bc_ranges = {}
+    start = n_pde + n_ic
+    for key, bc_input in bc_inputs.items():
+        bc_ranges[key] = (start, start + bc_input.shape[0])
+        start += bc_input.shape[0]
+    packed = torch.cat([pde_input, ic_input] + list(bc_inputs.values()), dim=0)
+
+    with record_function("fused_pass"):
+        u, u_grad, u_diag = compute_packed_derivatives(model, packed, n_pde + n_ic, config)
+
+    # 1. Loss da PDE (Resíduo)
+    residual = wave_residual(pde_input, u_diag[:n_pde], config)
+    loss_pde = pde_loss(residual, pde_weights)
+    monitor_pde = pde_monitor(residual, loss_pde, pde_weights)
+
+    # 2. Loss das Condições Iniciais (IC)
+    u_pred_ic = u[n_pde:n_pde + n_ic]
+    v_pred_ic = u_grad[n_pde:, -1:]
+    loss_ic_u = ic_value_loss(u_pred_ic, ic_targets)
+    loss_ic_v = torch.mean((v_pred_ic - ic_targets['v'])**2)
+    loss_ic = loss_ic_u + loss_ic_v
+
+    # 3. Loss das Condições de Contorno (BC)
+    loss_bc = sum((torch.mean((u[a:b] - bc_targets[key])**2)
+                   for key, (a, b) in bc_ranges.items()), u.new_zeros(()))
+
+    # Loss Total Ponderada
+    total_loss = (config.W_PDE * loss_pde +
+                  config.W_IC_U * loss_ic_u +
+                  config.W_IC_V * loss_ic_v +
+                  config.W_BC * loss_bc)
+
+    return (total_loss, monitored_total(total_loss, loss_pde, monitor_pde, config),
+            monitor_pde, loss_ic.detach(), loss_bc.detach())
+
+
+def compute_loss_chunked(model, data, config, device, chunk_size, pde_weights=None):
+    """
+    Calcula a loss e já faz o backward, avaliando o resíduo da PDE em
+    blocos de 'chunk_size' pontos. O grafo de cada bloco é liberado logo
+    após seu backward e os gradientes se acumulam nos parâmetros, de modo
+    que o pico de memória depende de chunk_size e não de N_PDE. Os
+    gradientes e a loss coincidem com os de compute_loss.
+    :return: Mesma tupla de compute_loss, com o objetivo já desanexado.
+    """
+    pde_input = data[0]
+    n_pde = pde_input.shape[0]
+
+    # 1. Loss da PDE, bloco a bloco: soma(r^2) / N_PDE em vez da média do bloco
+    loss_pde = torch.zeros((), device=pde_input.device)
+    monitor_pde = torch.zeros((), device=pde_input.device)
+    for start in range(0, n_pde, chunk_size):
+        chunk = pde_input[start:start + chunk_size].detach().requires_grad_(True)
+        with record_function("residual"):
+            residual = compute_pde_residual(model, chunk, config)
+        weights = None if pde_weights is None else pde_weights[start:start + chunk_size]
+        # Média do bloco reescalada para soma(r^2) / N_PDE
+        scale = residual.shape[0] / n_pde
+        part = pde_loss(residual, weights) * scale
+        with record_function("backward"):
+            (config.W_PDE * part).backward()
+        loss_pde += part.detach()
+        monitor_pde += pde_monitor(residual, part / scale, weights) * scale
+
+    # 2 e 3. IC e BC num único backward
+    loss_ic_u, loss_ic_v, loss_bc = compute_boundary_losses(model, data)
+    loss_ic = loss_ic_u + loss_ic_v
+    boundary_loss = (config.W_IC_U * loss_ic_u +
+                     config.W_IC_V * loss_ic_v +
+                     config.W_BC * loss_bc)
+    with record_function("backward"):
+        boundary_loss.backward()
+
+    total_loss = config.W_PDE * loss_pde + boundary_loss.detach()
+    return (total_loss, monitored_total(total_loss, loss_pde, monitor_pde, config),
+            monitor_pde, loss_ic.detach(), loss_bc.detach())
+
+
+def backward_loss(model, data, config, device, pde_weights=None, chunk_size=None, grad_sync=None):
+    """
+    Calcula a loss e acumula os gradientes nos parâmetros, por blocos de
+    pontos de PDE quando chunk_size é fornecido. Com grad_sync (treino
+    distribuído), gradientes e losses passam a ser a média entre os processos.
+    :return: (objetivo desanexado, total, loss_pde, loss_ic, loss_bc), como em compute_loss.
+    """
+    if chunk_size is not None:
+        losses = compute_loss_chunked(model, data, config, device, chunk_size, pde_weights)
+    else:
+        objective, *losses = compute_loss(model, data, config, device, pde_weights)
+        with record_function("backward"):
+            objective.backward()
+        losses = (objective.detach(), *losses)
+    if grad_sync is not None:
+        with record_function("all_reduce"):
+            losses = grad_sync(losses)
+    return losses
+
+
+def resolve_chunk_size(model, data, config):
+    """
+    Define o tamanho dos blocos de PDE a partir de PDE_CHUNK_SIZE:
+    - None: sem blocos (lote completo);
+    - inteiro: tamanho fixo;
+    - "auto": mede, num passo de sondagem, os bytes guardados pelo autograd
+      por ponto de colocação e escolhe o maior bloco que cabe em
+      MAX_RESIDUAL_MEM_MB.
+    :return: Tamanho do bloco, ou None se o lote completo couber.
+    """
+    chunk_size = getattr(config, 'PDE_CHUNK_SIZE', None)
+    n_pde = data[0].shape[0]
+    if chunk_size != "auto":
+        return None if chunk_size is None or chunk_size >= n_pde else int(chunk_size)
+
+    # Passo de sondagem: soma o tamanho de todos os tensores salvos para o backward
+    probe = data[0][:min(n_pde, 1024)].detach().requires_grad_(True)
+    saved_bytes = 0
+
+    def pack(tensor):
+        nonlocal saved_bytes
+        saved_bytes += tensor.numel() * tensor.element_size()
+        return tensor
+
+    with torch.autograd.graph.saved_tensors_hooks(pack, lambda tensor: tensor):
+        residual = compute_pde_residual(model, probe, config)
+        torch.mean(residual**2)
+    bytes_per_point = max(saved_bytes / probe.shape[0], 1.0)
+
+    budget = getattr(config, 'MAX_RESIDUAL_MEM_MB', 512) * 2**20
+    chunk_size = max(int(budget / bytes_per_point), 1)
+    print(f"Memória do resíduo: ~{bytes_per_point / 1024:.1f} KiB/ponto -> "
+          f"blocos de {min(chunk_size, n_pde)} pontos")
+    return None if chunk_size >= n_pde else chunk_size
+
+
+def build_stage_optimizer(name, model, config):
+    """
+    Cria o otimizador (e o scheduler, se houver) de um estágio de STAGES.
+    - "adam": Adam com ReduceLROnPlateau;
+    - "lbfgs": L-BFGS com busca em linha strong-Wolfe (LBFGS_LR,
+      LBFGS_MAX_ITER iterações por época, LBFGS_HISTORY).
+    :return: (optimizer, scheduler ou None)
+    """
+    if name == "adam":
+        optimizer = optim.Adam(model.parameters(), lr=config.LEARNING_RATE)
+        scheduler = ReduceLROnPlateau(optimizer, 'min', factor=0.5, patience=1000, min_lr=1e-6)
+        return optimizer, scheduler
+    if name == "lbfgs":
+        max_iter = getattr(config, 'LBFGS_MAX_ITER', 1)
+        # O max_eval padrão (max_iter * 5 // 4) não deixaria avaliações para a
+        # busca em linha quando max_iter é pequeno; reserva até 25 por iteração
+        optimizer = optim.LBFGS(model.parameters(),
+                                lr=getattr(config, 'LBFGS_LR', 1.0),
+                                max_iter=max_iter,
+                                max_eval=max_iter * 25,
+                                history_size=getattr(config, 'LBFGS_HISTORY', 50),
+                                line_search_fn="strong_wolfe")
+        return optimizer, None
+    raise ValueError(f"Estágio de otimização desconhecido: {name}. Opções: ['adam', 'lbfgs']")
+
+
+def flush_interval(scheduler, flush_every):
+    """
+    Épocas entre flushes das métricas. O ReduceLROnPlateau só recebe as
+    losses no flush (as de todas as épocas do bloco, em ordem), então uma
+    redução do LR entra em vigor com até (intervalo - 1) épocas de atraso;
+    com scheduler, o intervalo fica limitado a patience // 10, isto é, o
+    atraso não passa de 10% da paciência.
+    """
+    if scheduler is None:
+        return flush_every
+    return max(1, min(flush_every, scheduler.patience // 10))
+
+
+def freeze_points(data):
+    """
+    Copia os pontos de treino para que não sejam sobrescritos pelo
+    CollocationSampler (que reutiliza seus buffers) enquanto estão fixos.
+    """
+    pde_input, ic_input, ic_targets, bc_inputs, bc_targets = data
+    clone = lambda tensors: {k: v.detach().clone() for k, v in tensors.items()}
+    return (pde_input.detach().clone().requires_grad_(True), ic_input.detach().clone(),
+            clone(ic_targets), clone(bc_inputs), clone(bc_targets))
+
+
+def lbfgs_step(optimizer, model, data, config, device, pde_weights=None, chunk_size=None,
+               grad_sync=None):
+    """
+    Um passo de L-BFGS sobre um conjunto fixo de pontos. O closure
+    reutiliza backward_loss (lote completo ou em blocos); a busca em linha
+    o avalia várias vezes, e as losses retornadas são as da primeira
+    avaliação, isto é, nos parâmetros do início do passo (como no Adam).
+    No treino distribuído a loss do closure já é global (grad_sync), então
+    todos os processos fazem a mesma busca em linha.
+
+    No modo Hutchinson, todas as avaliações do passo usam as mesmas sondas
+    (o gerador é re-semeado com a mesma semente a cada chamada, dentro de
+    fork_rng): a busca em linha compara valores e gradientes de um único
+    objetivo. As sondas mudam de um passo para o outro.
+    """
+    evaluations = []
+    stochastic = is_stochastic_laplacian(config)
+    # Semente do passo, sorteada no gerador da CPU (sem sincronizar com o device)
+    seed = int(torch.randint(2**62, ())) if stochastic else None
+    devices = [device] if stochastic and torch.device(device).type == 'cuda' else []
+
+    def closure():
+        optimizer.zero_grad()
+        with torch.random.fork_rng(devices=devices, enabled=stochastic):
+            if stochastic:
+                torch.manual_seed(seed)
+            losses = backward_loss(model, data, config, device, pde_weights, chunk_size, grad_sync)
+        if not evaluations:
+            evaluations.append(losses)
+        return losses[0]
+
+    optimizer.step(closure)
+    return evaluations[0]
+
+
+class FiniteStepGuard:
+    """
+    Descarta, no próprio device, o passo do otimizador de uma época com
+    loss não finita: os parâmetros e os tensores de estado do otimizador
+    (momentos do Adam) são copiados antes do passo e restaurados por
+    torch.where depois dele, sem sincronizar com o host. A divergência em
+    si só é percebida no flush das métricas.
+
+    As cópias vão para buffers alocados uma vez por estágio (de novo só
+    quando o otimizador cria estado, no primeiro passo do Adam), com
+    copy_(), sem alocar memória a cada época.
+    """
+    def __init__(self, model, optimizer):
+        self.model = model
+        self.optimizer = optimizer
+        self._tensors = []
+        self._saved = []
+
+    def save(self):
+        """Copia parâmetros e estado do otimizador antes do passo."""
+        params = list(self.model.parameters())
+        device = params[0].device
+        # Só os tensores no device dos parâmetros (o contador 'step' do Adam
+        # fica na CPU; restaurá-lo exigiria uma sincronização)
+        tensors = params + [v for state in self.optimizer.state.values() for v in state.values()
+                            if torch.is_tensor(v) and v.device == device]
+        if len(tensors) != len(self._saved):
+            self._saved = [torch.empty_like(t) for t in tensors]
+        self._tensors = tensors
+        with torch.no_grad():
+            for saved, tensor in zip(self._saved, tensors):
+                saved.copy_(tensor)
+
+    @torch.no_grad()
+    def restore_if_non_finite(self, loss):
+        """Desfaz o passo se 'loss' (tensor escalar) não for finita."""
+        finite = torch.isfinite(loss)
+        for tensor, saved in zip(self._tensors, self._saved):
+            torch.where(finite, tensor, saved, out=tensor)
+
+
+def run_training(config):
+    """
+    Executa o loop de treinamento principal.
+    """
+    set_seed(42)
+    device = setup_device(config)
+    # Treino distribuído (torchrun): cada processo amostra e avalia um shard dos pontos
+    rank, world_size = init_distributed(config)
+    is_main = rank == 0
+    if world_size > 1:
+        device = rank_device(device)
+        config = shard_config(config, world_size)
+    
+    # Passa os limites da configuração (d eixos espaciais e t) e o ansatz para o construtor do modelo
+    model = PINN(config.LAYERS, domain_bounds(config), **ansatz_options(config)).to(device)
+    grad_sync = None
+    if world_size > 1:
+        broadcast_parameters(model)
+        grad_sync = GradientAllReduce(model, world_size, n_losses=5)
+    
+    # Estágios de otimização executados em sequência, ex.: [("adam", 20000), ("lbfgs", 2000)]
+    stages = getattr(config, 'STAGES', None) or [("adam", config.EPOCHS)]
+    refresh_every = getattr(config, 'LBFGS_REFRESH_EVERY', None)
+
+    # Buffers persistentes; com PREFETCH_DATA a próxima época é amostrada em segundo plano
+    sampler = CollocationSampler(config, device, seed=42 + 100 * rank,
+                                 prefetch=getattr(config, 'PREFETCH_DATA', True))
+    # Amostragem adaptativa dos pontos de PDE guiada pelo resíduo (opcional)
+    refiner = AdaptiveRefiner(config, device, seed=42 + 100 * rank) if getattr(config, 'ADAPTIVE', None) else None
+
+    # Checkpoints gravados em segundo plano, com retenção e escrita atômica.
+    # No treino distribuído, checkpoints, histórico, snapshots e profiling ficam com o processo 0
+    writer = CheckpointWriter(config,
+                              best_interval=getattr(config, 'BEST_SAVE_INTERVAL', 30.0),
+                              keep=getattr(config, 'CKPT_KEEP', 3),
+                              log_spaced=getattr(config, 'CKPT_LOG_SPACED', True)) if is_main else None
+
+    # Snapshots ao vivo a cada SNAPSHOT_EVERY épocas, renderizados em outro processo
+    snapshot_every = getattr(config, 'SNAPSHOT_EVERY', None) if is_main else None
+    renderer = PlotRenderer(getattr(config, 'SNAPSHOT_WORKERS', 1)) if snapshot_every else None
+    if renderer is not None:
+        os.makedirs(config.PLOT_PATH, exist_ok=True)
+
+    # Métricas e melhor modelo ficam no device; o host só é consultado a cada flush
+    flush_every = getattr(config, 'METRICS_FLUSH_EVERY', 100)
+    metrics = MetricsBuffer(4, flush_every, device)
+    best = BestModelTracker(model)
+    # Histórico gravado incrementalmente em disco a cada flush (HISTORY_SINK)
+    sink = make_history_sink(config) if is_main else None
+
+    if is_main:
+        print(f"Iniciando treinamento para o modelo: {config.MODEL_TYPE}")
+        print(f"Dispositivo: {device}" + (f" ({world_size} processos)" if world_size > 1 else ""))
+    
+    ckpt_every = getattr(config, 'CKPT_EVERY', 500)
+    # Profiling opcional de uma janela de épocas (PROFILE, PROFILE_SCHEDULE)
+    profiler = make_profiler(config) if is_main else None
+    if profiler is not None:
+        profiler.start()
+    pbar = tqdm(total=sum(n_epochs for _, n_epochs in stages), desc="Treinando", disable=not is_main)
+    epoch = 0
+    diverged = False
+    resolved_n_pde = None
+    for stage, (name, n_epochs) in enumerate(stages):
+        if diverged:
+            break
+        optimizer, scheduler = build_stage_optimizer(name, model, config)
+        # Passos com loss não finita descartados no device (FINITE_STEP_GUARD)
+        guard = FiniteStepGuard(model, optimizer) if getattr(config, 'FINITE_STEP_GUARD', True) else None
+        flush_limit = flush_interval(scheduler, flush_every)
+        lbfgs = name == "lbfgs"
+        pbar.set_description(f"Treinando [{name}]")
+
+        for step in range(n_epochs):
+            model.train()
+            # Gera novos dados de treino (sample collocation / IC / BC); no L-BFGS
+            # o conjunto fica fixo (renovado a cada LBFGS_REFRESH_EVERY épocas)
+            with record_function("sampling"):
+                if not lbfgs or step == 0 or (refresh_every and step % refresh_every == 0):
+                    data = sampler.next()
+                    pde_weights = None
+                    if refiner is not None:
+                        refiner.update(model, epoch)
+                        data, pde_weights = refiner.apply(data)
+                    if lbfgs:
+                        data = freeze_points(data)
+
+            # Tamanho dos blocos de PDE (PDE_CHUNK_SIZE), resolvido de novo
+            # sempre que o número de pontos muda (o RAR cresce até ADAPTIVE_MAX)
+            if data[0].shape[0] != resolved_n_pde:
+                chunk_size = resolve_chunk_size(model, data, config)
+                resolved_n_pde = data[0].shape[0]
+
+            try:
+                if guard is not None:
+                    guard.save()
+                if lbfgs:
+                    with record_function("step"):
+                        _, total_loss, loss_pde, loss_ic, loss_bc = lbfgs_step(optimizer, model, data, config,
+                                                                               device, pde_weights, chunk_size,
+                                                                               grad_sync)
+                else:
+                    optimizer.zero_grad()
+                    _, total_loss, loss_pde, loss_ic, loss_bc = backward_loss(model, data, config, device,
+                                                                              pde_weights, chunk_size, grad_sync)
+                    with record_function("step"):
+                        optimizer.step()
+                # Uma loss não finita não chega aos pesos (nem aos checkpoints)
+                if guard is not None:
+                    guard.restore_if_non_finite(total_loss)
+            except Exception as e:
+                print(f"Erro ao calcular loss na época {epoch}: {e}")
+                raise
+
+            # Registra as métricas e o melhor modelo sem sincronizar
+            # (uma loss não finita nunca substitui o melhor modelo). A loss
+            # registrada usa o monitor da PDE (ver pde_monitor), não negativo
+            metrics.record(epoch, total_loss, loss_pde, loss_ic, loss_bc)
+            best.update(model, total_loss)
+
+            # Checkpoint intermediário (gravado em segundo plano)
+            if is_main and ckpt_every and epoch % ckpt_every == 0:
+                with record_function("checkpoint"):
+                    writer.checkpoint(model, epoch + 1)
+
+            # Snapshot ao vivo (o Matplotlib roda no renderer, fora do loop de treino)
+            if snapshot_every and epoch % snapshot_every == 0:
+                submit_training_snapshot(model, config, device, epoch, renderer)
+
+            # Descarrega as métricas no host a cada METRICS_FLUSH_EVERY épocas
+            # (menos com scheduler, ver flush_interval) e no fim de cada
+            # estágio (coluna 'Stage' do histórico)
+            if metrics.pending() >= flush_limit or step == n_epochs - 1:
+                rows = [row + [stage] for row in metrics.flush()]
+                non_finite = [row for row in rows if not math.isfinite(row[1])]
+                if non_finite:
+                    if is_main:
+                        sink.append([row for row in rows if row[0] < non_finite[0][0]])
+                    print(f"Loss não finita detectada na época {non_finite[0][0]}: {non_finite[0][1]}")
+                    diverged = True
+                    break
+                if is_main:
+                    sink.append(rows)
+
+                # O scheduler recebe as losses de todas as épocas do bloco, em
+                # ordem: as decisões são as de um passo por época, atrasadas
+                # em até flush_limit - 1 épocas
+                if scheduler is not None:
+                    for row in rows:
+                        scheduler.step(row[1])
+
+                # Atualiza barra e melhor modelo com menos frequência
+                _, loss, pde, ic, bc, _ = rows[-1]
+                pbar.set_postfix({
+                    'Loss': f'{loss:.2e}',
+                    'PDE': f'{pde:.2e}',
+                    'IC': f'{ic:.2e}',
+                    'BC': f'{bc:.2e}',
+                    'LR': f'{optimizer.param_groups[0]["lr"]:.1e}'
+                })
+                if is_main and best.consume_improvement():
+                    with record_function("checkpoint"):
+                        writer.update_best(best)
+
+            if profiler is not None:
+                profiler.step()
+            pbar.update(1)
+            epoch += 1
+
+    pbar.close()
+    if profiler is not None:
+        profiler.stop()
+    sampler.close()
+    if diverged:
+        # Devolve o melhor modelo anterior à divergência, não o da última época
+        model.load_state_dict(best.best_state)
+    if not is_main:
+        cleanup_distributed()
+        return model, None
+    if best.consume_improvement():
+        writer.update_best(best)
+    writer.close()
+    if renderer is not None:
+        renderer.close()
+    print(f"Treinamento concluído. Melhor loss: {best.best_loss.item():.4e}")
+    
+    # Fecha o histórico (exporta o CSV) e o relê do disco
+    sink.close()
+    history_df = read_history(config.HISTORY_PATH)
+    cleanup_distributed()
+    
+    return model, history_df
\ No newline at end of file
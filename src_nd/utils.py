@@ -0,0 +1,573 @@
+# src_nd/utils.py
+# Infraestrutura independente da dimensão (checkpoints, métricas, histórico,
+# profiling, cache e avaliação de campos), re-exportada por src e src_2
+import torch
+import numpy as np
+import random
+import os
+import csv
+import hashlib
+import copy
+import json
+import queue
+import threading
+import time
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from src_nd.model import ansatz_options, upgrade_state_dict
+from src_nd.physics import domain_bounds
+
+def set_seed(seed):
+    """Define a seed para reprodutibilidade."""
+    torch.manual_seed(seed)
+    torch.cuda.manual_seed_all(seed)
+    torch.backends.cudnn.deterministic = True
+    torch.backends.cudnn.benchmark = False
+    np.random.seed(seed)
+    random.seed(seed)
+
+def setup_device(config):
+    """Configura o dispositivo (CPU ou CUDA)."""
+    if "cuda" in config.DEVICE and not torch.cuda.is_available():
+        print("CUDA não disponível. Usando CPU.")
+        return torch.device("cpu")
+    return torch.device(config.DEVICE)
+
+def save_model(model, config, suffix: str = None):
+    """Salva os pesos do modelo.
+
+    Se `suffix` for fornecido, insere antes da extensão do arquivo.
+    """
+    save_path = suffixed_path(config.MODEL_PATH, suffix) if suffix else config.MODEL_PATH
+    atomic_save(model.state_dict(), save_path)
+    print(f"Modelo salvo em: {save_path}")
+
+def suffixed_path(path, suffix):
+    """Insere '_<suffix>' antes da extensão do arquivo."""
+    base, ext = os.path.splitext(path)
+    return f"{base}_{suffix}{ext}"
+
+def atomic_save(obj, path):
+    """
+    Salva 'obj' com torch.save de forma atômica: grava num arquivo
+    temporário no mesmo diretório e o renomeia (os.replace), de modo que
+    uma interrupção nunca deixa um .pth truncado.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+def copy_state(state, device=None):
+    """
+    Cópia desanexada de um state_dict (em 'device', se dado). Valores que
+    não são tensores, como o estado extra do ansatz do PINN, são copiados
+    como estão.
+    """
+    return {k: v.detach().to(device or v.device, copy=True) if torch.is_tensor(v) else copy.deepcopy(v)
+            for k, v in state.items()}
+
+class CheckpointWriter:
+    """
+    Grava checkpoints numa thread em segundo plano, fora do loop de treino.
+
+    - update_best(model): copia o state_dict para um snapshot na CPU
+      (buffers reutilizados); a thread grava o melhor modelo em MODEL_PATH
+      no máximo uma vez a cada 'best_interval' segundos.
+    - checkpoint(model, epoch): enfileira um checkpoint intermediário
+      (MODEL_PATH com sufixo epoch{N}). Mantém apenas os 'keep' mais
+      recentes e, com 'log_spaced', também os de índice potência de 2
+      (1º, 2º, 4º, 8º, ... checkpoint).
+    - close(): grava o melhor modelo pendente, encerra a thread e relança
+      a falha da última gravação do melhor modelo, se houver.
+
+    Todas as gravações são atômicas (ver atomic_save).
+    """
+    def __init__(self, config, best_interval=30.0, keep=3, log_spaced=True):
+        self.config = config
+        self.best_interval = best_interval
+        self.keep = keep
+        self.log_spaced = log_spaced
+
+        self._lock = threading.Lock()
+        self._best_state = None
+        self._best_dirty = False
+        self._last_best_write = float('-inf')
+        self._count = 0
+        self._written = []  # (índice, caminho) dos checkpoints intermediários
+        self._error = None  # falha da última gravação do melhor modelo
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def update_best(self, model):
+        """Registra o estado atual do modelo como o melhor até agora."""
+        with self._lock:
+            if self._best_state is None:
+                self._best_state = copy_state(model.state_dict(), 'cpu')
+            else:
+                for k, v in model.state_dict().items():
+                    if torch.is_tensor(v):
+                        self._best_state[k].copy_(v.detach())
+                    else:
+                        self._best_state[k] = copy.deepcopy(v)
+            self._best_dirty = True
+
+    def checkpoint(self, model, epoch):
+        """Enfileira um checkpoint intermediário da época 'epoch'."""
+        self._queue.put((epoch, copy_state(model.state_dict(), 'cpu')))
+
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Falha ao salvar o melhor modelo em {self.config.MODEL_PATH}") \
+                from self._error
+        if self._best_state is not None:
+            print(f"Melhor modelo salvo em: {self.config.MODEL_PATH}")
+
+    def _run(self):
+        # Piso no timeout: com best_interval = 0 a thread não fica em espera ativa
+        timeout = min(max(self.best_interval, 0.05), 1.0)
+        while True:
+            try:
+                job = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                job = ()
+            if job is None:
+                break
+            if job:
+                self._write_checkpoint(*job)
+            self._write_best()
+        self._write_best(force=True)
+
+    def _write_best(self, force=False):
+        if not self._best_dirty:
+            return
+        if not force and time.monotonic() - self._last_best_write < self.best_interval:
+            return
+        with self._lock:
+            state = copy_state(self._best_state)
+            self._best_dirty = False
+        try:
+            atomic_save(state, self.config.MODEL_PATH)
+        except Exception as e:
+            print(f"Falha ao salvar o melhor modelo: {e}")
+            self._error = e
+            with self._lock:
+                # Tenta de novo na próxima janela (com o estado mais recente)
+                self._best_dirty = True
+        else:
+            self._error = None
+        self._last_best_write = time.monotonic()
+
+    def _write_checkpoint(self, epoch, state):
+        try:
+            path = suffixed_path(self.config.MODEL_PATH, f"epoch{epoch}")
+            atomic_save(state, path)
+        except Exception as e:
+            print(f"Falha ao salvar checkpoint na época {epoch}: {e}")
+            return
+        self._count += 1
+        self._written.append((self._count, path))
+
+        # Política de retenção: últimos 'keep' + índices potência de 2
+        recent = {p for _, p in self._written[-self.keep:]} if self.keep else set()
+        retained = []
+        for index, old_path in self._written:
+            is_log = self.log_spaced and (index & (index - 1)) == 0
+            if old_path in recent or is_log:
+                retained.append((index, old_path))
+            elif os.path.exists(old_path):
+                os.remove(old_path)
+        self._written = retained
+
+
+class MetricsBuffer:
+    """
+    Acumula as métricas de cada época num tensor pré-alocado no device,
+    sem sincronizar com o host. flush() copia as linhas pendentes para o
+    host numa única transferência (uma sincronização a cada 'capacity'
+    épocas em vez de várias .item() por época).
+    """
+    def __init__(self, n_metrics, capacity, device):
+        self.capacity = capacity
+        self.buffer = torch.zeros((capacity, n_metrics), device=device)
+        self.epochs = []
+
+    def record(self, epoch, *values):
+        """Grava os valores (tensores escalares) da época, sem sincronizar."""
+        self.buffer[len(self.epochs)].copy_(torch.stack(values))
+        self.epochs.append(epoch)
+
+    def full(self):
+        return len(self.epochs) == self.capacity
+
+    def pending(self):
+        """Número de épocas registradas desde o último flush."""
+        return len(self.epochs)
+
+    def flush(self):
+        """Retorna as linhas pendentes como [época, métrica_1, ...] e esvazia o buffer."""
+        values = self.buffer[:len(self.epochs)].cpu().tolist()
+        rows = [[epoch] + row for epoch, row in zip(self.epochs, values)]
+        self.epochs = []
+        return rows
+
+class BestModelTracker:
+    """
+    Acompanha a melhor loss e o estado correspondente do modelo no
+    próprio device: a comparação e a cópia condicional (torch.where) não
+    exigem sincronização com o host. Expõe state_dict(), então pode ser
+    passado diretamente a CheckpointWriter.update_best.
+    """
+    def __init__(self, model):
+        state = model.state_dict()
+        device = next(v.device for v in state.values() if torch.is_tensor(v))
+        self.best_loss = torch.tensor(float('inf'), device=device)
+        self.best_state = copy_state(state)
+        self._improved = torch.zeros((), dtype=torch.bool, device=device)
+
+    def update(self, model, loss):
+        """Guarda o estado do modelo se 'loss' (tensor escalar) for a menor até agora."""
+        improved = loss < self.best_loss
+        self.best_loss = torch.where(improved, loss, self.best_loss)
+        for k, v in model.state_dict().items():
+            if torch.is_tensor(v):
+                self.best_state[k].copy_(torch.where(improved, v.detach(), self.best_state[k]))
+        self._improved |= improved
+
+    def consume_improvement(self):
+        """Indica (sincronizando) se houve melhora desde a última chamada."""
+        improved = bool(self._improved)
+        self._improved.zero_()
+        return improved
+
+    def state_dict(self):
+        return self.best_state
+
+def restore_model(model, config, device):
+    """
+    Carrega em 'model' os pesos de MODEL_PATH. Checkpoints de layouts
+    antigos (PINN 1D sem normalização, buffers x_min, ..., t_max do 2D)
+    são convertidos por upgrade_state_dict.
+    :return: O modelo em modo de avaliação, ou None se a carga falhar.
+    """
+    try:
+        state = torch.load(config.MODEL_PATH, map_location=device)
+        model.load_state_dict(upgrade_state_dict(state, model))
+        model.eval()
+        print(f"Modelo carregado de {config.MODEL_PATH}")
+        return model
+    except FileNotFoundError:
+        print(f"Erro: Arquivo do modelo não encontrado em {config.MODEL_PATH}")
+        return None
+    except RuntimeError as e:
+        print(f"Erro ao carregar o modelo (talvez a arquitetura tenha mudado?): {e}")
+        return None
+
+def load_model(model_class, config, device):
+    """
+    Carrega um modelo treinado (limites de domain_bounds e ansatz do config,
+    ver restore_model).
+    """
+    model = model_class(config.LAYERS, domain_bounds(config), **ansatz_options(config)).to(device)
+    return restore_model(model, config, device)
+
+def _grid_chunk_size(model, n_inputs, max_mem_mb):
+    """Pontos por bloco que cabem em max_mem_mb (entrada, saída e ativações da camada mais larga)."""
+    width = max((p.shape[0] for p in model.parameters()), default=256)
+    bytes_per_point = 4 * (n_inputs + 1 + 2 * width)
+    return max(int(max_mem_mb * 2**20 // bytes_per_point), 1)
+
+def _evaluate_grid(model, axes, device, max_mem_mb, n_workers):
+    """
+    Avalia o modelo no produto tensorial dos eixos 1D em 'axes' (na ordem
+    das colunas de entrada). As entradas de cada bloco são montadas a
+    partir dos índices planos, sem materializar o grid completo.
+    :return: np.ndarray com os eixos em ordem inversa (o último, t, primeiro).
+    """
+    if device is None:
+        tensors = list(model.parameters()) + list(model.buffers())
+        device = tensors[0].device if tensors else torch.device('cpu')
+    axes = [torch.as_tensor(a, dtype=torch.float32, device=device).reshape(-1) for a in axes]
+    sizes = [len(a) for a in axes]
+    strides = np.cumprod([1] + sizes[:-1]).tolist()
+    n_points = int(np.prod(sizes))
+    chunk = _grid_chunk_size(model, len(axes), max_mem_mb)
+    out = np.empty(n_points, dtype=np.float32)
+
+    def evaluate(start):
+        idx = torch.arange(start, min(start + chunk, n_points), device=device)
+        inputs = torch.stack([a[(idx // s) % n] for a, s, n in zip(axes, strides, sizes)], dim=1)
+        with torch.no_grad():
+            out[start:start + len(idx)] = model(inputs).reshape(-1).cpu().numpy()
+
+    # Cada bloco escreve numa fatia própria de 'out'; os kernels do torch liberam o GIL
+    starts = range(0, n_points, chunk)
+    if n_workers and n_workers > 1 and len(starts) > 1:
+        with ThreadPoolExecutor(n_workers) as pool:
+            list(pool.map(evaluate, starts))
+    else:
+        for start in starts:
+            evaluate(start)
+    return out.reshape(sizes[::-1])
+
+def evaluate_field(model, axes, device=None, max_mem_mb=256, n_workers=0, cache=None):
+    """
+    Avalia u no grid produto dos eixos em 'axes' (um por coluna de
+    entrada: d eixos espaciais e t) numa única passada, em blocos.
+    :param axes: Eixos 1D (tensor, array, lista ou escalar), na ordem das colunas.
+    :param device: Device das entradas (padrão: o dos parâmetros do modelo).
+    :param max_mem_mb: Limite de memória por bloco de pontos avaliado.
+    :param n_workers: Se > 1, avalia os blocos num pool de threads.
+    :param cache: FieldCache opcional; campos já avaliados com os mesmos
+                  pesos e eixos são reaproveitados.
+    :return: np.ndarray com os eixos em ordem inversa: (nt, ..., ny, nx).
+    """
+    if cache is None:
+        return _evaluate_grid(model, axes, device, max_mem_mb, n_workers)
+    key = cache.key(axes)
+    field = cache.get(key)
+    if field is None:
+        field = _evaluate_grid(model, axes, device, max_mem_mb, n_workers)
+        cache.put(key, field)
+    return field
+
+class FieldCache:
+    """
+    Cache de campos avaliados por evaluate_field, endereçado pelo conteúdo:
+    a chave é o SHA-256 do state_dict do modelo de origem (pesos e flags do
+    ansatz) e dos eixos do grid, então pesos novos ou outro ansatz
+    invalidam o cache automaticamente.
+    - memória: LRU com até 'max_items' campos;
+    - disco: um .npy por chave em 'cache_dir' (None desativa), gravado de
+      forma atômica, reaproveitado entre execuções.
+    O hash usa o modelo passado ao construtor (o original, com
+    state_dict), de modo que o cache vale também para a versão otimizada
+    por optimize_for_inference.
+    """
+    def __init__(self, model, cache_dir=None, max_items=32):
+        self.model = model
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, axes):
+        """Chave do campo do modelo atual no grid produto de 'axes'."""
+        h = hashlib.sha256()
+        for name, tensor in self.model.state_dict().items():
+            if not torch.is_tensor(tensor):
+                # Estado extra (flags do ansatz): entra na chave pelo repr
+                h.update(f"{name}:{tensor!r}".encode())
+                continue
+            array = tensor.detach().cpu().numpy()
+            h.update(f"{name}:{array.dtype}:{array.shape}".encode())
+            h.update(array.tobytes())
+        for axis in axes:
+            if torch.is_tensor(axis):
+                axis = axis.detach().cpu().numpy()
+            axis = np.asarray(axis, dtype=np.float32).reshape(-1)
+            h.update(f"axis:{axis.shape[0]}".encode())
+            h.update(axis.tobytes())
+        return h.hexdigest()
+
+    def get(self, key):
+        """Campo da chave 'key' (memória e depois disco), ou None."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        path = self._path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        field = np.load(path)
+        self._remember(key, field)
+        return field
+
+    def put(self, key, field):
+        """Guarda o campo na memória e, se houver cache_dir, no disco."""
+        self._remember(key, field)
+        path = self._path(key)
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, field)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, field):
+        field.flags.writeable = False  # o mesmo array é devolvido a todos os chamadores
+        with self._lock:
+            self._items[key] = field
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy") if self.cache_dir else None
+
+def make_field_cache(model, config):
+    """Cria o FieldCache do modelo (FIELD_CACHE_DIR e FIELD_CACHE_ITEMS do config)."""
+    return FieldCache(model, getattr(config, 'FIELD_CACHE_DIR', None),
+                      getattr(config, 'FIELD_CACHE_ITEMS', 32))
+
+def make_profiler(config):
+    """
+    Profiler opcional do treino (PROFILE = True), ou None.
+
+    Envolve a janela PROFILE_SCHEDULE = (wait, warmup, active) épocas do
+    torch.profiler, repetida PROFILE_REPEAT vezes. Ao fim de cada janela
+    ativa grava, ao lado de HISTORY_PATH, um trace do Chrome
+    (<histórico>_profile_step{N}.json, abrir em chrome://tracing ou
+    Perfetto) e a tabela dos operadores mais caros (..._step{N}.txt).
+    O loop de treino chama start(), step() a cada época e stop().
+    """
+    if not getattr(config, 'PROFILE', False):
+        return None
+    wait, warmup, active = getattr(config, 'PROFILE_SCHEDULE', (10, 5, 20))
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if torch.cuda.is_available() and 'cuda' in str(config.DEVICE):
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+    sort_by = 'self_cuda_time_total' if len(activities) > 1 else 'self_cpu_time_total'
+    base = os.path.splitext(config.HISTORY_PATH)[0] + '_profile'
+
+    def export(prof):
+        os.makedirs(os.path.dirname(base) or '.', exist_ok=True)
+        trace_path = f"{base}_step{prof.step_num}.json"
+        prof.export_chrome_trace(trace_path)
+        with open(f"{base}_step{prof.step_num}.txt", 'w') as f:
+            f.write(prof.key_averages().table(sort_by=sort_by,
+                                              row_limit=getattr(config, 'PROFILE_ROW_LIMIT', 30)))
+        print(f"Profile do treino salvo em: {trace_path}")
+
+    return torch.profiler.profile(
+        activities=activities,
+        schedule=torch.profiler.schedule(wait=wait, warmup=warmup, active=active,
+                                         repeat=getattr(config, 'PROFILE_REPEAT', 1)),
+        on_trace_ready=export,
+        record_shapes=getattr(config, 'PROFILE_SHAPES', False))
+
+def save_training_history(history_df, config):
+    """Salva o histórico de treinamento em um CSV."""
+    os.makedirs(os.path.dirname(config.HISTORY_PATH), exist_ok=True)
+    history_df.to_csv(config.HISTORY_PATH, index=False)
+    print(f"Histórico de treinamento salvo em {config.HISTORY_PATH}")
+
+# Colunas do histórico de treinamento ('Stage' é o índice do estágio em STAGES)
+HISTORY_COLUMNS = ['Epoch', 'Total Loss', 'PDE Loss', 'IC Loss', 'BC Loss', 'Stage']
+
+def history_binary_path(history_path):
+    """Caminho do histórico binário correspondente a HISTORY_PATH (.csv -> .bin)."""
+    return os.path.splitext(history_path)[0] + '.bin'
+
+class BinaryHistorySink:
+    """
+    Histórico de treino gravado incrementalmente em linhas binárias
+    float64 (HISTORY_PATH com extensão .bin), com os nomes das colunas num
+    .json ao lado. Cada append() grava um lote de linhas e faz flush, de
+    modo que nada se acumula em memória, uma queda não perde o histórico
+    e read_history() consegue ler a execução em andamento. close()
+    exporta o CSV em HISTORY_PATH.
+    """
+    def __init__(self, history_path, columns):
+        self.csv_path = history_path
+        self.path = history_binary_path(history_path)
+        self.columns = list(columns)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(os.path.splitext(self.path)[0] + '.json', 'w') as f:
+            json.dump({'columns': self.columns, 'dtype': 'float64'}, f)
+        self._file = open(self.path, 'wb')
+
+    def append(self, rows):
+        if rows:
+            self._file.write(np.asarray(rows, dtype=np.float64).tobytes())
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+        # Exporta o CSV em blocos, sem carregar o histórico inteiro
+        n_rows = _binary_history_rows(self.path, len(self.columns))
+        chunk = 100_000
+        for start in range(0, max(n_rows, 1), chunk):
+            df = read_history(self.csv_path, start=start, stop=start + chunk)
+            df.to_csv(self.csv_path, index=False, mode='w' if start == 0 else 'a',
+                      header=start == 0)
+        print(f"Histórico de treinamento salvo em {self.csv_path}")
+
+class CSVHistorySink:
+    """Histórico de treino acrescentado diretamente ao CSV em HISTORY_PATH, em lotes."""
+    def __init__(self, history_path, columns):
+        self.path = history_path
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Remove um histórico binário antigo para que read_history leia este CSV
+        if os.path.exists(history_binary_path(history_path)):
+            os.remove(history_binary_path(history_path))
+        self._file = open(self.path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def append(self, rows):
+        if rows:
+            self._writer.writerows(rows)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+        print(f"Histórico de treinamento salvo em {self.path}")
+
+# Registro de sinks do histórico, escolhidos pela chave HISTORY_SINK
+HISTORY_SINKS = {'binary': BinaryHistorySink, 'csv': CSVHistorySink}
+
+def make_history_sink(config, columns=HISTORY_COLUMNS):
+    """Cria o sink do histórico indicado por HISTORY_SINK (padrão: 'binary')."""
+    kind = getattr(config, 'HISTORY_SINK', 'binary')
+    if kind not in HISTORY_SINKS:
+        raise ValueError(f"Sink de histórico desconhecido: {kind}. Opções: {sorted(HISTORY_SINKS)}")
+    return HISTORY_SINKS[kind](config.HISTORY_PATH, columns)
+
+def _binary_history_rows(path, n_cols):
+    """Número de linhas completas no histórico binário (ignora uma linha parcial no fim)."""
+    return os.path.getsize(path) // (n_cols * 8) if os.path.exists(path) else 0
+
+def read_history(history_path, start=0, stop=None, step=1, last=None, max_rows=None):
+    """
+    Lê o histórico de treino, inclusive de uma execução em andamento.
+
+    Usa o histórico binário (via np.memmap, lendo só as linhas pedidas)
+    quando existir; caso contrário, lê o CSV em HISTORY_PATH.
+    :param start, stop, step: Fatia de linhas a ler.
+    :param last: Se fornecido, lê apenas as últimas 'last' linhas (tail).
+    :param max_rows: Se fornecido, aumenta 'step' para devolver no máximo
+                     max_rows linhas (útil para plotar execuções longas).
+    :return: DataFrame com as colunas do histórico.
+    """
+    bin_path = history_binary_path(history_path)
+    if not os.path.exists(bin_path):
+        df = pd.read_csv(history_path)
+        n_rows = len(df)
+    else:
+        with open(os.path.splitext(bin_path)[0] + '.json') as f:
+            columns = json.load(f)['columns']
+        n_rows = _binary_history_rows(bin_path, len(columns))
+
+    if last is not None:
+        start = max(n_rows - last, 0)
+    start, stop, _ = slice(start, stop).indices(n_rows)
+    if max_rows:
+        step = max(step, -(-(stop - start) // max_rows))
+
+    if not os.path.exists(bin_path):
+        return df.iloc[start:stop:step].reset_index(drop=True)
+    if n_rows == 0:
+        return pd.DataFrame(columns=columns)
+    data = np.memmap(bin_path, dtype=np.float64, mode='r', shape=(n_rows, len(columns)))
+    df = pd.DataFrame(np.array(data[start:stop:step]), columns=columns)
+    for column in ('Epoch', 'Stage'):
+        if column in df:
+            df[column] = df[column].astype(int)
+    return df
@@ -0,0 +1,113 @@
+# src_nd/velocity.py
+from collections import OrderedDict
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+def load_velocity_array(path, shape=None, dtype="float32"):
+    """
+    Abre o grid de velocidades de 'path' sem lê-lo inteiro para a RAM:
+    .npy via np.load(mmap_mode='r') ou binário bruto via np.memmap.
+    :param shape: Forma do binário bruto (obrigatória fora do .npy).
+    :return: Array somente leitura com eixos ([z,] [y,] x): o último eixo é x.
+    """
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if shape is None:
+        raise ValueError(f"VELOCITY_SHAPE é obrigatório para o binário bruto {path}.")
+    return np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape))
+
+
+class GridVelocity:
+    """
+    Modelo de velocidade em grid regular 1D, 2D ou 3D, guardado uma única
+    vez no device como tensor e interpolado (linear, bilinear ou trilinear)
+    por F.grid_sample, sem laços em Python nem cópias por época.
+
+    Os nós cobrem 'bounds' ([min, max] por eixo, na ordem x, y, z) com os
+    extremos incluídos; fora deles vale o valor da borda.
+
+    Os valores interpolados ficam num cache LRU de 'cache_size' entradas,
+    indexado pela identidade das colunas de coordenadas (endereço, forma,
+    strides e contador de versão). Conjuntos fixos de pontos (L-BFGS, RAR,
+    grids de avaliação) são interpolados uma vez; os buffers reescritos
+    in-place pelo CollocationSampler mudam de versão e invalidam a entrada.
+    O cache guarda referências às colunas, de modo que um endereço em cache
+    não pode ser reaproveitado por outro tensor.
+    """
+    def __init__(self, values, bounds, device, dtype=torch.float32, cache_size=8):
+        values = torch.tensor(np.ascontiguousarray(values), dtype=dtype, device=device)
+        self.d = values.dim()
+        if not 1 <= self.d <= 3 or len(bounds) != self.d:
+            raise ValueError(f"Grid de velocidade com forma {tuple(values.shape)} "
+                             f"incompatível com {len(bounds)} eixos de limites.")
+        bounds = torch.tensor(bounds, dtype=dtype, device=device)
+        self._lower = bounds[:, 0]
+        self._scale = 2.0 / (bounds[:, 1] - bounds[:, 0])
+
+        # grid_sample: (1, 1, H, W) em 1D/2D (1D com H = 1) e (1, 1, D, H, W) em 3D
+        self.values = values.reshape((1, 1) + (1,) * (self.d == 1) + tuple(values.shape))
+        self.c_min = values.min().item()
+        self.c_max = values.max().item()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def interpolate(self, coords):
+        """Velocidade em coords (N, d), sem cache nem grafo. :return: Tensor (N, 1)."""
+        with torch.no_grad():
+            grid = (coords.to(self.values.dtype) - self._lower) * self._scale - 1.0
+            if self.d == 1:
+                grid = F.pad(grid, (0, 1))
+            grid = grid.reshape((1, 1) + (1,) * (self.d == 3) + (-1, grid.shape[1]))
+            c = F.grid_sample(self.values, grid, mode='bilinear', padding_mode='border',
+                              align_corners=True)
+        return c.reshape(-1, 1).to(coords.dtype)
+
+    def __call__(self, *columns):
+        """
+        Velocidade nos pontos dados pelas colunas de coordenadas (x[, y[, z]]),
+        todas com a mesma forma.
+        :return: Tensor com a forma das colunas, sem grafo (c não depende dos
+                 parâmetros da rede).
+        """
+        key = tuple((col.data_ptr(), tuple(col.shape), col.stride()) for col in columns)
+        versions = tuple(col._version for col in columns)
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] == versions:
+            self._cache.move_to_end(key)
+            return entry[2]
+
+        coords = torch.cat([col.detach().reshape(-1, 1) for col in columns], dim=1)
+        c = self.interpolate(coords).reshape(columns[0].shape)
+        if self.cache_size:
+            # detach() compartilha armazenamento e contador de versão, sem o grafo
+            self._cache[key] = (tuple(col.detach() for col in columns), versions, c)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return c
+
+
+# Modelos já carregados, por (arquivo, forma, dtype, limites, device, dtype do tensor)
+_MODELS = {}
+
+def velocity_model(config, device, dtype=torch.float32):
+    """
+    GridVelocity de VELOCITY_FILE, lido uma vez por device/dtype e
+    reaproveitado por todas as chamadas seguintes de get_velocity.
+    Os limites vêm de VELOCITY_BOUNDS ou, por padrão, de X/Y/Z_BOUNDS
+    (tantos quantos forem os eixos do grid).
+    """
+    shape = getattr(config, 'VELOCITY_SHAPE', None)
+    file_dtype = getattr(config, 'VELOCITY_DTYPE', "float32")
+    bounds = getattr(config, 'VELOCITY_BOUNDS', None)
+    key = (config.VELOCITY_FILE, tuple(shape or ()), file_dtype,
+           repr(bounds), str(torch.device(device)), dtype)
+    if key not in _MODELS:
+        values = load_velocity_array(config.VELOCITY_FILE, shape, file_dtype)
+        if bounds is None:
+            bounds = [getattr(config, f"{axis}_BOUNDS") for axis in ('X', 'Y', 'Z')[:values.ndim]]
+        _MODELS[key] = GridVelocity(values, bounds, device, dtype,
+                                    getattr(config, 'VELOCITY_CACHE_SIZE', 8))
+    return _MODELS[key]
@@ -0,0 +1,295 @@
+# src_nd/visualization.py
+# Renderização independente da dimensão (pool de processos, histórico de loss,
+# animações em streaming) e os cortes de plot do motor genérico; src e src_2
+# re-exportam as partes comuns
+import os
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib import animation
+
+from src_nd.physics import SPATIAL_AXES, domain_bounds
+from src_nd.utils import read_history, evaluate_field
+
+def field_options(config):
+    """(max_mem_mb, n_workers) de evaluate_field a partir do config."""
+    return getattr(config, 'FIELD_MAX_MEM_MB', 256), getattr(config, 'FIELD_WORKERS', 0)
+
+def _init_render_worker():
+    """Backend sem janela nos processos de renderização."""
+    matplotlib.use('Agg')
+
+class PlotRenderer:
+    """
+    Serviço de renderização das figuras num pool de processos.
+
+    Recebe funções render_* (de nível de módulo) com campos já avaliados
+    (arrays numpy), de modo que o Matplotlib roda fora do processo
+    principal e em paralelo; submit() não bloqueia. Com n_workers=0 as
+    figuras são renderizadas no próprio processo, na chamada.
+    - submit(fn, *args): enfileira a renderização;
+    - pending(): figuras ainda em andamento;
+    - close(): espera as figuras pendentes e encerra o pool.
+    Usa o contexto 'spawn' para não herdar o estado do CUDA e das threads
+    de treino.
+    """
+    def __init__(self, n_workers=None):
+        self.n_workers = os.cpu_count() if n_workers is None else n_workers
+        self._pool = None
+        if self.n_workers:
+            self._pool = ProcessPoolExecutor(self.n_workers,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_render_worker)
+        self._futures = []
+
+    def submit(self, fn, *args):
+        """Renderiza fn(*args) em segundo plano (ou já, sem pool)."""
+        if self._pool is None:
+            fn(*args)
+            return
+        self._futures = [f for f in self._futures if not f.done() or f.exception()]
+        self._futures.append(self._pool.submit(fn, *args))
+
+    def pending(self):
+        """Número de figuras ainda não concluídas."""
+        return sum(not f.done() for f in self._futures)
+
+    def close(self):
+        """Espera as renderizações pendentes e encerra o pool."""
+        if self._pool is None:
+            return
+        for future in self._futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Falha ao renderizar figura: {e}")
+        self._futures = []
+        self._pool.shutdown()
+        self._pool = None
+
+def make_renderer(config):
+    """Cria o PlotRenderer com PLOT_WORKERS processos (None: um por núcleo)."""
+    return PlotRenderer(getattr(config, 'PLOT_WORKERS', None))
+
+def _render(renderer, fn, *args):
+    """Envia a renderização ao renderer, se houver, ou a executa aqui."""
+    if renderer is None:
+        fn(*args)
+    else:
+        renderer.submit(fn, *args)
+
+def render_wave_snapshots(x, times, U, model_type, save_path):
+    """Desenha e salva as curvas u(x) já avaliadas (U[k] é o tempo times[k])."""
+    plt.figure(figsize=(10, 6))
+
+    for t_val, u_pred in zip(times, U):
+        plt.plot(x, u_pred, label=f't = {t_val:.2f} s')
+
+    plt.xlabel('Posição (x)')
+    plt.ylabel('Deslocamento u(x)')
+    plt.title(f'Snapshots da Onda (Velocidade {model_type})')
+    plt.legend()
+    plt.grid(True, linestyle='--', alpha=0.6)
+
+    plt.savefig(save_path)
+    plt.close()
+    print(f"Plot de snapshots salvo em: {save_path}")
+
+def render_snapshots_2d(x, y, times, valid, fields, save_path):
+    """
+    Desenha os snapshots 2D já avaliados e salva em save_path.
+    :param times: Todos os tempos pedidos (um subplot por tempo).
+    :param valid: Índices de 'times' dentro de T_BOUNDS; fields[k] é o
+                  campo (ny, nx) do tempo times[valid[k]].
+    """
+    X_np, Y_np = np.meshgrid(x, y, indexing='xy')
+
+    n_times = len(times)
+    n_cols = 2
+    n_rows = math.ceil(n_times / n_cols)
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(n_cols * 6, n_rows * 5))
+    axes = axes.flatten()
+
+    # guarde também o índice do eixo para manter o mapeamento correto
+    snapshots = list(zip(valid, fields))
+    vmin = float(np.min(fields)) if len(valid) else float('inf')
+    vmax = float(np.max(fields)) if len(valid) else float('-inf')
+
+    for i, t_val in enumerate(times):
+        if i not in valid:
+            axes[i].set_title(f"Tempo t={t_val:.2f} s (fora dos limites)")
+            axes[i].axis('off')
+            continue
+
+        # Prepara o subplot (o heatmap será desenhado depois com vmin/vmax globais)
+        ax = axes[i]
+        ax.set_xlabel('Posição (x)')
+        ax.set_ylabel('Posição (y)')
+        ax.set_title(f'Snapshot da Onda 2D em t = {t_val:.2f} s')
+        ax.set_aspect('equal', 'box')
+
+    # Desenha os snapshots agora com escala global
+    cax = None
+    # snapshots contém tuplas (axis_index, u_array)
+    for axis_idx, u in snapshots:
+        ax = axes[axis_idx]
+        cax = ax.pcolormesh(X_np, Y_np, u, cmap='seismic', shading='auto', vmin=vmin, vmax=vmax)
+
+    # Remove eixos extras
+    for i in range(n_times, len(axes)):
+        fig.delaxes(axes[i])
+
+    # Adiciona a barra de cores apenas se houver pelo menos um snapshot
+    if cax is not None:
+        fig.colorbar(cax, ax=axes.tolist(), orientation='vertical', fraction=0.02, pad=0.04, label='Deslocamento u(x,y,t)')
+
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150)
+    plt.close()
+    print(f"Plot de snapshots 2D salvo em: {save_path}")
+
+def render_loss_history(history_df, save_path):
+    """Desenha e salva o histórico de loss já carregado."""
+    plt.figure(figsize=(12, 8))
+
+    plt.semilogy(history_df['Epoch'], history_df['Total Loss'], label='Total Loss')
+    plt.semilogy(history_df['Epoch'], history_df['PDE Loss'], label='PDE Loss', alpha=0.7)
+    plt.semilogy(history_df['Epoch'], history_df['IC Loss'], label='IC Loss', alpha=0.7)
+    plt.semilogy(history_df['Epoch'], history_df['BC Loss'], label='BC Loss', alpha=0.7)
+
+    # Marca as transições entre estágios de otimização (ex.: Adam -> L-BFGS)
+    if 'Stage' in history_df:
+        starts = history_df['Epoch'][history_df['Stage'].diff() > 0]
+        for epoch in starts:
+            plt.axvline(epoch, color='gray', ls=':', alpha=0.8)
+
+    plt.title('Histórico de Loss Durante o Treinamento')
+    plt.xlabel('Época')
+    plt.ylabel('Loss (log scale)')
+    plt.legend()
+    plt.grid(True, which="both", ls="--", alpha=0.5)
+
+    plt.savefig(save_path)
+    plt.close()
+    print(f"Plot de loss salvo em: {save_path}")
+
+def plot_loss_history(history_df, config, filename="loss_history.png", max_rows=None, renderer=None):
+    """
+    Plota o histórico de todas as componentes da loss (qualquer dimensão).
+
+    'history_df' pode ser um DataFrame ou o caminho do histórico
+    (HISTORY_PATH); nesse caso ele é lido com read_history, inclusive
+    durante o treino, inteiro ou, com 'max_rows' (padrão:
+    HISTORY_PLOT_MAX_ROWS do config), decimado para no máximo max_rows linhas.
+    """
+    if isinstance(history_df, str):
+        max_rows = max_rows or getattr(config, 'HISTORY_PLOT_MAX_ROWS', None)
+        history_df = read_history(history_df, max_rows=max_rows)
+
+    save_path = os.path.join(config.PLOT_PATH, filename)
+    _render(renderer, render_loss_history, history_df, save_path)
+
+def _animation_writer(save_path, fps):
+    """Writer do Matplotlib para a extensão de save_path (.mp4 via ffmpeg, .gif via Pillow)."""
+    ext = os.path.splitext(save_path)[1].lower()
+    if ext == '.gif':
+        return animation.PillowWriter(fps=fps)
+    if ext == '.mp4':
+        if not animation.writers.is_available('ffmpeg'):
+            raise RuntimeError("ffmpeg não encontrado para gravar .mp4; use .gif ou .npy")
+        return animation.FFMpegWriter(fps=fps)
+    raise ValueError(f"Formato de animação desconhecido: {ext}. Opções: ['.mp4', '.gif', '.npy']")
+
+def _animation_options(config, n_frames, fps, chunk_frames):
+    """Completa n_frames, fps e chunk_frames com ANIMATION_FRAMES/FPS/CHUNK do config."""
+    return (n_frames or getattr(config, 'ANIMATION_FRAMES', 200),
+            fps or getattr(config, 'ANIMATION_FPS', 25),
+            chunk_frames or getattr(config, 'ANIMATION_CHUNK', 16))
+
+def _frame_chunks(model, config, device, axes, times, chunk_frames):
+    """
+    Quadros da animação em blocos de chunk_frames tempos, avaliados no grid
+    produto de 'axes' (eixos espaciais) e de cada bloco de 'times'.
+    :return: Gerador de (início, tempos do bloco, campo do bloco).
+    """
+    for start in range(0, len(times), chunk_frames):
+        t_chunk = times[start:start + chunk_frames]
+        yield start, t_chunk, evaluate_field(model, list(axes) + [t_chunk], device, *field_options(config))
+
+def _save_frames_npy(save_path, chunks, shape):
+    """Grava os quadros de 'chunks' (ver _frame_chunks) num .npy float32 de forma 'shape', via memmap."""
+    frames = np.lib.format.open_memmap(save_path, mode='w+', dtype=np.float32, shape=shape)
+    for start, _, U in chunks:
+        frames[start:start + len(U)] = U
+    frames.flush()
+    del frames
+    print(f"Quadros da animação salvos em: {save_path}")
+
+def slice_axes(config):
+    """
+    Eixos espaciais dos plots: os dois primeiros eixos com resolução
+    N_X/GRID_NX e N_Y/GRID_NY (ou 100 pontos); os demais fixos no valor
+    SLICE_<EIXO> do config (padrão: centro do domínio), isto é, um corte
+    plano do domínio 3D.
+    :return: Lista com um eixo (array) por dimensão espacial.
+    """
+    bounds = domain_bounds(config)[:-1]
+    x_res = getattr(config, 'N_X', None) or getattr(config, 'GRID_NX', None) or 100
+    y_res = getattr(config, 'N_Y', None) or getattr(config, 'GRID_NY', None) or x_res
+    axes = []
+    for k, (lo, hi) in enumerate(bounds):
+        if k < 2:
+            axes.append(np.linspace(lo, hi, int((x_res, y_res)[k])))
+        else:
+            axes.append(np.array([getattr(config, f"SLICE_{SPATIAL_AXES[k].upper()}", (lo + hi) / 2)]))
+    return axes
+
+def evaluate_slices(model, config, device, times, cache=None):
+    """
+    Campo no corte de slice_axes para cada tempo.
+    :return: (axes, U) com U de forma (nt, nx) em 1D ou (nt, ny, nx) em 2D/3D.
+    """
+    axes = slice_axes(config)
+    U = evaluate_field(model, axes + [times], device, *field_options(config), cache=cache)
+    # Remove os eixos fixos do corte (tamanho 1), que vêm logo após t
+    return axes, U.reshape((len(times),) + U.shape[-min(len(axes), 2):])
+
+def _slice_render_args(model, config, device, times, save_path, cache=None):
+    """(render_fn, args) do snapshot dos tempos dentro de T_BOUNDS."""
+    valid = [i for i, t_val in enumerate(times) if config.T_BOUNDS[0] <= t_val <= config.T_BOUNDS[1]]
+    axes, U = evaluate_slices(model, config, device, [times[i] for i in valid], cache)
+    if len(axes) == 1:
+        return render_wave_snapshots, (axes[0], [times[i] for i in valid], U, config.MODEL_TYPE, save_path)
+    return render_snapshots_2d, (axes[0], axes[1], list(times), valid, U, save_path)
+
+def plot_wave_slices(model, config, device, times=[0.0, 0.25, 0.5, 0.75], filename="snapshots.png",
+                     cache=None, renderer=None):
+    """
+    Plota "fotos" da onda em diferentes instantes: curvas u(x) em 1D,
+    mapas u(x, y) em 2D e, em 3D, mapas do corte z = SLICE_Z.
+    :param cache: FieldCache opcional (ver evaluate_field).
+    :param renderer: PlotRenderer opcional; a figura é renderizada em segundo plano.
+    """
+    model.eval()
+    save_path = os.path.join(config.PLOT_PATH, filename)
+    fn, args = _slice_render_args(model, config, device, list(times), save_path, cache)
+    _render(renderer, fn, *args)
+
+def submit_training_snapshot(model, config, device, epoch, renderer):
+    """
+    Snapshot ao vivo durante o treino: avalia o corte de plot_wave_slices
+    nos SNAPSHOT_TIMES (no processo de treino, sem gradientes) e entrega a
+    figura ao renderer, sem esperar pelo Matplotlib. Grava
+    snapshot_epoch{N}.png em PLOT_PATH. Se o renderer já tiver 2 figuras
+    pendentes por processo, o snapshot é descartado em vez de acumular atraso.
+    """
+    if renderer.pending() >= 2 * max(renderer.n_workers, 1):
+        return
+    times = list(getattr(config, 'SNAPSHOT_TIMES', [0.0, 0.25, 0.5, 0.75]))
+    save_path = os.path.join(config.PLOT_PATH, f"snapshot_epoch{epoch}.png")
+    fn, args = _slice_render_args(model, config, device, times, save_path)
+    renderer.submit(fn, *args)